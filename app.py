@@ -1,8 +1,11 @@
 import streamlit as st
-from dlisio import dlis
-import tempfile
 import base64
+import os
+import uuid
 
+import pandas as pd
+
+from core import cache, instrumentation, metadata, selection
 import info
 import data
 import export
@@ -15,28 +18,185 @@ def get_base64_image(image_path):
 
 qr_code_base64 = get_base64_image("QR-CODE_PIX.png")
 
-def dlis_load(uploaded_file):
-    if uploaded_file is not None:
-        st.session_state.uploaded_file_name = uploaded_file.name
-        try:
-            with tempfile.NamedTemporaryFile(delete=False) as tmp_file:
-                tmp_file.write(uploaded_file.read())
-                tmp_file_path = tmp_file.name
-            dlis_file = dlis.load(tmp_file_path)
-            
-            if dlis_file:
-                st.sidebar.success('File Loaded Successfully!')
-                st.sidebar.write(f"Number of Logical Files: {len(dlis_file)}")
-            else:
-                st.sidebar.error('Failed to load DLIS file.')
-            
-            return dlis_file
-        except Exception as e:
-            st.error(f"Error loading DLIS file: {e}")
-            return None
-    else:
-        st.warning("Please, select a DLIS file.")
+LOAD_POLL_SECONDS = 0.5
+DIAGNOSTICS_DEFAULT = os.environ.get('DLIS_EXPLORER_DIAGNOSTICS', '') == '1'
+DIAGNOSTICS_DIR = os.environ.get('DLIS_EXPLORER_DIAGNOSTICS_DIR')
+
+@st.cache_resource
+def get_file_cache():
+    return cache.DlisFileCache()
+
+@st.cache_resource
+def get_metadata_index():
+    return metadata.MetadataIndex()
+
+def acquire_dlis_files(uploaded_files):
+    """
+    Returns {digest: (file name, DLIS file)} for the uploaded files, reusing the process-level cache
+    across reruns. The content hash of each upload is computed once; the session keeps a lease on every
+    file until it is removed from the uploads or the session ends. New files are loaded in parallel by
+    the loader threads of the cache, and uploads with the same content share one file.
+    """
+    file_cache = get_file_cache()
+    leases = st.session_state.get('dlis_leases', {})
+    current = {}
+    files = {}
+    
+    for uploaded_file in uploaded_files:
+        lease = leases.get(uploaded_file.file_id)
+        if lease is None:
+            with instrumentation.stage('hash upload', uploaded_file.size):
+                digest = cache.content_hash(uploaded_file)
+            lease = file_cache.acquire(uploaded_file, digest)
+        else:
+            file_cache.touch(lease.digest)
+        current[uploaded_file.file_id] = lease
+        files.setdefault(lease.digest, (uploaded_file.name, lease.dlis_file))
+    
+    for file_id, lease in leases.items():
+        if file_id not in current:
+            lease.release()
+    st.session_state.dlis_leases = current
+    return files
+
+def uploaded_digests():
+    """
+    Returns the hashes of the uploads the session holds a lease on, as of the last successful load.
+    """
+    return {lease.digest for lease in st.session_state.get('dlis_leases', {}).values()}
+
+def start_diagnostics():
+    """
+    Activates the stage recorder of the session for this rerun when diagnostics are enabled
+    (see core.instrumentation). Returns the recorder, or None when diagnostics are off; turning them
+    off drops the recorder and removes its Prometheus file.
+    """
+    if not st.session_state.get('diagnostics', DIAGNOSTICS_DEFAULT):
+        instrumentation.activate(None)
+        recorder = st.session_state.pop('diagnostics_recorder', None)
+        if recorder is not None:
+            recorder.close()
         return None
+    recorder = st.session_state.get('diagnostics_recorder')
+    if recorder is None:
+        recorder = instrumentation.Recorder()
+        st.session_state.diagnostics_recorder = recorder
+        st.session_state.diagnostics_session = uuid.uuid4().hex[:12]
+    if st.session_state.get('diagnostics_trace_memory'):
+        recorder.trace_memory = True
+    recorder.start_run(st.session_state.get('page_selection', ''))
+    instrumentation.activate(recorder)
+    return recorder
+
+def record_loading(digest, dlis_file):
+    """
+    Adds the spooling and indexing times of a file loaded in the background to the diagnostics,
+    once per file.
+    """
+    recorder = instrumentation.active()
+    recorded = st.session_state.setdefault('diagnostics_loaded', set())
+    if recorder is None or digest in recorded:
+        return
+    recorder.record('spool upload', dlis_file.spool_seconds, dlis_file.total_bytes)
+    recorder.record('index file', dlis_file.index_seconds, dlis_file.total_bytes)
+    recorded.add(digest)
+
+def diagnostics_panel(recorder):
+    """
+    Sidebar panel with the stages of the last rerun and the totals of the session, downloadable as
+    JSON lines or Prometheus text. With DLIS_EXPLORER_DIAGNOSTICS_DIR set, every rerun is also
+    appended to diagnostics.jsonl and the totals written to a .prom file of the session there, removed
+    when the session ends or diagnostics are turned off.
+    """
+    instrumentation.activate(None)
+    with st.sidebar.expander('Diagnostics', expanded=False):
+        st.checkbox('Record stage timings', value=DIAGNOSTICS_DEFAULT, key='diagnostics',
+                    help='Times upload, loading, decoding, rendering, alignment and export at each rerun.')
+        if recorder is None:
+            return
+        st.checkbox('Trace memory peaks (slower)', key='diagnostics_trace_memory',
+                    help='Starts tracemalloc for the whole process until it restarts.')
+
+        stages = recorder.current['stages']
+        if stages:
+            table = pd.DataFrame(stages)
+            table['stage'] = ['  ' * depth + name for depth, name in zip(table['depth'], table['stage'])]
+            table['MB'] = table['bytes'].astype('float64') / 1024 ** 2
+            st.write(f"Rerun {recorder.current['run']}")
+            st.dataframe(table[['stage', 'seconds', 'MB', 'peak_mb', 'rss_mb']].round(3), hide_index=True)
+
+        totals = recorder.totals()
+        if totals:
+            st.write(f"Last {len(recorder.runs)} reruns")
+            st.dataframe(pd.DataFrame([(name, count, seconds) for name, (count, seconds, _) in totals.items()],
+                                      columns=['stage', 'count', 'seconds']).round(3), hide_index=True)
+        labels = {'session': st.session_state.diagnostics_session}
+        st.download_button('Download JSON lines', data=recorder.jsonl(), file_name='diagnostics.jsonl',
+                           mime='application/x-ndjson')
+        st.download_button('Download Prometheus text', data=recorder.prometheus(labels), file_name='diagnostics.prom',
+                           mime='text/plain')
+
+    if DIAGNOSTICS_DIR:
+        os.makedirs(DIAGNOSTICS_DIR, exist_ok=True)
+        recorder.write_jsonl(os.path.join(DIAGNOSTICS_DIR, 'diagnostics.jsonl'), [recorder.current])
+        recorder.write_prometheus(os.path.join(DIAGNOSTICS_DIR, f"diagnostics-{labels['session']}.prom"), labels)
+
+@st.fragment(run_every=LOAD_POLL_SECONDS)
+def loading_status(loading_files, logical_files_shown):
+    """
+    Shows the progress of the files loaded in the background, polling them every LOAD_POLL_SECONDS.
+    The whole page is rerun when a new Logical File is available or loading of a file is over.
+    """
+    if any(dlis_file.finished for _, dlis_file in loading_files) or \
+            [len(dlis_file) for _, dlis_file in loading_files] != logical_files_shown:
+        st.rerun()
+    for name, dlis_file in loading_files:
+        text = dlis_file.describe() if len(loading_files) == 1 else f"{name}: {dlis_file.describe()}"
+        st.progress(dlis_file.progress(), text=text)
+
+def dlis_load(uploaded_files):
+    """
+    Returns {digest: (file name, DLIS file)} for the uploaded files that did not fail to load,
+    and shows their loading status in the sidebar.
+    """
+    try:
+        files = acquire_dlis_files(uploaded_files or [])
+    except Exception as e:
+        st.error(f"Error loading DLIS file: {e}")
+        return {}
+    
+    loading_files = []
+    for digest, (name, dlis_file) in list(files.items()):
+        if dlis_file.failed:
+            st.sidebar.error(f"Failed to load {name}: {dlis_file.error}")
+            del files[digest]
+        elif dlis_file.done:
+            record_loading(digest, dlis_file)
+        else:
+            loading_files.append((name, dlis_file))
+    
+    loaded = [(name, dlis_file) for name, dlis_file in files.values() if dlis_file.done]
+    if len(loaded) == 1 and len(files) == 1:
+        st.sidebar.success('File Loaded Successfully!')
+        st.sidebar.write(f"Number of Logical Files: {len(loaded[0][1])}")
+    elif loaded:
+        st.sidebar.success(f"{len(loaded)} Files Loaded Successfully!")
+        for name, dlis_file in loaded:
+            st.sidebar.write(f"{name}: {len(dlis_file)} Logical File(s)")
+    if loading_files:
+        with st.sidebar:
+            loading_status(loading_files, [len(dlis_file) for _, dlis_file in loading_files])
+    return files
+
+def active_file(files):
+    """
+    Returns the digest of the file shown on the General Information and Data Visualization pages,
+    chosen in the sidebar when several files are open.
+    """
+    if len(files) == 1:
+        return next(iter(files))
+    return st.sidebar.selectbox('Active file', list(files), format_func=lambda digest: files[digest][0],
+                                key='active_file', help='Curves can be selected from every file and exported together.')
 
 def home_page():
     st.title("Welcome to DLIS Data Explorer")
@@ -52,7 +212,7 @@ def home_page():
     
     st.markdown("### How to use:")
     st.write("""
-    1. Upload a DLIS file using the file upload option in the sidebar.
+    1. Upload one or more DLIS files using the file upload option in the sidebar.
     2. Navigate to the desired page in the menu.
     3. Select the curve(s) you want to visualize and export (LAS).
     4. Have fun!
@@ -131,25 +291,47 @@ def home_page():
 st.sidebar.title('DLIS Data Explorer')
 st.sidebar.write('Load your DLIS file using the file upload option below')
 
-uploaded_file = st.sidebar.file_uploader('DLIS File', type=['.dlis'], help='DLIS File is a binary file format for well logs, developed by Schlumberger in the late 80s and published by the American Petroleum Institute (API) in 1991.')
+recorder = start_diagnostics()
+
+uploaded_files = st.sidebar.file_uploader('DLIS Files', type=['.dlis'], accept_multiple_files=True, help='DLIS File is a binary file format for well logs, developed by Schlumberger in the late 80s and published by the American Petroleum Institute (API) in 1991. Several files (runs or wells) can be open at once.')
 
-if uploaded_file:
-    dlis_file = dlis_load(uploaded_file)
+previous_digests = uploaded_digests()
+dlis_files = dlis_load(uploaded_files)
+file_names = {digest: name for digest, (name, _) in dlis_files.items()}
+removed_digests = previous_digests - uploaded_digests()
+if removed_digests and 'selected_curves' in st.session_state:
+    selection.drop_files(st.session_state.selected_curves, st.session_state.get('logical_file_dfs'),
+                         removed_digests)
+
+if dlis_files:
+    digest = active_file(dlis_files)
+    file_name, dlis_file = dlis_files[digest]
 else:
-    dlis_file = None
+    digest = file_name = dlis_file = None
     
 st.sidebar.title('Menu')
-options = st.sidebar.radio('Pages', options=['Home', 'General Information', 'Data Visualization', 'Export'])
-
-if options == 'Home':
-    home_page()
-elif dlis_file:
-    if options == 'General Information':
-        info.info(dlis_file)
-    elif options == 'Data Visualization':
-        data.data(dlis_file)
-    elif options == 'Export':
+options = st.sidebar.radio('Pages', options=['Home', 'General Information', 'Data Visualization', 'Export'],
+                           key='page_selection')
+
+with instrumentation.stage(f"page {options}"):
+    if options == 'Home':
+        home_page()
+    elif options == 'Export' and st.session_state.get('selected_curves'):
         export.export()
-else:
-    if options != 'Home':
-        st.warning("Please, upload a DLIS file to access this page.")
\ No newline at end of file
+    elif dlis_file is not None and not len(dlis_file):
+        st.info("The file is being indexed. Its Logical Files will appear here as soon as they are read.")
+    elif dlis_file:
+        if options == 'General Information':
+            info.info(dlis_file, get_metadata_index(), digest, file_name)
+        elif options == 'Data Visualization':
+            data.data(dlis_file, digest, file_name)
+        elif options == 'Export':
+            export.export()
+    else:
+        if options != 'Home':
+            st.warning("Please, upload a DLIS file to access this page.")
+
+if 'logical_file_dfs' in st.session_state:
+    data.memory_panel(st.session_state.logical_file_dfs, file_names)
+
+diagnostics_panel(recorder)
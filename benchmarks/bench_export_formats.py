@@ -0,0 +1,84 @@
+"""
+Compares the size and the write and read times of the export formats: LAS (las_writer.write_las)
+and the columnar formats of core.columnar (Parquet, Feather, HDF5 when h5py is installed).
+Each file is read back with its usual reader (lasio for LAS) and checked against the DataFrame.
+
+Usage: python benchmarks/bench_export_formats.py [rows] [curves]
+"""
+import io
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_las_writer import synthetic_dataframe, timed
+from core import columnar, las_writer
+
+
+def write_las(df):
+    buffer = io.BytesIO()
+    las_writer.write_las(buffer, df, list(df.columns), units={'DEPTH': 'm'}, depth_unit='m')
+    return buffer.getvalue()
+
+
+def read_las(data):
+    import lasio
+
+    return lasio.read(io.StringIO(data.decode('utf-8'))).df().reset_index()
+
+
+def write_columnar(df, file_format):
+    buffer = io.BytesIO()
+    columnar.write_table(buffer, df, list(df.columns), file_format, units={'DEPTH': 'm'}, depth_unit='m')
+    return buffer.getvalue()
+
+
+def read_columnar(data, file_format):
+    import pandas as pd
+
+    if file_format == 'parquet':
+        return pd.read_parquet(io.BytesIO(data))
+    if file_format == 'feather':
+        return pd.read_feather(io.BytesIO(data))
+    import h5py
+    with h5py.File(io.BytesIO(data), 'r') as h5:
+        return pd.DataFrame({column: h5[column][:] for column in h5.attrs['columns']})
+
+
+def same_values(df, result):
+    return all(np.allclose(df[column].to_numpy(), result[column].to_numpy(dtype='float64'), equal_nan=True,
+                           rtol=0, atol=1e-5) for column in df.columns)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    curves = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    df = synthetic_dataframe(rows, curves)
+
+    cases = [('las', write_las, read_las)]
+    for file_format in columnar.available_formats():
+        cases.append((file_format, lambda df, f=file_format: write_columnar(df, f),
+                      lambda data, f=file_format: read_columnar(data, f)))
+
+    print(f"{rows} rows x {curves + 1} curves")
+    print(f"{'format':8} {'size (MB)':>10} {'write (s)':>10} {'read (s)':>10}  same values")
+    las_size = las_write = None
+    failed = False
+    for name, write, read in cases:
+        data, write_seconds = timed(write, df)
+        result, read_seconds = timed(read, data)
+        same = same_values(df, result)
+        failed = failed or not same
+        line = f"{name:8} {len(data) / 1024 ** 2:10.1f} {write_seconds:10.3f} {read_seconds:10.3f}  {same}"
+        if las_size is None:
+            las_size, las_write = len(data), write_seconds
+        else:
+            line += f"  ({las_size / len(data):.1f}x smaller, {las_write / write_seconds:.1f}x faster to write than LAS)"
+        print(line)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
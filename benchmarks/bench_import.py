@@ -0,0 +1,58 @@
+"""
+Checks the import time of the UI-free core package against a budget.
+Each measurement imports every core module in a fresh interpreter and also checks that no UI or
+file format library (Streamlit, matplotlib, dlisio, lasio) was pulled in: those are imported
+only by the pages or when a file is actually loaded or written.
+
+Usage: python benchmarks/bench_import.py [budget_seconds] [runs]
+Exits with status 1 when the best run exceeds the budget or a heavy module was imported.
+"""
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CORE_MODULES = ['core.alignment', 'core.arrays', 'core.cache', 'core.columnar', 'core.depth', 'core.framedata',
+                'core.decimate', 'core.framestore', 'core.instrumentation', 'core.las_writer', 'core.loading',
+                'core.metadata', 'core.nulls', 'core.pipeline', 'core.report', 'core.selection', 'core.stats',
+                'core.units']
+
+HEAVY_MODULES = ['streamlit', 'matplotlib', 'dlisio', 'lasio']
+
+PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+for name in {CORE_MODULES!r}:
+    __import__(name)
+seconds = time.perf_counter() - start
+print(json.dumps({{'seconds': seconds, 'heavy': [name for name in {HEAVY_MODULES!r} if name in sys.modules]}}))
+"""
+
+
+def measure():
+    output = subprocess.run([sys.executable, '-c', PROBE], cwd=ROOT, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def main(budget=1.0, runs=5):
+    results = [measure() for _ in range(runs)]
+    best = min(result['seconds'] for result in results)
+    heavy = sorted({name for result in results for name in result['heavy']})
+
+    print(f"core import: best {best:.3f} s of {runs} runs (budget {budget:.3f} s)")
+    failed = False
+    if best > budget:
+        print("FAIL: import time over budget")
+        failed = True
+    if heavy:
+        print(f"FAIL: heavy modules imported by core: {', '.join(heavy)}")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    sys.exit(main(float(args[0]) if args else 1.0, int(args[1]) if len(args) > 1 else 5))
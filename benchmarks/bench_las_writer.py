@@ -0,0 +1,72 @@
+"""
+Compares the streaming LAS writer (las_writer.write_las) with lasio's LASFile.write.
+Checks that both produce the same bytes and prints the wall time of each.
+
+Usage: python benchmarks/bench_las_writer.py [rows] [curves]
+"""
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import las_writer
+
+
+def synthetic_dataframe(rows, curves, seed=0):
+    rng = np.random.default_rng(seed)
+    columns = {'DEPTH': 1000.0 + 0.1524 * np.arange(rows)}
+    for i in range(curves):
+        values = rng.normal(100.0, 30.0, rows)
+        values[rng.random(rows) < 0.02] = np.nan
+        columns[f"CURVE{i:02d}"] = values
+    return pd.DataFrame(columns)
+
+
+def lasio_bytes(df, depth_unit):
+    import lasio
+
+    las = lasio.LASFile()
+    las.well.WELL.value = "WELL"
+    las.other = f"Depth unit: {depth_unit}\nGenerated by DLIS Data Explorer"
+    las.append_curve_item(lasio.CurveItem(mnemonic='DEPTH', unit=depth_unit, data=df['DEPTH']))
+    for column in df.columns[1:]:
+        las.append_curve_item(lasio.CurveItem(mnemonic=column, unit='', data=df[column]))
+    buffer = io.StringIO()
+    las.write(buffer, version=2.0)
+    return buffer.getvalue().encode('utf-8')
+
+
+def streaming_bytes(df, depth_unit):
+    buffer = io.BytesIO()
+    las_writer.write_las(buffer, df, list(df.columns), units={'DEPTH': depth_unit}, depth_unit=depth_unit)
+    return buffer.getvalue()
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    curves = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    df = synthetic_dataframe(rows, curves)
+
+    expected, lasio_seconds = timed(lasio_bytes, df, 'm')
+    result, streaming_seconds = timed(streaming_bytes, df, 'm')
+
+    print(f"{rows} rows x {curves + 1} curves, {len(expected) / 1024 ** 2:.1f} MB")
+    print(f"lasio      {lasio_seconds:8.3f} s")
+    print(f"streaming  {streaming_seconds:8.3f} s  ({lasio_seconds / streaming_seconds:.1f}x)")
+    print(f"identical output: {result == expected}")
+    return 0 if result == expected else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""
+Benchmark suite of the hot paths: loading (indexing) a DLIS file, decoding every channel of its
+frames, aligning curves from frames with offset depth grids (pipeline.combine_dataframes) and
+writing the LAS file (pipeline.create_las_file).
+
+Fixtures are synthetic and sized from the command line (see synthetic.py); real files can be
+added with --dlis, each giving a load and a decode stage of its own. Every stage reports the best
+wall time of --repeat runs and the peak of the memory traced by tracemalloc in one more run (NumPy
+and Python allocations; memory allocated by dlisio's C++ code is not traced).
+
+With --baseline, results are compared with a stored run of the same configuration and the suite
+fails (exit code 1) when a stage is slower or uses more memory than the baseline by more than
+--threshold / --memory-threshold. --update-baseline stores the current results instead.
+
+Usage:
+    python benchmarks/bench_suite.py --baseline benchmarks/baseline.json
+    python benchmarks/bench_suite.py --samples 200000 --channels 60 --dlis data/well.dlis
+    python benchmarks/bench_suite.py --baseline benchmarks/baseline.json --update-baseline
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import synthetic
+from core import depth, framedata, loading, pipeline
+
+MIN_SECONDS = 0.005
+MIN_PEAK_MB = 1.0
+
+
+def load_stage(path):
+    def run():
+        logical_files = [logical_file for logical_file, _ in loading.iter_logical_files(path)]
+        for logical_file in logical_files:
+            logical_file.close()
+    return run
+
+
+def decode_stage(path):
+    """
+    Decodes every channel of every frame of the first logical file, as the Data Visualization page
+    does when all curves are shown. The file is indexed once, outside of the measurement.
+    """
+    from dlisio import dlis
+
+    logical_files = dlis.load(path)
+    frames = logical_files[0].frames
+
+    def run():
+        for frame in frames:
+            frame_df = framedata.LazyFrame(frame)
+            depth.detect_depth_column(frame_df)
+            frame_df.prepare(frame_df.columns)
+            for column in frame_df.columns:
+                frame_df[column]
+    return run, logical_files
+
+
+def align_stage(frame_dfs, selected_curves):
+    def run():
+        return pipeline.combine_dataframes(selected_curves, frame_dfs, 'm', grid='finest')
+    return run
+
+
+def las_stage(combined_df):
+    curves = [column for column in combined_df.columns if column != 'DEPTH']
+
+    def run():
+        with pipeline.create_las_file(combined_df, curves, depth_unit='m') as las_file:
+            while las_file.read(8 * 1024 ** 2):
+                pass
+    return run
+
+
+def measure(run, repeat):
+    """
+    Returns {'seconds': best wall time of `repeat` runs, 'peak_mb': peak traced memory of one run}.
+    """
+    seconds = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        seconds.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'seconds': round(min(seconds), 4), 'peak_mb': round(peak / 1024 ** 2, 2)}
+
+
+def run_suite(config, dlis_paths=(), repeat=3, log=sys.stderr):
+    """
+    Builds the fixtures of `config`, runs every stage and returns {stage: measure()}.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='dlis-bench-') as directory:
+        path = synthetic.write_dlis(os.path.join(directory, 'synthetic.dlis'), config['logical_files'],
+                                    config['frames'], config['channels'], config['samples'])
+        files = [('synthetic', path)] + [(os.path.basename(dlis_path), dlis_path) for dlis_path in dlis_paths]
+
+        for name, file_path in files:
+            print(f"load:{name}", file=log)
+            results[f"load:{name}"] = measure(load_stage(file_path), repeat)
+            print(f"decode:{name}", file=log)
+            run, logical_files = decode_stage(file_path)
+            with logical_files:
+                results[f"decode:{name}"] = measure(run, repeat)
+
+    frame_dfs, selected_curves = synthetic.synthetic_frames(config['frames'], config['channels'], config['samples'])
+    print("align", file=log)
+    run = align_stage(frame_dfs, selected_curves)
+    results['align'] = measure(run, repeat)
+    print("las", file=log)
+    results['las'] = measure(las_stage(run()), repeat)
+    return results
+
+
+def compare(results, baseline, threshold, memory_threshold):
+    """
+    Returns the regressions of `results` against the stages of a baseline, as messages.
+    Differences below MIN_SECONDS and MIN_PEAK_MB are ignored as noise.
+    """
+    regressions = []
+    for stage, result in results.items():
+        reference = baseline.get(stage)
+        if reference is None:
+            continue
+        if result['seconds'] > max(reference['seconds'] * (1 + threshold), reference['seconds'] + MIN_SECONDS):
+            regressions.append(f"{stage}: {result['seconds']:.4f} s, baseline {reference['seconds']:.4f} s")
+        if result['peak_mb'] > max(reference['peak_mb'] * (1 + memory_threshold), reference['peak_mb'] + MIN_PEAK_MB):
+            regressions.append(f"{stage}: peak {result['peak_mb']:.1f} MB, baseline {reference['peak_mb']:.1f} MB")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark loading, decoding, alignment and LAS export.')
+    parser.add_argument('--logical-files', type=int, default=2, help='Logical Files of the synthetic DLIS file.')
+    parser.add_argument('--frames', type=int, default=3, help='Frames per Logical File, with offset depth grids.')
+    parser.add_argument('--channels', type=int, default=20, help='Curves per frame.')
+    parser.add_argument('--samples', type=int, default=10000, help='Samples of the first frame (frame k has 2**k times more).')
+    parser.add_argument('--dlis', nargs='*', default=[], help='Real DLIS files to load and decode as well.')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per stage; the best wall time is kept.')
+    parser.add_argument('--baseline', default=None, help='JSON file of a stored run to compare with.')
+    parser.add_argument('--update-baseline', action='store_true', help='Store the results as the baseline.')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Allowed wall time increase (0.25 = 25%%).')
+    parser.add_argument('--memory-threshold', type=float, default=0.10, help='Allowed peak memory increase.')
+    parser.add_argument('--output', default=None, help='Path of a JSON file for the results.')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    config = {'logical_files': args.logical_files, 'frames': args.frames, 'channels': args.channels,
+              'samples': args.samples}
+    results = run_suite(config, args.dlis, args.repeat)
+    run = {'config': config, 'stages': results}
+
+    print(f"{'stage':30} {'seconds':>10} {'peak (MB)':>10}")
+    for stage, result in results.items():
+        print(f"{stage:30} {result['seconds']:10.4f} {result['peak_mb']:10.2f}")
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(run, output, indent=2)
+
+    if args.baseline and args.update_baseline:
+        with open(args.baseline, 'w') as output:
+            json.dump(run, output, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline['config'] != config:
+            print(f"The baseline was recorded with {baseline['config']}, not {config}. Nothing compared.")
+            return 2
+        regressions = compare(results, baseline['stages'], args.threshold, args.memory_threshold)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            return 1
+        print("No regression against the baseline.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,224 @@
+"""
+Synthetic DLIS files and frames for the benchmarks, written without any extra dependency.
+
+write_dlis() writes a minimal RP66 v1 file: a storage unit label, then for every logical file a
+FILE-HEADER, CHANNEL and FRAME set followed by the frame data records. Every frame has a depth
+index channel (DEPT, float64, metres) and `channels` float32 curves (C000, C001, ...) with a few
+absent values (-999.25). Channels of different frames share their names and differ by copy number,
+as in files written by logging tools. The frames of a logical file have depth grids offset by a fraction of their step, as
+tools recorded at different sampling rates.
+"""
+import struct
+
+import numpy as np
+import pandas as pd
+
+ABSENT_VALUE = -999.25
+VISIBLE_RECORD_BYTES = 8192
+
+FSINGL = 2
+FDOUBL = 7
+USHORT = 15
+UVARI = 18
+IDENT = 19
+ASCII = 20
+OBNAME = 23
+UNITS = 27
+
+FHLR = 0
+CHANNL = 3
+FRAME = 4
+FDATA = 0
+
+
+def _ident(text):
+    data = text.encode('ascii')
+    return struct.pack('>B', len(data)) + data
+
+
+def _ascii(text):
+    data = text.encode('ascii')
+    return _uvari(len(data)) + data
+
+
+def _uvari(value):
+    if value < 0x80:
+        return struct.pack('>B', value)
+    if value < 0x4000:
+        return struct.pack('>H', value | 0x8000)
+    return struct.pack('>I', value | 0xC0000000)
+
+
+def _obname(name, origin=1, copy=0):
+    return _uvari(origin) + struct.pack('>B', copy) + _ident(name)
+
+
+def _value(reprc, value):
+    if reprc == IDENT or reprc == UNITS:
+        return _ident(value)
+    if reprc == ASCII:
+        return _ascii(value)
+    if reprc == OBNAME:
+        return _obname(*value) if isinstance(value, tuple) else _obname(value)
+    if reprc == USHORT:
+        return struct.pack('>B', value)
+    if reprc == UVARI:
+        return _uvari(value)
+    raise ValueError(f"Unsupported representation code {reprc}")
+
+
+def _set(set_type, attributes, objects):
+    """
+    Encodes an explicitly formatted logical record body: a set of `set_type` with the template
+    `attributes` [(label, reprc)] and `objects` [(name, [values or None])], every value a list.
+    Names (and OBNAME values) are strings or (name, origin, copy) tuples.
+    """
+    body = bytearray(struct.pack('>B', 0xF0) + _ident(set_type))
+    for label, _ in attributes:
+        body += struct.pack('>B', 0x30) + _ident(label)
+    for name, values in objects:
+        body += struct.pack('>B', 0x70) + (_obname(*name) if isinstance(name, tuple) else _obname(name))
+        for (_, reprc), value in zip(attributes, values):
+            if value is None:
+                body += struct.pack('>B', 0x00)
+                continue
+            body += struct.pack('>B', 0x2D) + _uvari(len(value)) + struct.pack('>B', reprc)
+            for item in value:
+                body += _value(reprc, item)
+    return bytes(body)
+
+
+def _segments(body, record_type, explicit):
+    """
+    Splits a logical record body into logical record segments of at most 4096 bytes, padded to
+    an even length of at least 16 bytes.
+    """
+    pieces = [body[start:start + 4096] for start in range(0, len(body), 4096)] or [b'']
+    segments = []
+    for number, piece in enumerate(pieces):
+        attributes = 0x80 if explicit else 0x00
+        if number > 0:
+            attributes |= 0x40
+        if number < len(pieces) - 1:
+            attributes |= 0x20
+        padding = (len(piece) + 4) % 2
+        if len(piece) + 4 + padding < 16:
+            padding = 16 - len(piece) - 4
+        if padding:
+            attributes |= 0x01
+            piece = piece + bytes(padding - 1) + struct.pack('>B', padding)
+        segments.append(struct.pack('>HBB', len(piece) + 4, attributes, record_type) + piece)
+    return segments
+
+
+class _VisibleRecords:
+    def __init__(self, output):
+        self.output = output
+        self.pending = []
+        self.size = 4
+
+    def add(self, segment):
+        if self.size + len(segment) > VISIBLE_RECORD_BYTES:
+            self.flush()
+        self.pending.append(segment)
+        self.size += len(segment)
+
+    def flush(self):
+        if self.pending:
+            self.output.write(struct.pack('>HBB', self.size, 0xFF, 0x01) + b''.join(self.pending))
+        self.pending = []
+        self.size = 4
+
+
+def frame_arrays(samples, channels, step=0.1524, offset=0.0, top=1000.0, seed=0):
+    """
+    Returns the depth and the {curve: values} of one synthetic frame: smooth curves with noise,
+    spikes and absent values, so that decoding, null handling and decimation all have work to do.
+    """
+    rng = np.random.default_rng(seed)
+    depth = top + offset + step * np.arange(samples)
+    curves = {}
+    for i in range(channels):
+        values = 50.0 + 40.0 * np.sin(depth / (5.0 + i)) + rng.normal(0.0, 3.0, samples)
+        values[rng.random(samples) < 0.01] = ABSENT_VALUE
+        curves[f"C{i:03d}"] = values.astype('float32')
+    return depth, curves
+
+
+def frame_layout(frames, samples, frame_number):
+    """
+    Step and depth offset of frame `frame_number` among `frames`: steps of 0.1524, 0.0762, ...
+    halved for each frame, and starting depths offset by a third of the step.
+    """
+    step = 0.1524 / (2 ** frame_number)
+    return step, frame_number * step / 3.0, samples * (2 ** frame_number)
+
+
+def write_dlis(path, logical_files=1, frames=2, channels=20, samples=10000, seed=0):
+    """
+    Writes a synthetic DLIS file and returns its path. Frame k has samples * 2**k samples
+    (see frame_layout), so all frames of a logical file cover about the same depth interval.
+    """
+    with open(path, 'wb') as output:
+        output.write(b'   1V1.00RECORD' + b'%5d' % VISIBLE_RECORD_BYTES + b'SYNTHETIC'.ljust(60))
+        records = _VisibleRecords(output)
+        for lf_number in range(logical_files):
+            records.flush()
+            header = _set('FILE-HEADER', [('SEQUENCE-NUMBER', ASCII), ('ID', ASCII)],
+                          [('0', [[str(lf_number + 1)], [f"SYNTHETIC-{lf_number + 1}"]])])
+            for segment in _segments(header, FHLR, True):
+                records.add(segment)
+
+            layouts = []
+            channel_objects = []
+            frame_objects = []
+            for frame_number in range(frames):
+                step, offset, count = frame_layout(frames, samples, frame_number)
+                depth, curves = frame_arrays(count, channels, step, offset, seed=seed + 31 * lf_number + frame_number)
+                labels = [('DEPT', 1, frame_number)] + [(label, 1, frame_number) for label in curves]
+                layouts.append((f"MAIN{frame_number}", depth, curves))
+                channel_objects.append((labels[0], [[FDOUBL], ['m'], [1]]))
+                channel_objects.extend((label, [[FSINGL], ['gAPI'], [1]]) for label in labels[1:])
+                frame_objects.append((f"MAIN{frame_number}", [labels, ['BOREHOLE-DEPTH']]))
+
+            channel_set = _set('CHANNEL', [('REPRESENTATION-CODE', USHORT), ('UNITS', UNITS), ('DIMENSION', UVARI)],
+                               channel_objects)
+            frame_set = _set('FRAME', [('CHANNELS', OBNAME), ('INDEX-TYPE', IDENT)], frame_objects)
+            for body, record_type in ((channel_set, CHANNL), (frame_set, FRAME)):
+                for segment in _segments(body, record_type, True):
+                    records.add(segment)
+
+            for name, depth, curves in layouts:
+                record_dtype = np.dtype([('frameno', '>u4'), ('DEPT', '>f8')] +
+                                        [(label, '>f4') for label in curves])
+                table = np.empty(len(depth), dtype=record_dtype)
+                table['frameno'] = (np.arange(1, len(depth) + 1) | 0xC0000000).astype('>u4')
+                table['DEPT'] = depth
+                for label, values in curves.items():
+                    table[label] = values
+                prefix = _obname(name)
+                for row in table.view(np.uint8).reshape(len(table), -1):
+                    for segment in _segments(prefix + row.tobytes(), FDATA, False):
+                        records.add(segment)
+        records.flush()
+    return path
+
+
+def synthetic_frames(frames=3, channels=20, samples=10000, seed=0):
+    """
+    Returns {frame key: DataFrame} of frames with offset depth grids (see frame_layout) and the
+    matching selected_curves list, as built by the Data Visualization page, for pipeline.combine_dataframes.
+    """
+    frame_dfs = {}
+    selected_curves = []
+    for frame_number in range(frames):
+        step, offset, count = frame_layout(frames, samples, frame_number)
+        depth, curves = frame_arrays(count, channels, step, offset, seed=seed + frame_number)
+        key = f"Logical File 1 - Frame {frame_number + 1}"
+        columns = {'DEPT': depth}
+        columns.update({label: np.where(values == ABSENT_VALUE, np.nan, values) for label, values in curves.items()})
+        frame_dfs[key] = pd.DataFrame(columns)
+        selected_curves.extend({'curve': label, 'logical_file': 'Logical File 1', 'frame': f"Frame {frame_number + 1}",
+                                'depth_column': 'DEPT', 'depth_unit': 'm', 'logical_file_key': key}
+                               for label in curves)
+    return frame_dfs, selected_curves
@@ -0,0 +1,349 @@
+"""
+Headless batch conversion of DLIS files to LAS, Parquet, Feather or HDF5.
+
+Every input file (and, when a file holds several, every Logical File) is converted in a
+separate worker process. Each Logical File becomes one output file with the selected curves of
+all its frames aligned on a common depth grid. A JSON summary with timings, sizes and failures
+is written at the end.
+
+Usage:
+    python cli.py data/*.dlis /mnt/wells -o las/ --curves "GR,RHOB,NPHI,RES*" --unit ft
+    python cli.py data/*.dlis -o parquet/ --format parquet
+    python cli.py data/*.dlis -o las/ --unit ft --curve-units "DT*=us/m,TEMP=degC"
+
+Only UI-free modules are imported here, so worker processes never load Streamlit.
+"""
+import argparse
+import fnmatch
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from core import alignment, columnar, depth, framedata, las_writer, loading, pipeline, units
+from core.report import Report
+
+
+def find_inputs(patterns):
+    """
+    Expands files, directories (searched recursively for .dlis files) and glob patterns
+    into a sorted list of unique file paths.
+    """
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, _, names in os.walk(pattern):
+                paths.update(os.path.join(root, name) for name in names if name.lower().endswith('.dlis'))
+        elif os.path.isfile(pattern):
+            paths.add(pattern)
+        else:
+            paths.update(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+    return sorted(paths)
+
+
+def output_stems(paths):
+    """
+    Returns a unique output file stem for every input path.
+    """
+    stems = {}
+    seen = {}
+    for path in paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        seen[stem] = seen.get(stem, 0) + 1
+        stems[path] = stem if seen[stem] == 1 else f"{stem}_{seen[stem]}"
+    return stems
+
+
+def select_curves(columns, patterns, depth_column):
+    """
+    Returns the columns matching any of the curve patterns (fnmatch-style, case-insensitive),
+    or every column when no pattern is given. The depth column is never included.
+    """
+    return [
+        column for column in columns
+        if column != depth_column and
+        (not patterns or any(fnmatch.fnmatch(column.upper(), pattern.upper()) for pattern in patterns))
+    ]
+
+
+def target_units(columns, patterns):
+    """
+    Returns {column: unit} for the columns matching the curve patterns of `patterns` {pattern: unit}
+    (fnmatch-style, case-insensitive; the first matching pattern wins). The depth column is never included.
+    """
+    targets = {}
+    for column in columns:
+        for pattern, unit in (patterns or {}).items():
+            if column != 'DEPTH' and fnmatch.fnmatch(column.upper(), pattern.upper()):
+                targets[column] = unit
+                break
+    return targets
+
+
+def parse_curve_units(text):
+    """
+    Parses "GR=gAPI,DT*=us/m" into {pattern: unit}.
+    """
+    patterns = {}
+    for item in text.split(','):
+        if item.strip():
+            pattern, separator, unit = item.partition('=')
+            if not separator or not pattern.strip() or not unit.strip():
+                raise argparse.ArgumentTypeError(f"Expected CURVE=UNIT, got '{item.strip()}'.")
+            patterns[pattern.strip()] = unit.strip()
+    return patterns
+
+
+def convert_logical_file(logical_file, output_path, options):
+    """
+    Writes the selected curves of every frame of a Logical File to one LAS or columnar file.
+    Returns a dict with counts, timings and warnings.
+    """
+    result = {'frames': 0, 'curves': 0, 'samples': 0, 'decode_seconds': 0.0, 'warnings': []}
+    frames_to_align = []
+    frame_units = []
+    export_unit = options['unit']
+
+    for frame_index, frame in enumerate(logical_file.frames, start=1):
+        frame_df = framedata.LazyFrame(frame)
+        depth_column = depth.detect_depth_column(frame_df)
+        if depth_column is None:
+            result['warnings'].append(f"Frame {frame_index}: no depth channel found, frame skipped.")
+            continue
+
+        curves = select_curves(frame_df.columns, options['curves'], depth_column)
+        if not curves:
+            continue
+
+        depth_unit = frame_df.unit(depth_column) or 'unknown'
+        if export_unit is None:
+            export_unit = depth_unit
+        factor = depth.depth_factor(depth_unit, export_unit)
+        if factor is None:
+            result['warnings'].append(
+                f"Frame {frame_index}: unit conversion not supported from {depth_unit} to {export_unit}, frame skipped.")
+            continue
+
+        frame_df = pipeline.frame_view(frame_df, depth_column, depth_unit, export_unit, options.get('interval'))
+        if frame_df.empty:
+            continue
+
+        frame_df.prepare([depth_column] + curves)
+        depth_values = units.convert(alignment.as_float(frame_df[depth_column]), depth_unit, export_unit)
+        frames_to_align.append((depth_values, {curve: frame_df[curve] for curve in curves}))
+        frame_units.append({curve: frame_df.unit(curve) for curve in curves})
+
+        result['frames'] += 1
+        result['decode_seconds'] += frame_df.decode_seconds
+
+    if not frames_to_align:
+        raise ValueError("No frame with a depth channel and matching curves.")
+
+    start = time.perf_counter()
+    combined = alignment.align_frames(frames_to_align, grid=options['grid'], step=options['step'],
+                                      method=options['method'])
+    result['align_seconds'] = time.perf_counter() - start
+    labels = alignment.column_labels([curves for _, curves in frames_to_align])
+    curve_units = {frame_labels[curve]: unit
+                   for frame_labels, units_of_frame in zip(labels, frame_units)
+                   for curve, unit in units_of_frame.items()}
+
+    report = Report()
+    combined, curve_units = pipeline.convert_curves(
+        combined, curve_units, target_units(combined.columns, options.get('curve_units')), report)
+    result['warnings'].extend(report.warnings)
+
+    start = time.perf_counter()
+    curve_units['DEPTH'] = export_unit
+    with open(output_path, 'wb') as output:
+        if options.get('format', 'las') == 'las':
+            las_writer.write_las(output, combined, list(combined.columns), units=curve_units, depth_unit=export_unit)
+        else:
+            columnar.write_table(output, combined, list(combined.columns), options['format'], units=curve_units,
+                                 depth_unit=export_unit)
+    result['write_seconds'] = time.perf_counter() - start
+
+    result['curves'] = len(combined.columns) - 1
+    result['samples'] = len(combined)
+    result['output_bytes'] = os.path.getsize(output_path)
+    return result
+
+
+def convert_task(path, stem, logical_file_index, logical_file_count, options):
+    """
+    Worker entry point: converts one Logical File of a DLIS file (the first one when
+    `logical_file_index` is None) and reports the other Logical Files still to be converted.
+    The file is indexed only up to the converted Logical File (see loading.iter_logical_files),
+    except by the first task, which counts them.
+    """
+    record = {'input': path, 'input_bytes': os.path.getsize(path), 'logical_file': None,
+              'output': None, 'status': 'ok', 'error': None, 'pending': []}
+    start = time.perf_counter()
+    logical_files = []
+    try:
+        load_start = time.perf_counter()
+        indexed = loading.iter_logical_files(path)
+        try:
+            for logical_file, _ in indexed:
+                logical_files.append(logical_file)
+                if logical_file_index is not None and len(logical_files) > logical_file_index:
+                    break
+        finally:
+            indexed.close()
+        record['load_seconds'] = time.perf_counter() - load_start
+
+        if logical_file_index is None:
+            logical_file_index = 0
+            logical_file_count = len(logical_files)
+            record['pending'] = list(range(1, logical_file_count))
+        if logical_file_index >= len(logical_files):
+            raise IndexError(f"Logical File {logical_file_index + 1} not found, the file holds {len(logical_files)}.")
+
+        name = stem if logical_file_count == 1 else f"{stem}_LF{logical_file_index + 1}"
+        record['logical_file'] = logical_file_index + 1
+        record['output'] = os.path.join(options['output_dir'], name + output_extension(options))
+        record['logical_file_count'] = logical_file_count
+        record.update(convert_logical_file(logical_files[logical_file_index], record['output'], options))
+    except Exception as e:
+        record['status'] = 'failed'
+        record['error'] = f"{type(e).__name__}: {e}"
+    finally:
+        for logical_file in logical_files:
+            logical_file.close()
+    record['total_seconds'] = time.perf_counter() - start
+    return record
+
+
+def output_extension(options):
+    file_format = options.get('format', 'las')
+    return '.las' if file_format == 'las' else columnar.extension(file_format)
+
+
+def limit_memory(max_memory_mb):
+    """
+    Worker initializer: caps the address space of the worker so a huge file fails with a
+    MemoryError instead of exhausting the machine.
+    """
+    if max_memory_mb:
+        import resource
+        limit = max_memory_mb * 1024 ** 2
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def run(paths, options, workers=None, max_memory_mb=None, max_tasks_per_child=None, log=sys.stderr):
+    """
+    Converts all paths on a process pool and returns the list of task records.
+    """
+    stems = output_stems(paths)
+    records = []
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                   initializer=limit_memory, initargs=(max_memory_mb,),
+                                   max_tasks_per_child=max_tasks_per_child)
+    with executor:
+        pending = {executor.submit(convert_task, path, stems[path], None, None, options): path for path in paths}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = pending.pop(future)
+                try:
+                    record = future.result()
+                except Exception as e:
+                    record = {'input': path, 'status': 'failed', 'error': f"{type(e).__name__}: {e}", 'pending': []}
+
+                for index in record.pop('pending'):
+                    future_lf = executor.submit(convert_task, path, stems[path], index,
+                                                record['logical_file_count'], options)
+                    pending[future_lf] = path
+
+                records.append(record)
+                detail = record['output'] if record['status'] == 'ok' else record['error']
+                print(f"[{len(records)}] {record['status']:6} {path} "
+                      f"LF{record.get('logical_file') or '?'} -> {detail}", file=log)
+    return records
+
+
+def summarize(records, seconds):
+    converted = [record for record in records if record['status'] == 'ok']
+    return {
+        'files': len({record['input'] for record in records}),
+        'logical_files': len(records),
+        'converted': len(converted),
+        'failed': len(records) - len(converted),
+        'wall_seconds': seconds,
+        'input_bytes': sum(record.get('input_bytes', 0) for record in records if record.get('logical_file') in (None, 1)),
+        'output_bytes': sum(record.get('output_bytes', 0) for record in converted),
+        'tasks': records,
+        'failures': [{'input': record['input'], 'logical_file': record.get('logical_file'), 'error': record['error']}
+                     for record in records if record['status'] != 'ok'],
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Convert DLIS files to LAS (or Parquet, Feather, HDF5) in batch.')
+    parser.add_argument('inputs', nargs='+', help='DLIS files, directories or glob patterns.')
+    parser.add_argument('-o', '--output-dir', required=True, help='Directory for the output files.')
+    parser.add_argument('--format', choices=['las'] + list(columnar.FORMATS), default='las',
+                        help='Format of the output files. hdf5 requires h5py.')
+    parser.add_argument('--curves', default='',
+                        help='Comma-separated curve mnemonics or patterns (e.g. "GR,RHOB,RES*"). Default: all curves.')
+    parser.add_argument('--unit', choices=list(units.UNITS['length']), default=None,
+                        help='Depth unit of the LAS files. Default: unit of the first frame of each Logical File.')
+    parser.add_argument('--curve-units', type=parse_curve_units, default={},
+                        help='Comma-separated curve patterns and the unit to convert them to (e.g. "DT*=us/m,TEMP=degC").')
+    parser.add_argument('--top', type=float, default=None, help='Top depth of the exported interval, in --unit.')
+    parser.add_argument('--bottom', type=float, default=None, help='Bottom depth of the exported interval, in --unit.')
+    parser.add_argument('--grid', choices=alignment.GRID_MODES, default='reference', help='Depth grid for the frames.')
+    parser.add_argument('--step', type=float, default=None, help="Depth step for --grid step.")
+    parser.add_argument('--method', choices=alignment.METHODS, default='interpolate', help='Resampling method.')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes. Default: CPU count.')
+    parser.add_argument('--max-memory-mb', type=int, default=None, help='Address space limit per worker.')
+    parser.add_argument('--max-tasks-per-child', type=int, default=None,
+                        help='Restart workers after this many tasks to return memory to the system.')
+    parser.add_argument('--summary', default=None, help='Path of the JSON summary. Default: <output-dir>/summary.json.')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.format != 'las' and args.format not in columnar.available_formats():
+        print(f"The {args.format} format requires the '{columnar.FORMATS[args.format][2]}' package.", file=sys.stderr)
+        return 2
+    paths = find_inputs(args.inputs)
+    if not paths:
+        print("No DLIS files found.", file=sys.stderr)
+        return 2
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    options = {
+        'output_dir': args.output_dir,
+        'curves': [curve.strip() for curve in args.curves.split(',') if curve.strip()],
+        'unit': args.unit,
+        'grid': args.grid,
+        'step': args.step,
+        'method': args.method,
+        'interval': None,
+        'format': args.format,
+        'curve_units': args.curve_units,
+    }
+    if args.top is not None or args.bottom is not None:
+        options['interval'] = (-float('inf') if args.top is None else args.top,
+                               float('inf') if args.bottom is None else args.bottom)
+
+    start = time.perf_counter()
+    records = run(paths, options, args.workers, args.max_memory_mb, args.max_tasks_per_child)
+    summary = summarize(records, time.perf_counter() - start)
+
+    summary_path = args.summary or os.path.join(args.output_dir, 'summary.json')
+    with open(summary_path, 'w') as summary_file:
+        json.dump(summary, summary_file, indent=2)
+
+    print(f"{summary['converted']} converted, {summary['failed']} failed in {summary['wall_seconds']:.1f} s. "
+          f"Summary: {summary_path}", file=sys.stderr)
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
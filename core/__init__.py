@@ -0,0 +1,25 @@
+"""
+UI-free core of DLIS Data Explorer.
+
+- cache: content-hash keyed cache of loaded DLIS files
+- loading: background loading of DLIS files, one logical file at a time
+- framedata: single-pass frame decoding and lazy, column-on-demand frame views
+- arrays: multi-dimensional channels extracted to memory-mapped arrays
+- framestore: bounded LRU store of frame views with spill to disk
+- selection: keys of the frames and curves selected from the files of a session
+- nulls: absent-value normalization
+- depth: depth channel detection and depth unit factors
+- units: table-driven conversion of DLIS unit symbols
+- alignment: resampling of several frames onto a common depth grid
+- decimate: min/max reduction of curves to the plot resolution
+- stats: one-pass statistics catalog of the channels of a frame
+- metadata: persistent SQLite index of file metadata and channel search
+- las_writer: streaming LAS 2.0 writer
+- columnar: Parquet, Feather and HDF5 writers
+- pipeline: combination of selected curves and LAS export
+- report: warnings and errors returned to the caller
+- instrumentation: per-stage timing and memory recorder, exported as JSON lines or Prometheus text
+
+None of these modules imports Streamlit or matplotlib; dlisio, lasio, pyarrow and h5py are
+imported only when a file is actually loaded or written.
+"""
@@ -0,0 +1,181 @@
+import numpy as np
+import pandas as pd
+
+GRID_MODES = ('reference', 'finest', 'step')
+METHODS = ('interpolate', 'nearest')
+
+
+def as_float(values):
+    """
+    Returns curve values as a float64 array with missing values as NaN. float64 arrays, and Series
+    backed by one, are returned without a copy (possibly as a strided view into decoded records);
+    other dtypes, nullable columns and lists are copied.
+    """
+    if isinstance(values, (pd.Series, pd.api.extensions.ExtensionArray)):
+        return values.to_numpy(dtype='float64', na_value=np.nan)
+    return np.asarray(values, dtype='float64')
+
+
+def _ascending(depth):
+    """
+    Returns (order, sorted_depth) so that depth[order] == sorted_depth is increasing and free of NaN.
+    `order` is a slice (no copy) for increasing or decreasing depths, an index array otherwise.
+    """
+    valid = ~np.isnan(depth)
+    if valid.all():
+        steps = np.diff(depth)
+        if (steps >= 0).all():
+            return slice(None), depth
+        if (steps <= 0).all():
+            return slice(None, None, -1), depth[::-1]
+    order = np.flatnonzero(valid)
+    order = order[np.argsort(depth[order], kind='stable')]
+    return order, depth[order]
+
+
+def depth_step(depth):
+    """
+    Returns the median sampling step of a depth array, ignoring NaNs and repeated samples.
+    """
+    steps = np.abs(np.diff(depth[~np.isnan(depth)]))
+    steps = steps[steps > 0]
+    return float(np.median(steps)) if len(steps) else None
+
+
+def build_grid(depths, mode='reference', step=None):
+    """
+    Builds the common depth grid for a list of depth arrays.
+    'reference' uses the first depth array as is, 'finest' spans all arrays with the smallest
+    median step among them, and 'step' spans all arrays with the given step. Regular grids
+    follow the direction (increasing or decreasing) of the first depth array.
+    """
+    if mode not in GRID_MODES:
+        raise ValueError(f"Unknown grid mode: {mode}")
+
+    reference = np.asarray(depths[0], dtype='float64')
+    if mode == 'reference':
+        return reference[~np.isnan(reference)]
+
+    if mode == 'finest':
+        steps = [s for s in (depth_step(d) for d in depths) if s]
+        step = min(steps) if steps else None
+    if not step or step <= 0:
+        raise ValueError("The depth step must be a positive number.")
+
+    top = min(np.nanmin(d) for d in depths)
+    bottom = max(np.nanmax(d) for d in depths)
+    grid = top + step * np.arange(int(np.floor((bottom - top) / step + 1e-9)) + 1)
+
+    if len(reference) > 1 and reference[0] > reference[-1]:
+        grid = grid[::-1]
+    return grid
+
+
+class Resampler:
+    """
+    Maps the samples of one frame onto a depth grid.
+    The depth of the frame is sorted and searched against the grid once; every curve of that
+    frame then reuses the same positions, so each curve costs a few vectorized gathers.
+    """
+    def __init__(self, depth, grid, method='interpolate', tolerance=None):
+        if method not in METHODS:
+            raise ValueError(f"Unknown resampling method: {method}")
+        self.method = method
+
+        depth = as_float(depth)
+        grid = as_float(grid)
+        self._order, xp = _ascending(depth)
+        self._grid_order, gx = _ascending(grid)
+        self._size = len(grid)
+
+        last = len(xp) - 1
+        if last < 0:
+            self._inside = np.zeros(len(gx), dtype=bool)
+            self._left = self._right = np.zeros(len(gx), dtype=np.intp)
+            self._weight = np.zeros(len(gx))
+            return
+
+        if len(xp) == len(gx) and np.array_equal(xp, gx):
+            # The frame is sampled on the grid itself (e.g. the reference frame): copy values through.
+            self._left = self._right = np.arange(len(gx))
+            self._weight = np.zeros(len(gx))
+            self._inside = np.ones(len(gx), dtype=bool)
+            return
+
+        left = np.clip(np.searchsorted(xp, gx, side='right') - 1, 0, last)
+        right = np.minimum(left + 1, last)
+
+        if method == 'interpolate':
+            self._inside = (gx >= xp[0]) & (gx <= xp[-1])
+            span = xp[right] - xp[left]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                self._weight = np.where(span > 0, (gx - xp[left]) / span, 0.0)
+            self._left, self._right = left, right
+        else:
+            nearest = np.where(np.abs(gx - xp[left]) <= np.abs(xp[right] - gx), left, right)
+            if tolerance is None:
+                grid_step = depth_step(gx)
+                tolerance = grid_step / 2 if grid_step else 0.0
+            # Grid depths just outside the frame's range still take its end samples within the tolerance.
+            self._inside = np.abs(xp[nearest] - gx) <= tolerance
+            self._left = nearest
+
+    def __call__(self, values):
+        fp = as_float(values)[self._order]
+        if self.method == 'interpolate':
+            low = fp[self._left]
+            high = fp[self._right]
+            out = np.where(self._weight == 0, low, low + (high - low) * self._weight)
+        else:
+            out = fp[self._left]
+        out[~self._inside] = np.nan
+
+        if isinstance(self._grid_order, slice) and self._grid_order == slice(None):
+            return out
+        result = np.empty(self._size)
+        result[self._grid_order] = out
+        return result
+
+
+def unique_label(label, position, columns):
+    """
+    Returns `label`, or `label_<position>` when a previous frame already produced that column.
+    """
+    return f"{label}_{position}" if label in columns else label
+
+
+def column_labels(frame_curves):
+    """
+    Returns, for each frame of `frame_curves` (a list of curve label lists), {curve: column} with the
+    column names given by align_frames: 'DEPTH' is reserved and labels repeated across frames get a
+    numeric suffix (see unique_label).
+    """
+    columns = {'DEPTH': None}
+    labels = []
+    for position, curves in enumerate(frame_curves, start=1):
+        frame_labels = {}
+        for label in curves:
+            frame_labels[label] = unique_label(label, position, columns)
+            columns[frame_labels[label]] = None
+        labels.append(frame_labels)
+    return labels
+
+
+def align_frames(frames, grid='reference', step=None, method='interpolate', tolerance=None):
+    """
+    Aligns the curves of several frames onto one depth grid in a single pass.
+    `frames` is a list of (depth, {label: values}) pairs, with depths already in a common unit.
+    Increasing, decreasing and unordered depths are supported; samples outside a frame's depth
+    range are NaN. Labels repeated across frames get a numeric suffix ('GR_2').
+    Returns a DataFrame with a 'DEPTH' column followed by the curves.
+    """
+    depths = [as_float(depth) for depth, _ in frames]
+    depth_grid = build_grid(depths, grid, step)
+
+    columns = {'DEPTH': depth_grid}
+    labels = column_labels([curves for _, curves in frames])
+    for depth, (_, curves), frame_labels in zip(depths, frames, labels):
+        resample = Resampler(depth, depth_grid, method, tolerance)
+        for label, values in curves.items():
+            columns[frame_labels[label]] = resample(values)
+    return pd.DataFrame(columns, copy=False)
@@ -0,0 +1,101 @@
+"""
+Multi-dimensional channels (borehole images, waveforms, spectra) extracted to memory-mapped .npy files.
+A channel is read from the frame data records a chunk at a time, skipping every other channel, and
+written straight to disk, so memory use depends on the chunk size and not on the size of the channel.
+"""
+import tempfile
+import zipfile
+
+import numpy as np
+
+from . import framedata, nulls
+
+CHUNK_BYTES = 64 * 1024 ** 2
+SPOOL_MAX_SIZE = 1024 ** 2
+
+
+class ArrayChannel:
+    """
+    Multi-dimensional channel stored in a .npy file and opened memory-mapped.
+    `data` has one row per sample; `image()` flattens each sample to one row of pixels.
+    """
+    def __init__(self, label, path, unit=''):
+        self.label = label
+        self.path = path
+        self.unit = unit
+        self.data = np.load(path, mmap_mode='r')
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes
+
+    def image(self):
+        return self.data.reshape(len(self.data), -1)
+
+
+def extract_array(frame, label, path, tells, absent_values=None, unit='', chunk_bytes=CHUNK_BYTES):
+    """
+    Reads one multi-dimensional channel of a Frame from the frame data records at `tells` into the
+    .npy file `path`, `chunk_bytes` of samples at a time, and returns it as an ArrayChannel.
+    Absent values of float channels become NaN.
+    """
+    dtype = frame.dtype(strict=False)
+    labels = dtype.names[1:]
+    position = labels.index(label)
+    formats = [channel.fmtstr() for channel in frame.channels]
+    field = np.dtype([(label, dtype[label])])
+    pre_fmt = 'i' + ''.join(formats[:position])
+    post_fmt = ''.join(formats[position + 1:])
+
+    count = framedata.count_samples(frame, tells)
+    output = np.lib.format.open_memmap(path, mode='w+', dtype=dtype[label].base,
+                                       shape=(count,) + dtype[label].shape)
+    step = framedata.records_per_chunk(field.itemsize, chunk_bytes)
+    row = 0
+    for first in range(0, len(tells), step):
+        chunk = framedata.read_records(frame, field, tells[first:first + step], fmt=formats[position],
+                                       pre_fmt=pre_fmt, post_fmt=post_fmt)[label]
+        if absent_values and chunk.dtype.kind == 'f':
+            nulls.normalize(chunk, absent_values)
+        output[row:row + len(chunk)] = chunk
+        row += len(chunk)
+    output.flush()
+    del output
+    return ArrayChannel(label, path, unit)
+
+
+def write_npz(file_object, arrays, chunk_rows=None, chunk_bytes=CHUNK_BYTES):
+    """
+    Writes arrays (a dict of name to array, memory-mapped or not) to an uncompressed .npz archive
+    readable with np.load, copying `chunk_bytes` of rows at a time instead of the whole array
+    as np.savez does.
+    """
+    with zipfile.ZipFile(file_object, mode='w', compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for name, array in arrays.items():
+            array = np.asanyarray(array)
+            row_bytes = max(array[:1].nbytes, 1)
+            step = chunk_rows or max(1, chunk_bytes // row_bytes)
+            with archive.open(f'{name}.npy', mode='w', force_zip64=True) as member:
+                header = {'descr': np.lib.format.dtype_to_descr(array.dtype), 'fortran_order': False,
+                          'shape': array.shape}
+                np.lib.format.write_array_header_2_0(member, header)
+                for first in range(0, len(array), step):
+                    member.write(np.ascontiguousarray(array[first:first + step]).tobytes())
+
+
+def spool_npz(arrays, max_size=SPOOL_MAX_SIZE, chunk_bytes=CHUNK_BYTES):
+    """
+    Writes the .npz archive of write_npz() to a spooled temporary file (in memory up to `max_size`,
+    then on disk) and returns it rewound, so the archive is never held in memory as bytes.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=max_size, mode='w+b')
+    write_npz(spool, arrays, chunk_bytes=chunk_bytes)
+    spool.seek(0)
+    return spool
\ No newline at end of file
@@ -0,0 +1,171 @@
+import atexit
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from .loading import ProgressiveFile
+
+CHUNK_SIZE = 8 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 4
+DEFAULT_MAX_BYTES = 8 * 1024 ** 3
+DEFAULT_LOADERS = min(4, os.cpu_count() or 1)
+
+
+def content_hash(uploaded_file):
+    """
+    Computes a BLAKE2b digest of the uploaded file content.
+    The upload buffer is hashed in chunks through a memoryview, so no copy of the file is made.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    with uploaded_file.getbuffer() as buffer:
+        for start in range(0, len(buffer), CHUNK_SIZE):
+            digest.update(buffer[start:start + CHUNK_SIZE])
+    return digest.hexdigest()
+
+
+class _CacheEntry:
+    def __init__(self, digest, path, dlis_file, size):
+        self.digest = digest
+        self.path = path
+        self.dlis_file = dlis_file
+        self.size = size
+        self.leases = 0
+
+
+class DlisFileLease:
+    """
+    Keeps a cached DLIS file alive for one Streamlit session.
+    The lease is released when the session state holding it is garbage collected. It holds its cache
+    entry rather than the digest, so a late release never counts against a newer entry of the same file.
+    """
+    def __init__(self, cache, entry):
+        self.digest = entry.digest
+        self.dlis_file = entry.dlis_file
+        self._finalizer = weakref.finalize(self, cache.release, entry)
+
+    def release(self):
+        self._finalizer()
+
+
+class DlisFileCache:
+    """
+    Process-level LRU cache of loaded DLIS files keyed by the content hash of the upload.
+    Each file is spooled to disk and indexed once, by a pool of `loaders` background threads
+    (see loading.ProgressiveFile), so the files of a session are loaded in parallel, and a session gets
+    each file back at once and can browse its logical files while the rest is still being indexed. The cache is bounded by a number of entries
+    and by the total size of the spooled copies (dlisio memory-maps them). Entries still leased by a
+    session are never evicted; the spooled copy is deleted when its entry is evicted.
+    """
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES, cache_dir=None,
+                 loaders=DEFAULT_LOADERS):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._executor = ThreadPoolExecutor(max_workers=loaders, thread_name_prefix='dlis-load')
+        self._lock = threading.RLock()
+        self._dir = tempfile.mkdtemp(prefix='dlis-cache-', dir=cache_dir)
+        atexit.register(self.clear)
+
+    def __contains__(self, digest):
+        with self._lock:
+            return digest in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    @property
+    def total_bytes(self):
+        with self._lock:
+            return sum(entry.size for entry in self._entries.values())
+
+    def acquire(self, uploaded_file, digest=None):
+        """
+        Returns a lease on the DLIS file of an upload. On a cache miss the upload is spooled and
+        indexed in the background: the leased file (a loading.ProgressiveFile) grows as its logical
+        files are indexed, and its `wait()` blocks until loading is over.
+        Concurrent requests for the same content share a single load.
+        """
+        if digest is None:
+            digest = content_hash(uploaded_file)
+
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                self._entries.move_to_end(digest)
+                return self._lease(entry)
+
+            with uploaded_file.getbuffer() as buffer:
+                size = len(buffer)
+            path = os.path.join(self._dir, f"{digest}.dlis")
+            entry = _CacheEntry(digest, path, ProgressiveFile(path, size), size)
+            self._entries[digest] = entry
+            lease = self._lease(entry)
+            self._evict()
+        self._executor.submit(self._load, entry, uploaded_file)
+        return lease
+
+    def touch(self, digest):
+        """
+        Marks the entry as most recently used.
+        """
+        with self._lock:
+            if digest in self._entries:
+                self._entries.move_to_end(digest)
+
+    def release(self, entry):
+        with self._lock:
+            if self._entries.get(entry.digest) is entry:
+                entry.leases = max(entry.leases - 1, 0)
+                self._evict()
+
+    def clear(self):
+        """
+        Closes every cached file and removes the spooled copies.
+        """
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            self._dispose(entry)
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    def _lease(self, entry):
+        entry.leases += 1
+        return DlisFileLease(self, entry)
+
+    def _load(self, entry, uploaded_file):
+        with uploaded_file.getbuffer() as buffer:
+            entry.dlis_file.load(buffer, CHUNK_SIZE)
+        if entry.dlis_file.failed:
+            with self._lock:
+                if self._entries.get(entry.digest) is entry:
+                    del self._entries[entry.digest]
+            self._dispose(entry)
+
+    def _evict(self):
+        # Called with the lock held. Only idle entries are candidates, oldest first.
+        while len(self._entries) > self.max_entries or \
+                sum(entry.size for entry in self._entries.values()) > self.max_bytes:
+            idle = next((entry for entry in self._entries.values() if entry.leases == 0), None)
+            if idle is None:
+                break
+            del self._entries[idle.digest]
+            self._dispose(idle)
+
+    @staticmethod
+    def _dispose(entry):
+        try:
+            entry.dlis_file.close()
+        except Exception:
+            pass
+        for path in (entry.path, entry.path + '.part'):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,136 @@
+"""
+Columnar export of a combined DataFrame to Parquet, Feather (Arrow IPC) and HDF5, alongside
+las_writer for LAS. Curve units and descriptions are stored with each column, and the well name,
+depth unit and index curve with the file.
+pyarrow and h5py are imported only when a file is written; h5py is optional and HDF5 is offered
+only when it is installed (see available_formats).
+"""
+import importlib.util
+import tempfile
+
+import numpy as np
+
+CHUNK_ROWS = 65536
+SPOOL_MAX_SIZE = 32 * 1024 ** 2
+GENERATOR = 'DLIS Data Explorer'
+
+
+def _file_metadata(columns, depth_unit, well_name):
+    return {'well': well_name, 'depth_unit': depth_unit, 'index': columns[0] if columns else '',
+            'generator': GENERATOR}
+
+
+def _values(df, column):
+    """
+    Returns a column as a float64 NumPy array, without a copy when it already is one.
+    """
+    return df[column].to_numpy(dtype='float64', na_value=np.nan)
+
+
+def arrow_table(df, columns, units=None, depth_unit='unknown', well_name='WELL', descriptions=None):
+    """
+    Returns the columns of a DataFrame as a pyarrow Table with unit and description metadata on
+    every field. The data buffers of float64 columns are shared with the DataFrame (only a
+    validity bitmap is built, marking NaN as null), so the table costs no copy of the samples.
+    """
+    import pyarrow as pa
+
+    units = units or {}
+    descriptions = descriptions or {}
+    fields = []
+    arrays = []
+    for column in columns:
+        arrays.append(pa.array(_values(df, column), type=pa.float64(), from_pandas=True))
+        fields.append(pa.field(column, pa.float64(), metadata={'unit': units.get(column, '') or '',
+                                                               'description': descriptions.get(column, '') or ''}))
+    schema = pa.schema(fields, metadata=_file_metadata(columns, depth_unit, well_name))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def write_parquet(file_object, df, columns, units=None, depth_unit='unknown', well_name='WELL',
+                  chunk_rows=CHUNK_ROWS, descriptions=None, compression='snappy'):
+    """
+    Writes the columns to a Parquet file with row groups of `chunk_rows` rows.
+    """
+    import pyarrow.parquet as pq
+
+    table = arrow_table(df, columns, units, depth_unit, well_name, descriptions)
+    with pq.ParquetWriter(file_object, table.schema, compression=compression) as writer:
+        writer.write_table(table, row_group_size=chunk_rows)
+
+
+def write_feather(file_object, df, columns, units=None, depth_unit='unknown', well_name='WELL',
+                  chunk_rows=CHUNK_ROWS, descriptions=None, compression=None):
+    """
+    Writes the columns to a Feather (Arrow IPC) file in record batches of `chunk_rows` rows.
+    Uncompressed files can be memory-mapped by the reader without decoding.
+    """
+    import pyarrow as pa
+
+    table = arrow_table(df, columns, units, depth_unit, well_name, descriptions)
+    options = pa.ipc.IpcWriteOptions(compression=compression)
+    with pa.ipc.new_file(file_object, table.schema, options=options) as writer:
+        writer.write_table(table, max_chunksize=chunk_rows)
+
+
+def write_hdf5(file_object, df, columns, units=None, depth_unit='unknown', well_name='WELL',
+               chunk_rows=CHUNK_ROWS, descriptions=None, compression=None):
+    """
+    Writes the columns to an HDF5 file, one chunked float64 dataset per curve with `unit` and
+    `description` attributes, and the file metadata as attributes of the root group.
+    Missing samples are stored as NaN.
+    """
+    import h5py
+
+    units = units or {}
+    descriptions = descriptions or {}
+    with h5py.File(file_object, 'w') as output:
+        output.attrs.update(_file_metadata(columns, depth_unit, well_name))
+        output.attrs['columns'] = list(columns)
+        for column in columns:
+            values = _values(df, column)
+            dataset = output.create_dataset(column, data=values, chunks=(max(1, min(chunk_rows, len(values))),),
+                                            compression=compression)
+            dataset.attrs['unit'] = units.get(column, '') or ''
+            dataset.attrs['description'] = descriptions.get(column, '') or ''
+
+
+FORMATS = {
+    'parquet': ('.parquet', write_parquet, 'pyarrow'),
+    'feather': ('.feather', write_feather, 'pyarrow'),
+    'hdf5': ('.h5', write_hdf5, 'h5py'),
+}
+
+
+def available_formats():
+    """
+    Returns the names of the formats of FORMATS whose library is installed.
+    """
+    return [name for name, (_, _, module) in FORMATS.items() if importlib.util.find_spec(module) is not None]
+
+
+def extension(file_format):
+    return FORMATS[file_format][0]
+
+
+def write_table(file_object, df, columns, file_format, units=None, depth_unit='unknown', well_name='WELL',
+                chunk_rows=CHUNK_ROWS, descriptions=None):
+    """
+    Writes the columns to a binary file object in one of the FORMATS, the index (depth) curve first.
+    """
+    if file_format not in FORMATS:
+        raise ValueError(f"Unknown export format: {file_format}. Expected one of {', '.join(FORMATS)}.")
+    writer = FORMATS[file_format][1]
+    writer(file_object, df, columns, units, depth_unit, well_name, chunk_rows=chunk_rows, descriptions=descriptions)
+
+
+def spool_table(df, columns, file_format, units=None, depth_unit='unknown', well_name='WELL',
+                max_size=SPOOL_MAX_SIZE, descriptions=None):
+    """
+    Writes the file to a spooled temporary file (in memory up to `max_size`, then on disk)
+    and returns it rewound, as las_writer.spool_las does.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=max_size, mode='w+b')
+    write_table(spool, df, columns, file_format, units, depth_unit, well_name, descriptions=descriptions)
+    spool.seek(0)
+    return spool
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+
+from .alignment import as_float
+
+CHUNK_BYTES = 32 * 1024 ** 2
+
+
+def minmax_indices(values, buckets):
+    """
+    Returns the sorted sample positions to draw a curve with `buckets` pixels along the depth axis.
+    Samples are split into `buckets` consecutive runs and the minimum and maximum of each run are kept,
+    so spikes survive the reduction and the drawn envelope is the same as with every sample.
+    A run without any valid value keeps one (NaN) sample, which leaves a gap in the line.
+    Curves with no more than 2 * buckets samples are returned whole.
+    """
+    values = as_float(values)
+    count = len(values)
+    if buckets <= 0 or count <= 2 * buckets:
+        return np.arange(count)
+
+    run = -(-count // buckets)
+    runs = -(-count // run)
+    padded = np.full(runs * run, np.nan)
+    padded[:count] = values
+    blocks = padded.reshape(runs, run)
+    valid = ~np.isnan(blocks)
+
+    low = np.where(valid, blocks, np.inf).argmin(axis=1)
+    high = np.where(valid, blocks, -np.inf).argmax(axis=1)
+    indices = np.sort(np.stack([low, high], axis=1), axis=1) + (np.arange(runs) * run)[:, None]
+    indices = indices.ravel()
+    return indices[np.r_[True, np.diff(indices) != 0]]
+
+
+def decimate(depth, values, buckets):
+    """
+    Returns (depth, values) reduced with minmax_indices(), as float arrays ready to plot.
+    """
+    values = as_float(values)
+    indices = minmax_indices(values, buckets)
+    return as_float(depth)[indices], values[indices]
+
+
+def decimate_tracks(depth, curves, buckets):
+    """
+    Reduces several curves sharing one depth channel, as drawn side by side in a multi-track view.
+    Returns {curve: (depth, values)}; each curve keeps its own extremes.
+    """
+    depth = as_float(depth)
+    return {curve: decimate(depth, values, buckets) for curve, values in curves.items()}
+
+
+def track_table(depth, curves, buckets):
+    """
+    Returns the curves of a multi-track view reduced with decimate_tracks(), as one long-form
+    DataFrame with columns depth, value and curve (the layout expected by Vega-Lite charts).
+    """
+    tracks = decimate_tracks(depth, curves, buckets)
+    if not tracks:
+        return pd.DataFrame({'depth': np.empty(0), 'value': np.empty(0), 'curve': np.empty(0, dtype=object)})
+    return pd.DataFrame({
+        'depth': np.concatenate([depth_values for depth_values, _ in tracks.values()]),
+        'value': np.concatenate([values for _, values in tracks.values()]),
+        'curve': np.repeat(list(tracks), [len(values) for _, values in tracks.values()]),
+    })
+
+
+def image_rows(depth, image, buckets, chunk_bytes=CHUNK_BYTES):
+    """
+    Reduces an image (one row of pixels per sample, e.g. arrays.ArrayChannel.image()) to at most
+    `buckets` rows by averaging runs of consecutive samples, ignoring NaN.
+    The image is read `chunk_bytes` at a time, so a memory-mapped image is never loaded whole.
+    Returns (depth, rows) with the mean depth of each run.
+    """
+    depth = as_float(depth)
+    count = len(image)
+    width = image.shape[1] if image.ndim > 1 else 1
+    run = max(1, -(-count // max(buckets, 1)))
+    step = max(1, chunk_bytes // (8 * width * run)) * run
+
+    depths = []
+    rows = []
+    for first in range(0, count, step):
+        block = np.asarray(image[first:first + step], dtype='float64').reshape(-1, width)
+        depths.append(_run_means(depth[first:first + step, None], run)[:, 0])
+        rows.append(_run_means(block, run))
+    if not rows:
+        return np.empty(0), np.empty((0, width))
+    return np.concatenate(depths), np.concatenate(rows)
+
+
+def _run_means(block, run):
+    """
+    Mean of every `run` consecutive rows of a 2-D block, ignoring NaN (NaN for runs without values).
+    """
+    runs = -(-len(block) // run)
+    padded = np.full((runs * run, block.shape[1]), np.nan)
+    padded[:len(block)] = block
+    padded = padded.reshape(runs, run, block.shape[1])
+    valid = ~np.isnan(padded)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.add.reduce(padded, axis=1, where=valid, initial=0.0) / valid.sum(axis=1)
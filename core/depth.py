@@ -0,0 +1,32 @@
+from . import units
+
+DEPTH_MNEMONICS = ['TDEP', 'DEPT', 'DEPTH', 'MD', 'TVD']
+
+
+def detect_depth_column(df):
+    """
+    Returns the first column named like a depth channel (see DEPTH_MNEMONICS) whose values
+    are monotonic, or None when there is no such column.
+    The declared index channel of a frame (LazyFrame.index_column) is monotonic by definition,
+    so it is accepted without reading its values.
+    """
+    index_column = getattr(df, 'index_column', None)
+    if index_column in DEPTH_MNEMONICS:
+        return index_column
+    for col in df.columns:
+        if col in DEPTH_MNEMONICS:
+            if df[col].is_monotonic_increasing or df[col].is_monotonic_decreasing:
+                return col
+    return None
+
+
+def depth_factor(from_unit, to_unit):
+    """
+    Returns the factor that converts depths from one unit to another (1.0 when no conversion applies),
+    or None when the conversion is not supported. Depths may be in any unit of the unit table
+    (see units.conversion), with an RP66 numeric prefix ('0.1 in').
+    """
+    factors = units.conversion(from_unit, to_unit)
+    if factors is None or factors[1]:
+        return None
+    return factors[0]
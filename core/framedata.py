@@ -0,0 +1,582 @@
+import itertools
+import os
+import shutil
+import tempfile
+import time
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from . import instrumentation, nulls, stats
+from .alignment import as_float
+
+_versions = itertools.count(1)
+
+MAX_INTERVALS = 2
+CHUNK_BYTES = 64 * 1024 ** 2
+FULL_DECODE_FRACTION = 0.5
+
+
+class FrameData:
+    """
+    Curves of one Frame decoded in a single pass over its frame data records.
+    `curves` maps the label of each 1-D channel to a zero-copy view into the decoded records.
+    Multi-dimensional channels (images, waveforms, spectra) are not part of the records; they are
+    extracted separately to memory-mapped files (see arrays.extract_array).
+    Labels are the dlisio field names, so duplicated mnemonics stay distinct (e.g. 'TDEP.0.1').
+    """
+    def __init__(self, records, channels, decode_seconds):
+        self.records = records
+        self.channels = channels
+        self.decode_seconds = decode_seconds
+        self.curves = {label: records[label] for label in records.dtype.names[1:]}
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def nbytes(self):
+        return self.records.nbytes
+
+    def unit(self, label):
+        return channel_unit(self.channels.get(label))
+
+
+def channel_unit(channel):
+    """
+    Returns the unit of a channel, or an empty string when the channel (or its unit) is missing.
+    """
+    return (getattr(channel, 'units', None) or '') if channel is not None else ''
+
+
+def record_tells(frame):
+    """
+    Returns the file positions of the frame data records of a Frame, in file order.
+    """
+    logical_file = getattr(frame, 'logicalfile', None)
+    if logical_file is None:
+        return []
+    return logical_file.fdata_index.get(frame.fingerprint, [])
+
+
+def read_records(frame, dtype, tells, fmt=None, post_fmt='', pre_fmt=''):
+    """
+    Reads the frame data records at `tells` into a structured array of `dtype`.
+    `fmt` is the dlisio format string of the fields read (the whole frame by default); `pre_fmt` and
+    `post_fmt` are the formats of the leading and trailing fields that are skipped, so that any run of
+    channels can be read alone.
+    """
+    from dlisio import core
+
+    logical_file = frame.logicalfile
+    alloc = lambda size: np.empty(shape=size, dtype=dtype)
+    return core.read_fdata(pre_fmt, fmt or frame.fmtstr(), post_fmt, logical_file.file, list(tells),
+                           dtype.itemsize, alloc, logical_file.error_handler)
+
+
+def count_samples(frame, tells=None):
+    """
+    Returns the number of samples of a Frame, reading only the frame number of each frame data record.
+    """
+    tells = record_tells(frame) if tells is None else tells
+    if not len(tells):
+        return 0
+    formats = ''.join(channel.fmtstr() for channel in frame.channels)
+    fields = np.dtype([('FRAMENO', frame.dtype(strict=False)['FRAMENO'])])
+    return len(read_records(frame, fields, tells, fmt='i', post_fmt=formats))
+
+
+def records_per_chunk(itemsize, chunk_bytes=CHUNK_BYTES):
+    """
+    Returns how many frame data records of `itemsize` bytes fit in `chunk_bytes` (at least one).
+    """
+    return max(1, chunk_bytes // max(itemsize, 1))
+
+
+def decode_frame(frame, tells=None, chunk_bytes=CHUNK_BYTES):
+    """
+    Decodes every 1-D channel of a Frame with a single `frame.curves()` call.
+    Unlike `channel.curves()`, which walks all frame data records once per channel, this reads
+    the records once and splits the resulting structured array into per-channel views.
+    With `tells`, only the frame data records at these positions are read (see DepthIndex).
+    Frames with multi-dimensional channels are read `chunk_bytes` at a time and only their 1-D
+    fields are kept, so the arrays are never held in memory for the whole frame.
+    """
+    start = time.perf_counter()
+    with instrumentation.stage('decode frame') as stage:
+        dtype = frame.dtype(strict=False)
+        scalars = [name for name in dtype.names if dtype[name].shape == ()]
+        if len(scalars) == len(dtype.names):
+            records = frame.curves(strict=False) if tells is None else read_records(frame, dtype, tells)
+        else:
+            tells = record_tells(frame) if tells is None else tells
+            compact = np.dtype([(name, dtype[name]) for name in scalars])
+            step = records_per_chunk(dtype.itemsize, chunk_bytes)
+            chunks = []
+            for first in range(0, len(tells), step):
+                chunk = read_records(frame, dtype, tells[first:first + step])
+                records = np.empty(len(chunk), dtype=compact)
+                for name in scalars:
+                    records[name] = chunk[name]
+                chunks.append(records)
+            records = np.concatenate(chunks) if chunks else np.empty(0, dtype=compact)
+        stage.nbytes = records.nbytes
+    decode_seconds = time.perf_counter() - start
+
+    labels = dtype.names[1:]
+    channels = dict(zip(labels, frame.channels))
+    return FrameData(records, channels, decode_seconds)
+
+
+class DepthIndex:
+    """
+    Depth of every sample of a Frame along one depth channel, used to find the samples of a depth interval.
+    Monotonic depths are searched with a binary search; other depths with a mask.
+    `direction` ('increasing' or 'decreasing') is taken from the Frame metadata when the channel is the
+    declared index of the Frame, and found with one scan of the depths otherwise.
+    `tells` holds the file position of every sample's frame data record when each record holds exactly
+    one sample, so that an interval can be decoded from its own records only.
+    """
+    def __init__(self, depth, direction=None, tells=None):
+        self.depth = as_float(depth)
+        self.direction = direction if direction is not None else _direction(self.depth)
+        self.tells = np.asarray(tells) if tells is not None and len(tells) == len(self.depth) else None
+
+        if len(self.depth) == 0:
+            self.top = self.bottom = None
+        elif self.direction is not None and not np.isnan(self.depth[[0, -1]]).any():
+            self.top, self.bottom = sorted((float(self.depth[0]), float(self.depth[-1])))
+        else:
+            self.top, self.bottom = float(np.nanmin(self.depth)), float(np.nanmax(self.depth))
+
+    def __len__(self):
+        return len(self.depth)
+
+    def rows(self, top, bottom):
+        """
+        Returns the samples with top <= depth <= bottom, as a slice when the depths are monotonic
+        and as an array of positions otherwise.
+        """
+        if self.direction == 'increasing':
+            return slice(int(np.searchsorted(self.depth, top, 'left')),
+                         int(np.searchsorted(self.depth, bottom, 'right')))
+        if self.direction == 'decreasing':
+            reversed_depth = self.depth[::-1]
+            count = len(self.depth)
+            return slice(count - int(np.searchsorted(reversed_depth, bottom, 'right')),
+                         count - int(np.searchsorted(reversed_depth, top, 'left')))
+        return np.flatnonzero((self.depth >= top) & (self.depth <= bottom))
+
+
+def _direction(depth):
+    """
+    Returns 'increasing' or 'decreasing' for monotonic depths without NaN, None otherwise.
+    """
+    if np.isnan(depth).any():
+        return None
+    steps = np.diff(depth)
+    if (steps >= 0).all():
+        return 'increasing'
+    if (steps <= 0).all():
+        return 'decreasing'
+    return None
+
+
+def declared_direction(frame):
+    """
+    Returns the direction of the index channel of a Frame from its DIRECTION or SPACING attribute,
+    or None when neither is recorded.
+    """
+    direction = (getattr(frame, 'direction', None) or '').upper()
+    if direction in ('INCREASING', 'DECREASING'):
+        return direction.lower()
+    try:
+        spacing = float(np.ravel(frame.spacing)[0])
+    except (AttributeError, IndexError, TypeError, ValueError):
+        return None
+    if spacing > 0:
+        return 'increasing'
+    if spacing < 0:
+        return 'decreasing'
+    return None
+
+
+class LazyFrame:
+    """
+    DataFrame-like view of a Frame whose columns are materialized on first access.
+    Column labels come from the Frame metadata, so listing channels does not read any data.
+    A column is read alone from the frame data records, skipping every other channel (see read_records);
+    when more than FULL_DECODE_FRACTION of the columns are requested at once, the Frame is decoded in one
+    pass instead (see decode_frame). Each column is NaN-masked and memoized, so only the curves that are
+    actually viewed or exported cost reading time and memory. `decode_seconds` is the time spent reading.
+    Supports the subset of the DataFrame interface used by the pages: `columns`, `empty`, `len()`,
+    `df[label]`, `df[[labels]]` and `df[label] = values`.
+    `version` changes whenever the content may have changed, so derived results can be memoized on it.
+    `interval()` returns the same view restricted to a depth interval, which decodes only the frame
+    data records of that interval.
+    """
+    def __init__(self, frame, rows=None, tells=None, parent=None):
+        self.frame = frame
+        self.version = next(_versions)
+        self.decode_seconds = 0.0
+        self._frame_data = None
+        self._length = None
+        self._series = {}
+        self._computed = set()
+        self._views = set()
+        self._spilled = set()
+        self._rows = rows
+        self._tells = tells
+        self._parent = parent
+        self._shared = False
+        self._depth_indexes = {}
+        self._intervals = OrderedDict()
+        self._statistics = {}
+        self._arrays = {}
+        self._array_dir = None
+
+        if parent is not None:
+            self.channels = parent.channels
+            self._file_absent = parent._file_absent
+            self.columns = parent.columns
+            self.array_columns = parent.array_columns
+            self.index_column = parent.index_column
+            self._length = max(rows.stop - rows.start, 0) if isinstance(rows, slice) else len(rows)
+            return
+
+        dtype = frame.dtype(strict=False)
+        labels = dtype.names[1:]
+        self.channels = dict(zip(labels, frame.channels))
+        self._file_absent = nulls.file_absent_values(getattr(frame, 'logicalfile', None))
+        self.columns = pd.Index([label for label in labels if dtype[label].shape == ()])
+        self.array_columns = [label for label in labels if dtype[label].shape != ()]
+        self.index_column = None
+        if labels and labels[0] in self.columns and getattr(frame, 'index_type', None) is not None:
+            self.index_column = labels[0]
+
+    @property
+    def frame_data(self):
+        """
+        The records of every 1-D channel, decoded in one pass on first access (see decode_frame).
+        """
+        if self._frame_data is None:
+            if self._parent is None:
+                self._frame_data = decode_frame(self.frame)
+            elif self._tells is not None and self._parent._frame_data is None:
+                self._frame_data = decode_frame(self.frame, self._tells)
+            else:
+                parent_data = self._parent.frame_data
+                self._frame_data = FrameData(parent_data.records[self._rows], parent_data.channels, 0.0)
+                self._shared = isinstance(self._rows, slice)
+            self.decode_seconds += self._frame_data.decode_seconds
+            self._length = len(self._frame_data)
+        return self._frame_data
+
+    @property
+    def decoded(self):
+        """
+        True when the records of the whole Frame are in memory (here or in the parent frame).
+        """
+        return self._frame_data is not None or (self._parent is not None and self._parent._frame_data is not None)
+
+    @property
+    def empty(self):
+        return len(self.columns) == 0 or len(self) == 0
+
+    @property
+    def materialized(self):
+        return list(self._series)
+
+    @property
+    def nbytes(self):
+        return sum(series.nbytes for series in self._series.values())
+
+    @property
+    def resident_bytes(self):
+        """
+        Bytes held in memory: the decoded records plus the columns that own their data
+        (float columns are views into the records and memory-mapped columns live on disk),
+        the depth indexes and statistics catalogs built from them, and the depth intervals
+        taken from this frame.
+        """
+        total = self._frame_data.nbytes if self._frame_data is not None and not self._shared else 0
+        total += sum(series.nbytes for label, series in self._series.items()
+                     if label not in self._views and label not in self._spilled)
+        counted = [self._frame_data.records] if self._frame_data is not None else []
+        counted += [series.to_numpy(copy=False) for series in self._series.values()
+                    if isinstance(series.dtype, np.dtype)]
+        for index in self._depth_indexes.values():
+            total += _owned_bytes(index.depth, counted)
+            if index.tells is not None:
+                total += _owned_bytes(index.tells, counted)
+        total += sum(int(catalog.memory_usage(deep=True).sum()) for catalog in self._statistics.values())
+        return total + sum(interval.resident_bytes for interval in self._intervals.values())
+
+    @property
+    def array_bytes(self):
+        """
+        Bytes of the multi-dimensional channels extracted to disk (see array()).
+        """
+        return sum(array.nbytes for array in self._arrays.values()) + \
+            sum(interval.array_bytes for interval in self._intervals.values())
+
+    @property
+    def spilled_bytes(self):
+        return sum(self._series[label].nbytes for label in self._spilled) + \
+            sum(interval.spilled_bytes for interval in self._intervals.values())
+
+    def __len__(self):
+        if self._length is None:
+            self._length = len(self._frame_data) if self._frame_data is not None else count_samples(self.frame)
+        return self._length
+
+    def __contains__(self, label):
+        return label in self.columns
+
+    def __getitem__(self, key):
+        if isinstance(key, (list, tuple, pd.Index)):
+            self.prepare(key)
+            return pd.DataFrame({label: self[label] for label in key})
+
+        series = self._series.get(key)
+        if series is None:
+            if key not in self.columns:
+                raise KeyError(key)
+            if not self.decoded and self._parent is not None and self._tells is None:
+                values = self._parent[key].array[self._rows]
+                if isinstance(self._rows, slice):
+                    self._views.add(key)
+            else:
+                if self.decoded:
+                    values = self.frame_data.curves[key]
+                else:
+                    values = self._read_column(key)
+                absent = nulls.channel_absent_values(self.channels.get(key), self._file_absent)
+                values = nulls.normalize(values, absent)
+                if isinstance(values, np.ndarray) and self._frame_data is not None:
+                    self._views.add(key)
+            series = pd.Series(values, name=key, copy=False)
+            self._series[key] = series
+        return series
+
+    def prepare(self, labels):
+        """
+        Decodes the whole Frame in one pass when more than FULL_DECODE_FRACTION of its columns are about
+        to be read and are not in memory yet, rather than reading each of them alone.
+        """
+        missing = [label for label in labels if label not in self._series and label in self.columns]
+        if not self.decoded and len(missing) > FULL_DECODE_FRACTION * len(self.columns):
+            self.frame_data
+
+    def __setitem__(self, key, values):
+        self._series[key] = pd.Series(values, name=key)
+        self._computed.add(key)
+        self.version = next(_versions)
+        self._intervals.clear()
+        self._depth_indexes.pop(key, None)
+        if key not in self.columns:
+            self.columns = self.columns.append(pd.Index([key]))
+
+    def unit(self, label):
+        return channel_unit(self.channels.get(label))
+
+    def depth_index(self, label):
+        """
+        Returns the DepthIndex of a depth channel, built on first use.
+        The declared index channel of an undecoded Frame is read alone from the frame data records,
+        and its direction comes from the Frame metadata, with one scan of the depths when it is not recorded.
+        """
+        index = self._depth_indexes.get(label)
+        if index is None:
+            if label == self.index_column and self._parent is None and self._frame_data is None:
+                depth, tells = self._read_index()
+                index = DepthIndex(depth, _index_direction(self.frame, depth), tells)
+            else:
+                direction = declared_direction(self.frame) if label == self.index_column else None
+                tells = record_tells(self.frame) if self._parent is None else None
+                index = DepthIndex(self[label], direction, tells)
+            self._depth_indexes[label] = index
+            if self._length is None:
+                self._length = len(index)
+        return index
+
+    def array(self, label):
+        """
+        Returns a multi-dimensional channel as a memory-mapped ArrayChannel, extracted on first use.
+        A depth interval extracts only its own records when it has them, and is otherwise a slice
+        of the whole channel.
+        """
+        from . import arrays
+
+        array = self._arrays.get(label)
+        if array is None:
+            if label not in self.array_columns:
+                raise KeyError(label)
+            tells = record_tells(self.frame) if self._parent is None else self._tells
+            if tells is None:
+                parent_array = self._parent.array(label)
+                array = arrays.ArrayChannel(label, parent_array.path, parent_array.unit)
+                array.data = parent_array.data[self._rows]
+            else:
+                path = os.path.join(self._array_directory(), f"{self.version}_{self.array_columns.index(label)}.npy")
+                absent = nulls.channel_absent_values(self.channels.get(label), self._file_absent)
+                array = arrays.extract_array(self.frame, label, path, tells, absent, self.unit(label))
+            self._arrays[label] = array
+        return array
+
+    def _array_directory(self):
+        if self._parent is not None:
+            return self._parent._array_directory()
+        if self._array_dir is None:
+            self._array_dir = tempfile.mkdtemp(prefix='dlis-arrays-')
+            weakref.finalize(self, shutil.rmtree, self._array_dir, True)
+        return self._array_dir
+
+    def statistics(self, depth_column=None, columns=None):
+        """
+        Returns the statistics catalog of every channel of the Frame (see stats.frame_statistics), computed
+        once per depth channel and content version; columns set with `df[label] = values` are left out.
+        With `columns`, only these channels are described: taken from the catalog when it is already
+        computed, and otherwise computed for them alone, so that only their columns are read.
+        """
+        key = (depth_column, self.version)
+        catalog = self._statistics.get(key)
+        if columns is not None:
+            labels = [label for label in columns if label != depth_column]
+            if catalog is not None and all(label in catalog.index for label in labels):
+                return catalog.loc[labels]
+            self.prepare(labels)
+            return stats.frame_statistics(self, depth_column, columns=labels)
+        if catalog is None:
+            labels = [label for label in self.columns if label not in self._computed]
+            self.prepare(labels)
+            catalog = stats.frame_statistics(self, depth_column, columns=labels)
+            self._statistics = {key: catalog}
+        return catalog
+
+    def interval(self, depth_column, top=None, bottom=None):
+        """
+        Returns a LazyFrame with the samples whose depth is between `top` and `bottom` (inclusive),
+        or this frame when the interval covers all of it.
+        When each frame data record holds one sample, the interval decodes only its own records;
+        otherwise (or when this frame is already decoded) it is a slice of this frame's records.
+        The last MAX_INTERVALS intervals are kept, so reruns with the same bounds reuse them.
+        """
+        index = self.depth_index(depth_column)
+        if index.top is None or ((top is None or top <= index.top) and (bottom is None or bottom >= index.bottom)):
+            return self
+        top = index.top if top is None else top
+        bottom = index.bottom if bottom is None else bottom
+
+        key = (depth_column, top, bottom)
+        interval = self._intervals.get(key)
+        if interval is None:
+            rows = index.rows(top, bottom)
+            tells = index.tells[rows] if index.tells is not None else None
+            interval = LazyFrame(self.frame, rows=rows, tells=tells, parent=self)
+            for label in self._computed:
+                interval[label] = np.asarray(self[label])[rows]
+            self._intervals[key] = interval
+            while len(self._intervals) > MAX_INTERVALS:
+                self._intervals.popitem(last=False)
+        self._intervals.move_to_end(key)
+        return interval
+
+    def release(self, spill_dir=None):
+        """
+        Frees the decoded records, the in-memory columns, the depth indexes and the statistics catalogs.
+        With `spill_dir`, materialized columns are saved as .npy files and reopened memory-mapped,
+        so they come back without decoding the Frame again. Otherwise channel columns are dropped
+        and re-materialized from the Frame on next access.
+        """
+        self._frame_data = None
+        self._shared = False
+        self._depth_indexes = {}
+        self._statistics = {}
+        for interval in self._intervals.values():
+            interval.release(os.path.join(spill_dir, f"interval{interval.version}") if spill_dir else None)
+        for label, series in list(self._series.items()):
+            if label in self._spilled:
+                continue
+            self._views.discard(label)
+            if spill_dir is None:
+                if label not in self._computed:
+                    del self._series[label]
+                continue
+            os.makedirs(spill_dir, exist_ok=True)
+            path = os.path.join(spill_dir, str(self.columns.get_loc(label)))
+            self._series[label] = pd.Series(_spill(series.array, path), name=label, copy=False)
+            self._spilled.add(label)
+
+    def _read_column(self, label):
+        """
+        Reads one 1-D channel alone from the frame data records of this frame, skipping every other channel.
+        """
+        dtype = self.frame.dtype(strict=False)
+        labels = dtype.names[1:]
+        position = labels.index(label)
+        formats = [channel.fmtstr() for channel in self.frame.channels]
+        tells = record_tells(self.frame) if self._parent is None else self._tells
+        start = time.perf_counter()
+        with instrumentation.stage('read channel') as stage:
+            records = read_records(self.frame, np.dtype([(label, dtype[label])]), tells, fmt=formats[position],
+                                   pre_fmt='i' + ''.join(formats[:position]),
+                                   post_fmt=''.join(formats[position + 1:]))
+            stage.nbytes = records.nbytes
+        self.decode_seconds += time.perf_counter() - start
+        self._length = len(records)
+        return records[label]
+
+    def _read_index(self):
+        """
+        Reads the frame numbers and the index channel only, skipping every other channel.
+        Returns the NaN-masked index values and the positions of the frame data records.
+        """
+        dtype = self.frame.dtype(strict=False)
+        fields = np.dtype([(name, dtype[name]) for name in dtype.names[:2]])
+        formats = [channel.fmtstr() for channel in self.frame.channels]
+        tells = record_tells(self.frame)
+        records = read_records(self.frame, fields, tells, fmt='i' + formats[0], post_fmt=''.join(formats[1:]))
+        absent = nulls.channel_absent_values(self.channels.get(self.index_column), self._file_absent)
+        return nulls.normalize(records[self.index_column], absent), tells
+
+
+def _index_direction(frame, depth):
+    """
+    Returns the direction of a declared index channel: from the Frame metadata, or from a scan of its
+    depths when the metadata does not record it. None when the depths are not monotonic (or hold NaN),
+    so that intervals are then found with a mask.
+    """
+    direction = declared_direction(frame)
+    if direction is not None:
+        return direction
+    return _direction(as_float(depth))
+
+
+def _owned_bytes(array, counted):
+    """
+    Returns the size of the memory behind `array` (the whole buffer it is a view of), or 0 when that
+    memory lies in one of the `counted` arrays, already accounted for elsewhere.
+    """
+    base = array
+    while isinstance(base.base, np.ndarray):
+        base = base.base
+    if isinstance(base, np.memmap) or any(np.may_share_memory(base, other) for other in counted):
+        return 0
+    return base.nbytes
+
+
+def _spill(array, path):
+    """
+    Saves a column as .npy file(s) and returns it reopened memory-mapped.
+    Nullable integer columns are stored as separate data and mask files.
+    """
+    if isinstance(array, pd.arrays.IntegerArray):
+        np.save(path + '.npy', array.to_numpy(dtype=array.dtype.numpy_dtype, na_value=0))
+        np.save(path + '.mask.npy', array.isna())
+        return pd.arrays.IntegerArray(np.load(path + '.npy', mmap_mode='r'),
+                                      np.load(path + '.mask.npy', mmap_mode='r'))
+    np.save(path + '.npy', np.asarray(array))
+    return np.load(path + '.npy', mmap_mode='r')
@@ -0,0 +1,89 @@
+import itertools
+import os
+import shutil
+import tempfile
+import weakref
+from collections import OrderedDict
+
+DEFAULT_MAX_BYTES = int(os.environ.get('DLIS_EXPLORER_FRAME_BUDGET_MB', 512)) * 1024 ** 2
+
+
+class FrameStore:
+    """
+    Bounded store of the LazyFrames visited in a session, shared by all its files and keyed by
+    (file hash, "Logical File 1", "Frame 1") (see selection.frame_key).
+    Frames are kept in least-recently-used order. When the resident size exceeds `max_bytes`,
+    the oldest frames release their memory: materialized columns are spilled to memory-mapped .npy
+    files (or dropped when spilling is disabled) and come back transparently on next access,
+    e.g. when export.combine_dataframes() reads a frame that was evicted.
+    """
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, spill=True):
+        self.max_bytes = max_bytes
+        self._frames = OrderedDict()
+        self._spill_dir = None
+        self._spill_ids = itertools.count()
+        if spill:
+            self._spill_dir = tempfile.mkdtemp(prefix='dlis-frames-')
+            weakref.finalize(self, shutil.rmtree, self._spill_dir, True)
+
+    def __contains__(self, key):
+        return key in self._frames
+
+    def __len__(self):
+        return len(self._frames)
+
+    def __getitem__(self, key):
+        frame = self._frames[key]
+        self._frames.move_to_end(key)
+        return frame
+
+    def __setitem__(self, key, frame):
+        self._frames[key] = frame
+        self._frames.move_to_end(key)
+        self.enforce()
+
+    def __delitem__(self, key):
+        del self._frames[key]
+
+    def get(self, key, default=None):
+        return self[key] if key in self._frames else default
+
+    def keys(self):
+        return self._frames.keys()
+
+    @property
+    def resident_bytes(self):
+        return sum(frame.resident_bytes for frame in self._frames.values())
+
+    @property
+    def spilled_bytes(self):
+        return sum(frame.spilled_bytes for frame in self._frames.values())
+
+    def enforce(self):
+        """
+        Releases the least recently used frames until the resident size fits the budget.
+        The most recently used frame is never released.
+        """
+        for key in list(self._frames)[:-1]:
+            if self.resident_bytes <= self.max_bytes:
+                break
+            spill_dir = None
+            if self._spill_dir is not None:
+                spill_dir = os.path.join(self._spill_dir, str(next(self._spill_ids)))
+            self._frames[key].release(spill_dir)
+
+    def usage(self, label=str):
+        """
+        Returns one row per stored frame with its resident and spilled sizes, most recent first.
+        `label` turns a key into the name shown for the frame.
+        """
+        return [
+            {
+                'Frame': label(key),
+                'Resident (MB)': round(frame.resident_bytes / 1024 ** 2, 2),
+                'Spilled (MB)': round(frame.spilled_bytes / 1024 ** 2, 2),
+                'Arrays on disk (MB)': round(frame.array_bytes / 1024 ** 2, 2),
+                'Loaded channels': len(frame.materialized),
+            }
+            for key, frame in reversed(self._frames.items())
+        ]
@@ -0,0 +1,273 @@
+"""
+Per-stage timing and memory instrumentation.
+
+A Recorder collects, for every stage of a run (one Streamlit rerun, one script call), its duration,
+the bytes it processed, the resident set size of the process at its end and, when tracemalloc is
+tracing, the peak of the traced memory during the stage. Code marks its stages with the module-level
+stage() context manager or the timed() decorator; they record into the recorder activated in the
+current thread, and cost one thread-local lookup when no recorder is active.
+
+Runs are exported as JSON lines or in the Prometheus text format (for the node_exporter textfile
+collector).
+"""
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+import weakref
+from collections import OrderedDict, deque
+
+MAX_RUNS = 50
+PROMETHEUS_PREFIX = 'dlis_explorer'
+
+_local = threading.local()
+
+
+def rss_bytes():
+    """
+    Returns the resident set size of the process, or its peak where the current size is not available.
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        import sys
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Stage:
+    """
+    One timed stage; `nbytes` may be set while the stage runs.
+    """
+    def __init__(self, recorder, name, nbytes=None):
+        self.recorder = recorder
+        self.name = name
+        self.nbytes = nbytes
+        self._child_peak = 0
+
+    def __enter__(self):
+        stack = self.recorder._stack
+        if tracemalloc.is_tracing():
+            if stack:
+                stack[-1]._child_peak = max(stack[-1]._child_peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        stack.append(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter() - self._start
+        stack = self.recorder._stack
+        stack.pop()
+        peak = None
+        if tracemalloc.is_tracing():
+            peak = max(self._child_peak, tracemalloc.get_traced_memory()[1])
+            if stack:
+                stack[-1]._child_peak = max(stack[-1]._child_peak, peak)
+        self.recorder.record(self.name, seconds, self.nbytes, peak, depth=len(stack))
+        return False
+
+
+class _NullStage:
+    """
+    Stage returned when no recorder is active; setting `nbytes` on it is harmless.
+    """
+    nbytes = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_null_stage = _NullStage()
+
+
+class Recorder:
+    """
+    Stages of the current run and of the last `max_runs` runs.
+    With `trace_memory`, tracemalloc is started (it traces every thread of the process, and slows
+    allocations down) so that each stage reports its peak of traced memory.
+    """
+    def __init__(self, trace_memory=False, max_runs=MAX_RUNS):
+        self.runs = deque(maxlen=max_runs)
+        self.current = None
+        self.run_number = 0
+        self._stack = []
+        self._written = {}
+        self.trace_memory = trace_memory
+
+    @property
+    def trace_memory(self):
+        return self._trace_memory
+
+    @trace_memory.setter
+    def trace_memory(self, value):
+        self._trace_memory = value
+        if value and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def start_run(self, label=''):
+        """
+        Starts a new run; the previous one is kept in `runs`.
+        """
+        self.run_number += 1
+        self.current = {'run': self.run_number, 'label': label, 'time': time.time(), 'stages': []}
+        self.runs.append(self.current)
+        self._stack = []
+        return self.current
+
+    def record(self, name, seconds, nbytes=None, peak_bytes=None, depth=0):
+        """
+        Adds a stage measured elsewhere (e.g. by a background thread) to the current run.
+        """
+        if self.current is None:
+            self.start_run()
+        self.current['stages'].append({
+            'stage': name,
+            'depth': depth,
+            'seconds': seconds,
+            'bytes': nbytes,
+            'peak_mb': None if peak_bytes is None else peak_bytes / 1024 ** 2,
+            'rss_mb': rss_bytes() / 1024 ** 2,
+        })
+
+    def stage(self, name, nbytes=None):
+        return Stage(self, name, nbytes)
+
+    def totals(self):
+        """
+        Returns {stage: (count, total seconds, total bytes)} over the kept runs.
+        """
+        totals = OrderedDict()
+        for run in self.runs:
+            for stage in run['stages']:
+                count, seconds, nbytes = totals.get(stage['stage'], (0, 0.0, 0))
+                totals[stage['stage']] = (count + 1, seconds + stage['seconds'], nbytes + (stage['bytes'] or 0))
+        return totals
+
+    def jsonl(self, runs=None):
+        """
+        Returns the stages of the kept runs (or of `runs`) as JSON lines, one stage per line.
+        """
+        lines = []
+        for run in self.runs if runs is None else runs:
+            for stage in run['stages']:
+                lines.append(json.dumps({'run': run['run'], 'label': run['label'], 'time': run['time'], **stage}))
+        return ''.join(line + '\n' for line in lines)
+
+    def prometheus(self, labels=None):
+        """
+        Returns the totals of the kept runs in the Prometheus text exposition format, every sample
+        carrying `labels` (e.g. {'session': ...}) besides its stage.
+        """
+        def selector(stage=None):
+            pairs = dict(labels or {})
+            if stage is not None:
+                pairs['stage'] = stage
+            if not pairs:
+                return ''
+            text = ','.join(f'{key}="{_escape(value)}"' for key, value in pairs.items())
+            return '{' + text + '}'
+
+        totals = self.totals()
+        lines = [
+            f"# HELP {PROMETHEUS_PREFIX}_stage_seconds Time spent in each stage.",
+            f"# TYPE {PROMETHEUS_PREFIX}_stage_seconds summary",
+        ]
+        for name, (count, seconds, _) in totals.items():
+            lines.append(f"{PROMETHEUS_PREFIX}_stage_seconds_sum{selector(name)} {seconds:.6f}")
+            lines.append(f"{PROMETHEUS_PREFIX}_stage_seconds_count{selector(name)} {count}")
+        lines += [
+            f"# HELP {PROMETHEUS_PREFIX}_stage_bytes_total Bytes processed by each stage.",
+            f"# TYPE {PROMETHEUS_PREFIX}_stage_bytes_total counter",
+        ]
+        for name, (_, _, nbytes) in totals.items():
+            lines.append(f"{PROMETHEUS_PREFIX}_stage_bytes_total{selector(name)} {nbytes}")
+        lines += [
+            f"# HELP {PROMETHEUS_PREFIX}_resident_memory_bytes Resident set size of the process.",
+            f"# TYPE {PROMETHEUS_PREFIX}_resident_memory_bytes gauge",
+            f"{PROMETHEUS_PREFIX}_resident_memory_bytes{selector()} {rss_bytes()}",
+        ]
+        return '\n'.join(lines) + '\n'
+
+    def write_jsonl(self, path, runs=None):
+        """
+        Appends the stages of the kept runs (or of `runs`) to a JSON lines file.
+        """
+        with open(path, 'a') as output:
+            output.write(self.jsonl(runs))
+
+    def write_prometheus(self, path, labels=None):
+        """
+        Writes the Prometheus text file atomically, as the textfile collector expects.
+        The file is removed by close(), when the recorder is garbage collected (e.g. with the session
+        holding it) or at process exit, so the collector does not keep exporting a finished session.
+        """
+        partial_path = path + '.part'
+        with open(partial_path, 'w') as output:
+            output.write(self.prometheus(labels))
+        os.replace(partial_path, path)
+        if path not in self._written:
+            self._written[path] = weakref.finalize(self, _remove, path)
+
+    def close(self):
+        """
+        Removes the Prometheus files written by the recorder.
+        """
+        for remove in self._written.values():
+            remove()
+        self._written.clear()
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def activate(recorder):
+    """
+    Makes `recorder` receive the stages of the current thread; None disables recording.
+    """
+    _local.recorder = recorder
+
+
+def active():
+    return getattr(_local, 'recorder', None)
+
+
+def stage(name, nbytes=None):
+    """
+    Context manager timing a stage into the active recorder of the thread, or doing nothing.
+    """
+    recorder = getattr(_local, 'recorder', None)
+    if recorder is None:
+        return _null_stage
+    return recorder.stage(name, nbytes)
+
+
+def timed(name):
+    """
+    Decorator timing every call of a function as stage `name`.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            recorder = getattr(_local, 'recorder', None)
+            if recorder is None:
+                return function(*args, **kwargs)
+            with recorder.stage(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
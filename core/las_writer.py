@@ -0,0 +1,70 @@
+import io
+import tempfile
+
+import numpy as np
+
+CHUNK_ROWS = 20000
+SPOOL_MAX_SIZE = 32 * 1024 ** 2
+NULL_VALUE = -9999.25
+VALUE_FORMAT = '%10.5f'
+
+
+def _header(df, columns, units, depth_unit, well_name, descriptions=None):
+    """
+    Renders every section up to and including the ~ASCII line with lasio.
+    The header only depends on the first two and the last index values (STRT, STEP, STOP),
+    so lasio is given those rows instead of the whole DataFrame.
+    """
+    import lasio
+
+    rows = df.index[[0, 1, -1]] if len(df) > 3 else df.index
+    sample = df.loc[rows, columns]
+
+    las = lasio.LASFile()
+    las.well.WELL.value = well_name
+    las.other = f"Depth unit: {depth_unit}\nGenerated by DLIS Data Explorer"
+    descriptions = descriptions or {}
+    for column in columns:
+        las.append_curve_item(lasio.CurveItem(mnemonic=column, unit=units.get(column, ''), data=sample[column],
+                                              descr=descriptions.get(column, '')))
+
+    buffer = io.StringIO()
+    las.write(buffer, version=2.0)
+    text = buffer.getvalue()
+    data_section = text.index('\n~A') + 1
+    return text[:text.index('\n', data_section) + 1]
+
+
+def write_las(file_object, df, columns, units=None, depth_unit='unknown', well_name='WELL', chunk_rows=CHUNK_ROWS,
+              descriptions=None):
+    """
+    Writes a LAS 2.0 file to a binary file object, byte-for-byte as lasio's LASFile.write would.
+    `columns` lists the curves to write, the depth (index) curve first; `units` and `descriptions`
+    map curves to the unit and description of their ~Curve line. The ~ASCII section is
+    formatted in chunks of `chunk_rows` rows with one %-format call per chunk, so neither the
+    whole text nor a copy of the DataFrame is ever held in memory.
+    """
+    units = units or {}
+    file_object.write(_header(df, columns, units, depth_unit, well_name, descriptions).encode('utf-8'))
+
+    values = [df[column].to_numpy(dtype='float64', na_value=np.nan) for column in columns]
+    line_format = ' '.join([''] + [VALUE_FORMAT] * len(columns)) + '\n'
+    nan_field = VALUE_FORMAT % np.nan
+    null_field = str(NULL_VALUE).rjust(len(nan_field))
+
+    for start in range(0, len(df), chunk_rows):
+        chunk = np.column_stack([column[start:start + chunk_rows] for column in values])
+        text = (line_format * len(chunk)) % tuple(chunk.ravel().tolist())
+        file_object.write(text.replace(nan_field, null_field).encode('utf-8'))
+
+
+def spool_las(df, columns, units=None, depth_unit='unknown', well_name='WELL', max_size=SPOOL_MAX_SIZE,
+              descriptions=None):
+    """
+    Writes the LAS file to a spooled temporary file (in memory up to `max_size`, then on disk)
+    and returns it rewound, ready to be read or handed to a download.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=max_size, mode='w+b')
+    write_las(spool, df, columns, units, depth_unit, well_name, descriptions=descriptions)
+    spool.seek(0)
+    return spool
@@ -0,0 +1,206 @@
+"""
+Progressive loading of DLIS files. dlisio indexes a whole file in dlis.load before returning
+anything; here its indexer is driven one logical file at a time, so every logical file can be
+browsed as soon as it is indexed, and the progress (bytes, logical files, frame data records)
+can be reported while the rest of the file is still being read.
+
+The indexer is not part of the public API of dlisio (requirements.txt pins the version it was written
+for); when it is missing, the whole file is loaded with dlis.load before any logical file is yielded.
+"""
+import importlib
+import os
+import threading
+import time
+
+CHUNK_SIZE = 8 * 1024 * 1024
+
+SPOOLING = 'spooling'
+INDEXING = 'indexing'
+DONE = 'done'
+FAILED = 'failed'
+
+
+def iter_logical_files(path, error_handler=None):
+    """
+    Yields (logical_file, bytes_indexed) for every logical file of a DLIS file, in order, as
+    dlis.load would return them. `bytes_indexed` is the offset where the next logical file starts.
+    Logical files already yielded stay open if the generator is closed early or fails.
+    """
+    from dlisio import common, core, dlis
+
+    try:
+        file_indexer = importlib.import_module('dlisio.dlis.load').FileIndexer
+    except (AttributeError, ImportError):
+        file_indexer = None
+    if not error_handler:
+        error_handler = common.ErrorHandler()
+    path = str(path)
+    if not os.path.isfile(path):
+        raise OSError(f"'{path}' is not an existing regular file")
+
+    if file_indexer is None:
+        size = os.path.getsize(path)
+        for logical_file in dlis.load(path, error_handler=error_handler):
+            yield logical_file, size
+        return
+
+    stream = common.open(path)
+    is_tif = core.valid_tapemark(core.read_tapemark(stream))
+    stream.close()
+
+    indexer = file_indexer(path, is_tif, error_handler)
+    try:
+        while not indexer.end_of_data():
+            indexer.open_stream()
+            if indexer.logical_eof():
+                indexer.close_stream()
+                continue
+            if indexer.find_sul():
+                indexer.read_sul()
+            if indexer.logical_eof():
+                indexer.close_stream()
+                continue
+            indexer.apply_rp66_protocol()
+            indexer.parse_logical_file()
+            # The stream now belongs to the logical file: closing the indexer must not close it.
+            indexer.stream = None
+            yield indexer.logical_files[-1], indexer.open_next_at_tell
+    except BaseException:
+        indexer.close_stream()
+        raise
+
+
+def frame_records(logical_file):
+    """
+    Returns the number of frame data records indexed for a logical file.
+    """
+    return sum(len(tells) for tells in logical_file.fdata_index.values())
+
+
+class ProgressiveFile:
+    """
+    The logical files of a DLIS file being loaded by a background thread (see load()).
+    It is used like the tuple returned by dlis.load, but only holds the logical files indexed
+    so far; `done`, `failed` and `progress()` tell how far loading went. Iterating takes a snapshot,
+    so a page rerun sees a consistent list of logical files.
+    """
+    def __init__(self, path, total_bytes):
+        self.path = path
+        self.total_bytes = total_bytes
+        self.stage = SPOOLING
+        self.error = None
+        self.spooled_bytes = 0
+        self.indexed_bytes = 0
+        self.records = 0
+        self.spool_seconds = 0.0
+        self.index_seconds = 0.0
+        self._logical_files = []
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+        self._closed = False
+
+    def __len__(self):
+        with self._lock:
+            return len(self._logical_files)
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._logical_files))
+
+    def __getitem__(self, index):
+        with self._lock:
+            return self._logical_files[index]
+
+    @property
+    def done(self):
+        return self.stage == DONE
+
+    @property
+    def failed(self):
+        return self.stage == FAILED
+
+    @property
+    def finished(self):
+        return self._finished.is_set()
+
+    def wait(self, timeout=None):
+        """
+        Blocks until loading is done or failed; returns False on timeout.
+        """
+        return self._finished.wait(timeout)
+
+    def progress(self):
+        """
+        Returns the fraction of the file read so far, spooling and indexing counting for one half each.
+        """
+        if self.done or not self.total_bytes:
+            return 1.0
+        total = self.total_bytes
+        return min(1.0, 0.5 * self.spooled_bytes / total + 0.5 * self.indexed_bytes / total)
+
+    def describe(self):
+        """
+        One-line summary of the loading progress.
+        """
+        megabytes = self.total_bytes / 1024 ** 2
+        if self.stage == SPOOLING:
+            return f"Copying upload: {self.spooled_bytes / 1024 ** 2:.1f} of {megabytes:.1f} MB"
+        logical_files = len(self)
+        text = (f"{logical_files} Logical File(s), {self.records} frame records, "
+                f"{self.indexed_bytes / 1024 ** 2:.1f} of {megabytes:.1f} MB indexed")
+        if self.failed:
+            return f"Loading failed after {text}: {self.error}"
+        if self.done:
+            return f"{text} in {self.spool_seconds + self.index_seconds:.1f} s"
+        return f"Indexing: {text}"
+
+    def close(self):
+        """
+        Closes the logical files loaded so far; a load still running stops after its current logical file.
+        """
+        with self._lock:
+            self._closed = True
+            logical_files, self._logical_files = self._logical_files, []
+        for logical_file in logical_files:
+            logical_file.close()
+
+    def load(self, buffer=None, chunk_size=CHUNK_SIZE):
+        """
+        Copies `buffer` (the upload, any object supporting the buffer protocol) to `path` in chunks,
+        unless it is None, then indexes the file one logical file at a time.
+        Meant to run in a worker thread; errors are kept in `error` instead of raised.
+        """
+        start = time.perf_counter()
+        try:
+            if buffer is not None:
+                partial_path = self.path + '.part'
+                with memoryview(buffer) as view, open(partial_path, 'wb') as spool:
+                    for first in range(0, len(view), chunk_size):
+                        if self._closed:
+                            raise RuntimeError("Loading cancelled.")
+                        spool.write(view[first:first + chunk_size])
+                        self.spooled_bytes = min(first + chunk_size, len(view))
+                os.replace(partial_path, self.path)
+            self.spooled_bytes = self.total_bytes
+            self.spool_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            self.stage = INDEXING
+            for logical_file, indexed_bytes in iter_logical_files(self.path):
+                with self._lock:
+                    closed = self._closed
+                    if not closed:
+                        self._logical_files.append(logical_file)
+                if closed:
+                    logical_file.close()
+                    raise RuntimeError("Loading cancelled.")
+                self.records += frame_records(logical_file)
+                self.indexed_bytes = indexed_bytes
+                self.index_seconds = time.perf_counter() - start
+            self.indexed_bytes = self.total_bytes
+            self.stage = DONE
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            self.stage = FAILED
+        finally:
+            self._finished.set()
@@ -0,0 +1,245 @@
+"""
+Persistent index of the metadata of loaded DLIS files (logical files, origins, frames and channels),
+stored in SQLite and keyed by the content hash of the file (see cache.content_hash), so a file seen
+before is never walked again and channels can be searched across all its frames.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from . import depth, framedata
+
+DEFAULT_PATH = os.environ.get('DLIS_EXPLORER_INDEX',
+                              os.path.join(os.path.expanduser('~'), '.cache', 'dlis-explorer', 'metadata.sqlite'))
+MAX_FILES = int(os.environ.get('DLIS_EXPLORER_INDEX_MAX_FILES', 500))
+SCHEMA_VERSION = 2
+SEARCH_LIMIT = 200
+
+SCHEMA = """
+CREATE TABLE files (
+    digest TEXT PRIMARY KEY, name TEXT, logical_files INTEGER, indexed_at REAL, index_seconds REAL, used_at REAL);
+CREATE TABLE logical_files (
+    digest TEXT, logical_file INTEGER, file_id TEXT, origins INTEGER, frames INTEGER, channels INTEGER,
+    PRIMARY KEY (digest, logical_file));
+CREATE TABLE origins (
+    digest TEXT, logical_file INTEGER, origin INTEGER, name TEXT, well_name TEXT, field_name TEXT,
+    company TEXT, producer_name TEXT, file_id TEXT, creation_time TEXT);
+CREATE TABLE frames (
+    digest TEXT, logical_file INTEGER, frame INTEGER, name TEXT, index_type TEXT, direction TEXT,
+    spacing REAL, index_min REAL, index_max REAL, channels INTEGER, samples INTEGER,
+    depth_channel TEXT, depth_unit TEXT,
+    PRIMARY KEY (digest, logical_file, frame));
+CREATE TABLE channels (
+    digest TEXT, logical_file INTEGER, frame INTEGER, label TEXT, name TEXT, long_name TEXT,
+    units TEXT, dimension TEXT, samples INTEGER);
+CREATE INDEX origins_digest ON origins (digest);
+CREATE INDEX channels_digest ON channels (digest);
+"""
+
+
+def _text(value):
+    return None if value is None else str(value)
+
+
+def _number(value):
+    try:
+        return float(np.ravel(value)[0])
+    except (IndexError, TypeError, ValueError):
+        return None
+
+
+def depth_channel(frame, labels):
+    """
+    Returns the label of the depth channel of a Frame from its metadata alone: the declared index
+    channel when it is named like a depth channel, otherwise the first channel named like one.
+    Unlike depth.detect_depth_column, the values are not checked.
+    """
+    if labels and getattr(frame, 'index_type', None) is not None and labels[0] in depth.DEPTH_MNEMONICS:
+        return labels[0]
+    return next((label for label in labels if label in depth.DEPTH_MNEMONICS), None)
+
+
+def file_rows(digest, dlis_file, first=1):
+    """
+    Walks the metadata of a loaded DLIS file once and returns the rows of every table but `files`.
+    Logical Files are numbered from `first`. Channels that belong to no frame are listed with a NULL frame.
+    The samples of a frame are counted from its frame data records (one frame per record), without reading them.
+    """
+    rows = {'logical_files': [], 'origins': [], 'frames': [], 'channels': []}
+    for lf_number, logical_file in enumerate(dlis_file, start=first):
+        header = getattr(logical_file, 'fileheader', None)
+        rows['logical_files'].append((digest, lf_number, _text(getattr(header, 'id', None)),
+                                      len(logical_file.origins), len(logical_file.frames),
+                                      len(logical_file.channels)))
+
+        for origin in logical_file.origins:
+            rows['origins'].append((digest, lf_number, origin.origin, origin.name, _text(origin.well_name),
+                                    _text(origin.field_name), _text(origin.company), _text(origin.producer_name),
+                                    _text(origin.file_id), _text(origin.creation_time)))
+
+        for frame_number, frame in enumerate(logical_file.frames, start=1):
+            labels = list(frame.dtype(strict=False).names[1:])
+            samples = len(framedata.record_tells(frame))
+            depth_label = depth_channel(frame, labels)
+            channels = dict(zip(labels, frame.channels))
+            rows['frames'].append((digest, lf_number, frame_number, frame.name, _text(frame.index_type),
+                                   _text(frame.direction), _number(frame.spacing), _number(frame.index_min),
+                                   _number(frame.index_max), len(labels), samples, depth_label,
+                                   framedata.channel_unit(channels.get(depth_label)) or None))
+
+            for label, channel in channels.items():
+                dimension = 'x'.join(str(size) for size in (channel.dimension or [1]))
+                rows['channels'].append((digest, lf_number, frame_number, label, channel.name,
+                                         _text(channel.long_name), framedata.channel_unit(channel),
+                                         dimension, samples))
+
+        for channel in logical_file.channels:
+            if channel.frame is None:
+                dimension = 'x'.join(str(size) for size in (channel.dimension or [1]))
+                rows['channels'].append((digest, lf_number, None, channel.name, channel.name,
+                                         _text(channel.long_name), framedata.channel_unit(channel), dimension, 0))
+    return rows
+
+
+class MetadataIndex:
+    """
+    SQLite store of file metadata shared by all sessions of the process.
+    `ensure()` indexes a file the first time its digest is seen and `append()` a file still being loaded,
+    a few Logical Files at a time; the other methods only query the database. Only the `max_files` most
+    recently used files are kept: older ones are removed when a new file is indexed.
+    A database written with another SCHEMA_VERSION is rebuilt.
+    """
+    def __init__(self, path=DEFAULT_PATH, max_files=MAX_FILES):
+        self.path = path
+        self.max_files = max_files
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            if self._connection.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+                for (table,) in self._connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall():
+                    self._connection.execute(f'DROP TABLE IF EXISTS "{table}"')
+                self._connection.executescript(SCHEMA)
+                self._connection.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+    def __contains__(self, digest):
+        return bool(self._query('SELECT 1 FROM files WHERE digest = ?', (digest,)))
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def ensure(self, digest, dlis_file, name=None):
+        """
+        Indexes a loaded DLIS file unless its digest is already indexed, in which case it is only
+        marked as used. Returns True when the file was indexed by this call.
+        """
+        if digest in self:
+            self.touch(digest)
+            return False
+        start = time.perf_counter()
+        rows = file_rows(digest, dlis_file)
+        seconds = time.perf_counter() - start
+
+        with self._lock, self._connection:
+            if self._connection.execute('SELECT 1 FROM files WHERE digest = ?', (digest,)).fetchone():
+                return False
+            self._insert(rows)
+            now = time.time()
+            self._connection.execute('INSERT INTO files VALUES (?, ?, ?, ?, ?, ?)',
+                                     (digest, name, len(rows['logical_files']), now, seconds, now))
+            self._prune()
+        return True
+
+    def append(self, digest, logical_files, first, name=None):
+        """
+        Indexes more Logical Files of a file still being loaded, numbered from `first`, without
+        walking the Logical Files indexed before. Returns the number of Logical Files now indexed.
+        """
+        start = time.perf_counter()
+        rows = file_rows(digest, logical_files, first)
+        seconds = time.perf_counter() - start
+        count = first - 1 + len(rows['logical_files'])
+
+        with self._lock, self._connection:
+            self._insert(rows)
+            now = time.time()
+            self._connection.execute(
+                'INSERT INTO files VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (digest) DO UPDATE SET '
+                'logical_files = excluded.logical_files, indexed_at = excluded.indexed_at, '
+                'index_seconds = index_seconds + excluded.index_seconds, used_at = excluded.used_at',
+                (digest, name, count, now, seconds, now))
+            self._prune()
+        return count
+
+    def touch(self, digest):
+        with self._lock, self._connection:
+            self._connection.execute('UPDATE files SET used_at = ? WHERE digest = ?', (time.time(), digest))
+
+    def remove(self, digest):
+        with self._lock, self._connection:
+            self._delete(digest)
+
+    def file(self, digest):
+        rows = self._query('SELECT * FROM files WHERE digest = ?', (digest,))
+        return rows[0] if rows else None
+
+    def logical_files(self, digest):
+        return self._query('SELECT * FROM logical_files WHERE digest = ? ORDER BY logical_file', (digest,))
+
+    def origins(self, digest):
+        return self._query('SELECT * FROM origins WHERE digest = ? ORDER BY logical_file, origin', (digest,))
+
+    def frames(self, digest):
+        return self._query('SELECT * FROM frames WHERE digest = ? ORDER BY logical_file, frame', (digest,))
+
+    def channels(self, digest, logical_file=None):
+        if logical_file is None:
+            return self._query('SELECT * FROM channels WHERE digest = ? ORDER BY rowid', (digest,))
+        return self._query('SELECT * FROM channels WHERE digest = ? AND logical_file = ? ORDER BY rowid',
+                           (digest, logical_file))
+
+    def search(self, digest, text, limit=SEARCH_LIMIT):
+        """
+        Returns the channels of every logical file and frame of a file whose mnemonic, label,
+        description or unit contains `text` (case-insensitive), with the depth channel of their frame.
+        Exact mnemonic matches come first.
+        """
+        pattern = '%' + text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        return self._query(
+            """
+            SELECT c.*, f.depth_channel, f.depth_unit FROM channels c
+            JOIN frames f ON f.digest = c.digest AND f.logical_file = c.logical_file AND f.frame = c.frame
+            WHERE c.digest = :digest AND (c.name LIKE :pattern ESCAPE '\\' OR c.label LIKE :pattern ESCAPE '\\'
+                                          OR c.long_name LIKE :pattern ESCAPE '\\' OR c.units LIKE :pattern ESCAPE '\\')
+            ORDER BY upper(c.name) != upper(:text), c.logical_file, c.frame, c.rowid
+            LIMIT :limit
+            """,
+            {'digest': digest, 'pattern': pattern, 'text': text, 'limit': limit})
+
+    def _delete(self, digest):
+        for table in ('files', 'logical_files', 'origins', 'frames', 'channels'):
+            self._connection.execute(f'DELETE FROM {table} WHERE digest = ?', (digest,))
+
+    def _prune(self):
+        # Called with the lock held. Removes the least recently used files beyond max_files.
+        stale = self._connection.execute('SELECT digest FROM files ORDER BY used_at DESC LIMIT -1 OFFSET ?',
+                                         (self.max_files,)).fetchall()
+        for (digest,) in stale:
+            self._delete(digest)
+
+    def _insert(self, rows):
+        for table, table_rows in rows.items():
+            if table_rows:
+                placeholders = ', '.join('?' * len(table_rows[0]))
+                self._connection.executemany(f'INSERT INTO {table} VALUES ({placeholders})', table_rows)
+
+    def _query(self, sql, parameters=()):
+        with self._lock:
+            cursor = self._connection.execute(sql, parameters)
+            names = [column[0] for column in cursor.description]
+            return [dict(zip(names, row)) for row in cursor.fetchall()]
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+DEFAULT_ABSENT_VALUE = -999.25
+ABSENT_VALUE_NAMES = ('ABSENT-VALUE', 'ABSENT_VALUE', 'ABSV', 'NULL', 'NULL-VALUE')
+
+
+def _scalar(value):
+    values = np.ravel(value) if value is not None else ()
+    if len(values) == 0:
+        return None
+    try:
+        return float(values[0])
+    except (TypeError, ValueError):
+        return None
+
+
+def file_absent_values(logical_file):
+    """
+    Returns the absent values declared as Parameters of a Logical File, keyed by origin.
+    """
+    absent = {}
+    for parameter in getattr(logical_file, 'parameters', None) or []:
+        if parameter.name.upper() in ABSENT_VALUE_NAMES:
+            value = _scalar(parameter.values)
+            if value is not None:
+                absent[parameter.origin] = value
+    return absent
+
+
+def channel_absent_values(channel, file_absent=None):
+    """
+    Returns the absent values that apply to a channel: the -999.25 default, any absent value stored
+    as a non-standard attribute of the channel, and the one declared for the channel's origin.
+    """
+    absent = {DEFAULT_ABSENT_VALUE}
+    stash = getattr(channel, 'stash', None) or {}
+    for name, value in stash.items():
+        if name.upper() in ABSENT_VALUE_NAMES and _scalar(value) is not None:
+            absent.add(_scalar(value))
+    if file_absent and channel is not None and channel.origin in file_absent:
+        absent.add(file_absent[channel.origin])
+    return tuple(sorted(absent))
+
+
+def normalize(values, absent_values=(DEFAULT_ABSENT_VALUE,)):
+    """
+    Replaces absent values by missing values without changing the channel dtype.
+    Float channels are NaN-masked in place (float32 stays float32), so the only allocation is a boolean mask.
+    Integer channels become pandas nullable integer arrays instead of being upcast to float64.
+    """
+    if values.dtype.kind not in 'fiu':
+        return values
+
+    mask = values == absent_values[0]
+    for absent in absent_values[1:]:
+        mask |= values == absent
+
+    if values.dtype.kind == 'f':
+        values[mask] = np.nan
+        return values
+    return pd.arrays.IntegerArray(np.ascontiguousarray(values), mask)
@@ -0,0 +1,412 @@
+"""
+Combination of curves selected from several frames into one depth-aligned DataFrame and its
+export to LAS or a columnar format (see columnar). Problems are recorded in a Report (see report.Report) instead of being shown,
+so the same code serves the Export page and scripts.
+"""
+import numpy as np
+import pandas as pd
+
+from . import alignment, columnar, depth, las_writer, stats, units
+from .report import Report
+
+def convert_depth_values(values, from_unit, to_unit, report=None):
+    """
+    Converts depths (an array or Series) from one unit to another (see units.convert).
+    Returns a float64 array, allocating one only when a conversion applies, or the values as they
+    are when the conversion is not supported.
+    """
+    report = Report() if report is None else report
+    converted = units.convert(alignment.as_float(values), from_unit, to_unit)
+    if converted is None:
+        report.warning(f"Unit conversion not supported: from {from_unit} to {to_unit}. Keeping original unit.")
+        return values
+    return converted
+
+def convert_depth_units(df, depth_column, from_unit, to_unit, report=None):
+    """
+    Converts the depth column from one unit to another.
+    Returns a DataFrame that shares its other columns with `df` (no copy), or `df` itself when
+    no conversion applies or the conversion is not supported.
+    """
+    report = Report() if report is None else report
+    factors = units.conversion(from_unit, to_unit)
+
+    if factors is None:
+        report.warning(f"Unit conversion not supported: from {from_unit} to {to_unit}. Keeping original unit.")
+        return df
+    if factors == (1.0, 0.0):
+        return df
+
+    df_converted = df.copy(deep=False)
+    df_converted[depth_column] = units.convert(alignment.as_float(df[depth_column]), from_unit, to_unit)
+    return df_converted
+
+def convert_curves(df, curve_units, target_units, report=None):
+    """
+    Converts the curves of `target_units` {column: unit} from their unit in `curve_units` {column: unit}.
+    Returns the DataFrame, sharing the columns left unchanged with `df`, and the units of its columns.
+    Curves without a known unit, or converted to no unit ('', 'index', 'unknown'), are left unchanged
+    and reported.
+    """
+    report = Report() if report is None else report
+    column_units = dict(curve_units)
+    converted = {}
+    for column, unit in (target_units or {}).items():
+        from_unit = column_units.get(column) or ''
+        if column not in df.columns or unit == from_unit:
+            continue
+        no_unit = from_unit in units.NO_CONVERSION or unit in units.NO_CONVERSION
+        factors = None if no_unit else units.conversion(from_unit, unit)
+        if factors is None:
+            report.warning(f"{column}: unit conversion not supported from {from_unit or 'no unit'} to "
+                           f"{unit or 'no unit'}. Keeping original unit.")
+            continue
+        converted[column] = units.convert(alignment.as_float(df[column]), from_unit, unit)
+        column_units[column] = unit
+    if not converted:
+        return df, column_units
+
+    df_converted = df.copy(deep=False)
+    for column, values in converted.items():
+        df_converted[column] = values
+    return df_converted, column_units
+
+def frame_view(frame_df, depth_column, depth_unit, export_unit, interval=None):
+    """
+    Returns the samples of a frame whose depth lies in `interval` = (top, bottom), given in the export unit,
+    or the whole frame without interval. LazyFrames decode only the records of the interval
+    (see framedata.LazyFrame.interval); DataFrames are filtered.
+    """
+    if interval is None or depth_column not in frame_df.columns:
+        return frame_df
+    factor = depth.depth_factor(depth_unit, export_unit) or 1.0
+    top, bottom = sorted(bound / factor for bound in interval)
+    if hasattr(frame_df, 'interval'):
+        return frame_df.interval(depth_column, top, bottom)
+    depth_values = frame_df[depth_column]
+    return frame_df[(depth_values >= top) & (depth_values <= bottom)]
+
+def frame_views(selected_curves, logical_file_dfs, export_unit, interval=None):
+    """
+    Returns {logical_file_key: frame_view()} for the frames of the selected curves that are available,
+    using the depth channel and unit of the first curve selected from each frame.
+    """
+    views = {}
+    for curve_info in selected_curves:
+        key = curve_info['logical_file_key']
+        if key not in views and key in logical_file_dfs:
+            views[key] = frame_view(logical_file_dfs[key], curve_info['depth_column'], curve_info['depth_unit'],
+                                    export_unit, interval)
+    return views
+
+def depth_range(selected_curves, logical_file_dfs, export_unit):
+    """
+    Returns the (top, bottom) depths covered by the frames of the selected curves, in the export unit,
+    or None when no frame has a depth index.
+    """
+    bounds = []
+    for curve_info in selected_curves:
+        frame_df = logical_file_dfs.get(curve_info['logical_file_key'])
+        if frame_df is None or curve_info['depth_column'] not in frame_df.columns or not hasattr(frame_df, 'depth_index'):
+            continue
+        index = frame_df.depth_index(curve_info['depth_column'])
+        if index.top is not None:
+            factor = depth.depth_factor(curve_info['depth_unit'], export_unit) or 1.0
+            bounds.extend((index.top * factor, index.bottom * factor))
+    return (min(bounds), max(bounds)) if bounds else None
+
+def collect_frames(selected_curves, logical_file_dfs, export_unit, report=None, interval=None):
+    """
+    Groups the selected curves by frame, in order of first selection.
+    Returns {logical_file_key: (depth, {curve: values})} with depths converted to the export unit.
+    The depth channel and unit of a frame are taken from the first curve selected from it.
+    With `interval` = (top, bottom) in the export unit, only the samples in that depth range are collected.
+    """
+    report = Report() if report is None else report
+    logical_file_dfs = frame_views(selected_curves, logical_file_dfs, export_unit, interval)
+    frames_to_align = {}
+
+    for curve_info in selected_curves:
+        logical_file_key = curve_info['logical_file_key']
+        curve_name = curve_info['curve']
+        depth_column = curve_info['depth_column']
+        depth_unit = curve_info['depth_unit']
+
+        if logical_file_key not in frames_to_align:
+            if logical_file_key not in logical_file_dfs:
+                report.warning(f"Data for {logical_file_key} not found. Some curves may be missing.")
+                continue
+
+            frame_df = logical_file_dfs[logical_file_key]
+            if depth_column not in frame_df.columns:
+                report.warning(f"Depth channel {depth_column} not found in {logical_file_key}. Ignoring curves from this Logical File.")
+                continue
+
+            depth_values = convert_depth_values(frame_df[depth_column], depth_unit, export_unit, report)
+            frames_to_align[logical_file_key] = (depth_values, {})
+
+        if curve_name in logical_file_dfs[logical_file_key].columns:
+            frames_to_align[logical_file_key][1][curve_name] = logical_file_dfs[logical_file_key][curve_name]
+
+    return frames_to_align
+
+def combine_dataframes(selected_curves, logical_file_dfs, export_unit, grid='reference', step=None,
+                       method='interpolate', tolerance=None, report=None, interval=None):
+    """
+    Combines DataFrames from different Logical Files into a single DataFrame,
+    aligning the data based on depth channels and converting to the desired unit.
+    All frames are resampled onto one depth grid (see alignment.align_frames): the depth of the
+    first selected frame, the finest step among the frames, or a regular grid with `step`.
+    `interval` = (top, bottom) limits the combination to a depth range, in the export unit.
+    """
+    report = Report() if report is None else report
+    if not selected_curves:
+        return None
+
+    frames_to_align = collect_frames(selected_curves, logical_file_dfs, export_unit, report, interval)
+
+    if not frames_to_align:
+        report.error("No valid data found for the selected curves.")
+        return None
+
+    try:
+        return alignment.align_frames(list(frames_to_align.values()), grid=grid, step=step,
+                                      method=method, tolerance=tolerance)
+    except ValueError as e:
+        report.error(f"Error aligning depths: {e}")
+        return None
+
+class ExportPipeline:
+    """
+    Memoized version of combine_dataframes() and create_las_file() for the Export page.
+    The depth grid is rebuilt only when the set of source frames, their versions, the export unit
+    or the alignment options change; otherwise each resampled curve is kept, so adding or removing
+    one curve only resamples or drops that column. Serialized files (LAS or columnar) are reused
+    until the combined DataFrame changes. A depth interval selects other frame views (see frame_view), so changing it
+    rebuilds the grid.
+    """
+    def __init__(self):
+        self._signature = None
+        self._grid = None
+        self._depths = {}
+        self._resamplers = {}
+        self._columns = {}
+        self._combined_key = None
+        self._combined = None
+        self._version = 0
+        self._file_key = None
+        self._file = None
+        self._sources = {}
+
+    def combined(self, selected_curves, logical_file_dfs, export_unit, grid='reference', step=None,
+                 method='interpolate', tolerance=None, report=None, interval=None):
+        report = Report() if report is None else report
+        if not selected_curves:
+            return None
+
+        logical_file_dfs = frame_views(selected_curves, logical_file_dfs, export_unit, interval)
+        frame_sources = {}
+        for curve_info in selected_curves:
+            key = curve_info['logical_file_key']
+            if key not in frame_sources:
+                frame_df = logical_file_dfs.get(key)
+                frame_sources[key] = (curve_info['depth_column'], curve_info['depth_unit'],
+                                      getattr(frame_df, 'version', id(frame_df)))
+        signature = (export_unit, grid, step, method, tolerance, interval, tuple(frame_sources.items()))
+
+        if signature != self._signature:
+            if not self._rebuild_grid(selected_curves, logical_file_dfs, export_unit, grid, step, method, tolerance,
+                                      signature, report):
+                return None
+
+        curve_keys = [(info['logical_file_key'], info['curve']) for info in selected_curves
+                      if info['logical_file_key'] in self._depths]
+        combined_key = (self._signature, tuple(curve_keys))
+        if combined_key == self._combined_key:
+            return self._combined
+
+        for curve_key in list(self._columns):
+            if curve_key not in curve_keys:
+                del self._columns[curve_key]
+
+        missing = {}
+        for logical_file_key, curve_name in curve_keys:
+            if (logical_file_key, curve_name) not in self._columns:
+                missing.setdefault(logical_file_key, []).append(curve_name)
+        for logical_file_key, curve_names in missing.items():
+            if hasattr(logical_file_dfs[logical_file_key], 'prepare'):
+                logical_file_dfs[logical_file_key].prepare(curve_names)
+
+        for logical_file_key, curve_name in curve_keys:
+            if (logical_file_key, curve_name) in self._columns:
+                continue
+            frame_df = logical_file_dfs[logical_file_key]
+            if curve_name not in frame_df.columns:
+                continue
+            resampler = self._resamplers.get(logical_file_key)
+            if resampler is None:
+                resampler = alignment.Resampler(self._depths[logical_file_key], self._grid, method, tolerance)
+                self._resamplers[logical_file_key] = resampler
+            self._columns[(logical_file_key, curve_name)] = resampler(frame_df[curve_name])
+
+        columns = {'DEPTH': self._grid}
+        self._sources = {}
+        for position, logical_file_key in enumerate(self._depths, start=1):
+            for key, curve_name in dict.fromkeys(curve_keys):
+                if key == logical_file_key and (key, curve_name) in self._columns:
+                    label = alignment.unique_label(curve_name, position, columns)
+                    columns[label] = self._columns[(key, curve_name)]
+                    self._sources[label] = (logical_file_dfs[key], frame_sources[key][0], curve_name)
+
+        self._combined = pd.DataFrame(columns, copy=False)
+        self._combined_key = combined_key
+        self._version += 1
+        return self._combined
+
+    def descriptions(self):
+        """
+        Returns {column: description} for the curves of the last combined DataFrame, summarizing the
+        statistics of their source channel (see LazyFrame.statistics). Only the exported channels of
+        each frame are described, unless the catalog of the whole frame is already cached.
+        """
+        curves = {}
+        for label, (frame_df, depth_column, curve_name) in self._sources.items():
+            if hasattr(frame_df, 'statistics'):
+                curves.setdefault((id(frame_df), depth_column), (frame_df, []))[1].append((label, curve_name))
+        descriptions = {}
+        for (_, depth_column), (frame_df, labels) in curves.items():
+            catalog = frame_df.statistics(depth_column, columns=list(dict.fromkeys(name for _, name in labels)))
+            for label, curve_name in labels:
+                descriptions[label] = stats.curve_description(catalog.loc[curve_name])
+        return descriptions
+
+    def units(self):
+        """
+        Returns {column: unit} for the curves of the last combined DataFrame, the units of their source channel.
+        """
+        return {label: frame_df.unit(curve_name) if hasattr(frame_df, 'unit') else ''
+                for label, (frame_df, _, curve_name) in self._sources.items()}
+
+    def las_bytes(self, combined_df, depth_unit, report=None):
+        """
+        Returns the LAS file of the last combined DataFrame, serializing it only when it changed.
+        """
+        return self.file_bytes(combined_df, depth_unit, 'las', report)
+
+    def file_bytes(self, combined_df, depth_unit, file_format='las', report=None, curve_units=None):
+        """
+        Returns the contents of export_file() as bytes, or None when the file could not be written.
+        """
+        export_file = self.export_file(combined_df, depth_unit, file_format, report, curve_units)
+        return export_file.read() if export_file is not None else None
+
+    def export_file(self, combined_df, depth_unit, file_format='las', report=None, curve_units=None):
+        """
+        Returns the last combined DataFrame serialized as `file_format` ('las' or one of
+        columnar.FORMATS), with the curves of `curve_units` {column: unit} converted to that unit
+        (see convert_curves), as a rewound spooled temporary file. Only the most recent file is kept:
+        it is reused while the DataFrame, format and units stay the same, and closed as soon as
+        another one is requested.
+        """
+        key = (self._version, file_format, depth_unit, tuple(sorted((curve_units or {}).items())))
+        if key != self._file_key or self._file is None or self._file.closed:
+            self.close_file()
+            curves = [col for col in combined_df.columns if col != 'DEPTH']
+            source_units = self.units()
+            export_df, column_units = convert_curves(combined_df, source_units, curve_units, report)
+            descriptions = self.descriptions()
+            for column, description in descriptions.items():
+                if column_units.get(column) != source_units.get(column):
+                    descriptions[column] = f"{description} (in {source_units[column]})"
+            export_file = create_export_file(export_df, curves, file_format, depth_column='DEPTH',
+                                             depth_unit=depth_unit, report=report, descriptions=descriptions,
+                                             units=column_units)
+            if export_file is None:
+                return None
+            self._file_key = key
+            self._file = export_file
+        self._file.seek(0)
+        return self._file
+
+    def close_file(self):
+        """
+        Closes the file kept by export_file(), removing it from disk when it was spooled there.
+        """
+        if self._file is not None:
+            self._file.close()
+        self._file_key = None
+        self._file = None
+
+    def _rebuild_grid(self, selected_curves, logical_file_dfs, export_unit, grid, step, method, tolerance, signature,
+                      report):
+        frames_to_align = collect_frames(selected_curves, logical_file_dfs, export_unit, report)
+        if not frames_to_align:
+            report.error("No valid data found for the selected curves.")
+            return False
+
+        depths = {key: alignment.as_float(depth_values) for key, (depth_values, _) in frames_to_align.items()}
+        try:
+            depth_grid = alignment.build_grid(list(depths.values()), grid, step)
+        except ValueError as e:
+            report.error(f"Error aligning depths: {e}")
+            return False
+
+        same_grid = self._grid is not None and self._signature[:5] == signature[:5] and \
+            np.array_equal(self._grid, depth_grid)
+        previous_sources = dict(self._signature[-1]) if same_grid else {}
+        current_sources = dict(signature[-1])
+
+        for key in list(self._resamplers):
+            if previous_sources.get(key) != current_sources.get(key):
+                del self._resamplers[key]
+        for curve_key in list(self._columns):
+            if previous_sources.get(curve_key[0]) != current_sources.get(curve_key[0]):
+                del self._columns[curve_key]
+
+        self._grid = depth_grid
+        self._depths = depths
+        self._signature = signature
+        self._combined_key = None
+        return True
+
+def create_las_file(df, curves, depth_column='DEPTH', depth_unit='unknown', report=None, descriptions=None,
+                    units=None):
+    """
+    Creates a LAS file from a DataFrame, a list of selected curves, and the depth channel.
+    The depth channel is 'DEPTH' (default after combination). `units` {column: unit} and
+    `descriptions` fill the unit and description of the ~Curve lines.
+    The file is streamed in chunks to a spooled temporary file (see las_writer.write_las),
+    which is returned rewound.
+    """
+    report = Report() if report is None else report
+    if depth_column not in df.columns:
+        report.error(f"Error: Depth channel '{depth_column}' not found in the combined DataFrame.")
+        return None
+
+    columns = [depth_column] + [curve for curve in curves if curve in df.columns and curve != depth_column]
+    return las_writer.spool_las(df, columns, units={**(units or {}), depth_column: depth_unit}, depth_unit=depth_unit,
+                                descriptions=descriptions)
+
+def create_export_file(df, curves, file_format='las', depth_column='DEPTH', depth_unit='unknown', report=None,
+                       descriptions=None, units=None):
+    """
+    Creates the export file of a DataFrame in `file_format`: 'las' (see create_las_file) or one of
+    columnar.FORMATS ('parquet', 'feather', 'hdf5'). The file is returned rewound, as a spooled
+    temporary file.
+    """
+    report = Report() if report is None else report
+    if file_format == 'las':
+        return create_las_file(df, curves, depth_column, depth_unit, report, descriptions, units)
+    if file_format not in columnar.FORMATS:
+        report.error(f"Error: unknown export format '{file_format}'.")
+        return None
+    if file_format not in columnar.available_formats():
+        report.error(f"Error: the {file_format} format requires the '{columnar.FORMATS[file_format][2]}' package.")
+        return None
+    if depth_column not in df.columns:
+        report.error(f"Error: Depth channel '{depth_column}' not found in the combined DataFrame.")
+        return None
+
+    columns = [depth_column] + [curve for curve in curves if curve in df.columns and curve != depth_column]
+    return columnar.spool_table(df, columns, file_format, units={**(units or {}), depth_column: depth_unit},
+                                depth_unit=depth_unit, descriptions=descriptions)
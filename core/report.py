@@ -0,0 +1,18 @@
+class Report:
+    """
+    Warnings and errors produced by a core operation.
+    Core modules never talk to the UI: the Streamlit pages render a Report with st.warning/st.error
+    and the command line interface writes it into its summary.
+    """
+    def __init__(self):
+        self.warnings = []
+        self.errors = []
+
+    def __bool__(self):
+        return bool(self.warnings or self.errors)
+
+    def warning(self, message):
+        self.warnings.append(message)
+
+    def error(self, message):
+        self.errors.append(message)
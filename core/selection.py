@@ -0,0 +1,88 @@
+"""
+Curves selected for export from the DLIS files of a session.
+
+A session may hold several files, whose Logical Files and Frames have the same labels ("Logical File 1",
+"Frame 1"). Frames are therefore keyed by (file hash, logical file, frame) in the frame store, the figure
+cache and the export pipeline, and selected curves by (file hash, logical file, frame, channel).
+"""
+
+
+def frame_key(digest, logical_file, frame):
+    """
+    Returns the key of a frame of a file, e.g. (digest, 'Logical File 1', 'Frame 1').
+    """
+    return (digest, logical_file, frame)
+
+
+def curve_key(curve_info):
+    """
+    Returns the (file hash, logical file, frame, channel) key of a selected curve.
+    """
+    return (curve_info['digest'], curve_info['logical_file'], curve_info['frame'], curve_info['curve'])
+
+
+def curve_info(digest, file_name, logical_file, frame, curve, depth_column, depth_unit):
+    """
+    Returns the description of a selected curve, as stored in the selected_curves list of the session.
+    """
+    return {
+        'digest': digest,
+        'file': file_name,
+        'curve': curve,
+        'logical_file': logical_file,
+        'frame': frame,
+        'depth_column': depth_column,
+        'depth_unit': depth_unit,
+        'logical_file_key': frame_key(digest, logical_file, frame),
+    }
+
+
+def is_selected(selected_curves, key):
+    """
+    Returns True when the curve with this (file hash, logical file, frame, channel) key is selected.
+    """
+    return any(curve_key(info) == key for info in selected_curves)
+
+
+def select(selected_curves, info):
+    """
+    Appends a curve to the selection unless it is already selected. Returns True when it was added.
+    """
+    if is_selected(selected_curves, curve_key(info)):
+        return False
+    selected_curves.append(info)
+    return True
+
+
+def frame_label(key, file_names=None):
+    """
+    Returns a readable label of a frame key: "well.dlis - Logical File 1 - Frame 1", or the key itself
+    when it is not a frame key.
+    """
+    if not isinstance(key, tuple) or len(key) != 3:
+        return str(key)
+    digest, logical_file, frame = key
+    file_name = (file_names or {}).get(digest, digest[:12])
+    return f"{file_name} - {logical_file} - {frame}"
+
+
+def files(selected_curves):
+    """
+    Returns the names of the files of the selected curves, in order of first selection.
+    """
+    return list(dict.fromkeys(info.get('file') or info['digest'][:12] for info in selected_curves))
+
+
+def drop_files(selected_curves, frame_store, digests):
+    """
+    Removes the curves and the stored frames of the files with these hashes, removed from the session.
+    Returns the number of curves removed.
+    """
+    kept = [info for info in selected_curves if info['digest'] not in digests]
+    removed = len(selected_curves) - len(kept)
+    selected_curves[:] = kept
+    if frame_store is not None:
+        for key in list(frame_store.keys()):
+            if isinstance(key, tuple) and key[0] in digests:
+                del frame_store[key]
+    return removed
@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+
+from .alignment import as_float
+
+CHUNK_ROWS = 32768
+SAMPLE_VALUES = 8_000_000
+PERCENTILES = (10, 50, 90)
+
+COLUMNS = (['Channel', 'Unit', 'Count', 'Null fraction', 'Min', 'Max', 'Mean', 'Std'] +
+           [f'P{percentile}' for percentile in PERCENTILES] + ['Top', 'Bottom'])
+
+
+def frame_statistics(frame_df, depth_column=None, chunk_rows=CHUNK_ROWS, sample_values=SAMPLE_VALUES,
+                     columns=None):
+    """
+    Returns a statistics catalog of every 1-D channel of a frame (or of `columns` only), one row per
+    channel indexed by label:
+    count of valid samples, null fraction, min, max, mean, std, percentiles, and the depth range
+    (Top, Bottom) where the channel has valid samples (sample positions without `depth_column`).
+    All channels are reduced together, `chunk_rows` samples at a time, in a single pass. Means and
+    variances of the chunks are merged with Chan's parallel formula. Percentiles are computed on an
+    evenly strided sample of at most `sample_values` values over all channels (exact for smaller frames).
+    """
+    labels = [label for label in (frame_df.columns if columns is None else columns) if label != depth_column]
+    channels = len(labels)
+    count = len(frame_df)
+    stride = max(1, -(-count * channels // sample_values))
+
+    valid_count = np.zeros(channels)
+    mean = np.zeros(channels)
+    m2 = np.zeros(channels)
+    low = np.full(channels, np.inf)
+    high = np.full(channels, -np.inf)
+    top = np.full(channels, np.inf)
+    bottom = np.full(channels, -np.inf)
+    samples = []
+
+    columns = [frame_df[label] for label in labels]
+    depth_values = as_float(frame_df[depth_column]) if depth_column is not None else None
+
+    for start in range(0, count, chunk_rows):
+        stop = min(start + chunk_rows, count)
+        block = np.empty((channels, stop - start))
+        for position, column in enumerate(columns):
+            block[position] = as_float(column.iloc[start:stop])
+        depth_chunk = depth_values[start:stop] if depth_values is not None else np.arange(start, stop, dtype='float64')
+
+        valid = ~np.isnan(block)
+        chunk_count = valid.sum(axis=1)
+        present = chunk_count > 0
+        if present.any():
+            with np.errstate(invalid='ignore', divide='ignore'):
+                chunk_mean = np.add.reduce(block, axis=1, where=valid, initial=0.0) / chunk_count
+                deviation = block - chunk_mean[:, None]
+                np.square(deviation, out=deviation)
+                chunk_m2 = np.add.reduce(deviation, axis=1, where=valid, initial=0.0)
+                total = valid_count + chunk_count
+                delta = chunk_mean - mean
+                mean = np.where(present, mean + delta * chunk_count / total, mean)
+                m2 = np.where(present, m2 + chunk_m2 + delta ** 2 * valid_count * chunk_count / total, m2)
+            valid_count = total
+
+            np.minimum(low, np.minimum.reduce(block, axis=1, where=valid, initial=np.inf), out=low)
+            np.maximum(high, np.maximum.reduce(block, axis=1, where=valid, initial=-np.inf), out=high)
+            located = valid & ~np.isnan(depth_chunk)
+            depths = np.broadcast_to(depth_chunk, block.shape)
+            np.minimum(top, np.minimum.reduce(depths, axis=1, where=located, initial=np.inf), out=top)
+            np.maximum(bottom, np.maximum.reduce(depths, axis=1, where=located, initial=-np.inf), out=bottom)
+
+        first = -start % stride
+        samples.append(block[:, first::stride])
+
+    empty = valid_count == 0
+    low[empty] = high[empty] = mean[empty] = np.nan
+    with np.errstate(invalid='ignore', divide='ignore'):
+        std = np.sqrt(m2 / (valid_count - 1))
+    std[valid_count < 2] = np.nan
+
+    catalog = pd.DataFrame({
+        'Channel': labels,
+        'Unit': [frame_df.unit(label) if hasattr(frame_df, 'unit') else '' for label in labels],
+        'Count': valid_count.astype('int64'),
+        'Null fraction': 1 - valid_count / count if count else np.full(channels, np.nan),
+        'Min': low,
+        'Max': high,
+        'Mean': mean,
+        'Std': std,
+    }, index=pd.Index(labels))
+
+    sample = np.concatenate(samples, axis=1) if samples else np.empty((channels, 0))
+    if sample.shape[1] and channels:
+        quantiles = _nanpercentile(sample, PERCENTILES)
+    else:
+        quantiles = np.full((len(PERCENTILES), channels), np.nan)
+    for percentile, values in zip(PERCENTILES, quantiles):
+        catalog[f'P{percentile}'] = values
+
+    located = np.isfinite(top)
+    catalog['Top'] = np.where(located, top, np.nan)
+    catalog['Bottom'] = np.where(located, bottom, np.nan)
+    return catalog[COLUMNS]
+
+
+def _nanpercentile(sample, percentiles):
+    """
+    np.nanpercentile over the rows of `sample`, without the warning for rows with no valid value.
+    """
+    result = np.full((len(percentiles), len(sample)), np.nan)
+    present = ~np.isnan(sample).all(axis=1)
+    if present.any():
+        result[:, present] = np.nanpercentile(sample[present], percentiles, axis=1)
+    return result
+
+
+def curve_description(row):
+    """
+    Returns a short summary of a catalog row for the description field of a LAS ~Curve line.
+    """
+    if not row['Count']:
+        return 'no valid samples'
+    return (f"min {row['Min']:.6g}, max {row['Max']:.6g}, mean {row['Mean']:.6g}, "
+            f"nulls {row['Null fraction']:.1%}")
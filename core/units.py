@@ -0,0 +1,144 @@
+"""
+Table-driven conversion of DLIS (RP66) unit symbols.
+
+Every known symbol maps to a dimension and to the (scale, offset) that converts its values to the
+base unit of that dimension: base = value * scale + offset. Other spellings found in files map to
+these symbols regardless of case (see ALIASES), and RP66 unit symbols may carry a numeric prefix ('0.1 in', '0.5 ms')
+that multiplies the scale. The conversion between two symbols is computed once per pair and applied
+with vectorized NumPy arithmetic, in place when an output array is given.
+"""
+import functools
+import re
+
+import numpy as np
+
+NO_CONVERSION = ('', 'index', 'unknown')
+
+FOOT = 0.3048
+INCH = 0.0254
+POUND = 0.45359237
+GALLON = 0.003785411784
+
+UNITS = {
+    'length': {'m': 1.0, 'cm': 0.01, 'mm': 0.001, 'km': 1000.0, 'ft': FOOT, 'in': INCH},
+    'time': {'s': 1.0, 'ms': 1e-3, 'us': 1e-6, 'ns': 1e-9, 'min': 60.0, 'h': 3600.0},
+    'slowness': {'us/ft': 1e-6 / FOOT, 'us/m': 1e-6, 'ms/m': 1e-3, 's/m': 1.0},
+    'velocity': {'m/s': 1.0, 'ft/s': FOOT, 'km/s': 1000.0, 'm/h': 1 / 3600.0, 'ft/h': FOOT / 3600.0},
+    'density': {'g/cm3': 1000.0, 'kg/m3': 1.0, 'lbm/ft3': POUND / FOOT ** 3, 'lbm/gal': POUND / GALLON},
+    'pressure': {'psi': 6894.757293168, 'kPa': 1e3, 'MPa': 1e6, 'Pa': 1.0, 'bar': 1e5},
+    'temperature': {'degC': (1.0, 273.15), 'degF': (5.0 / 9.0, 273.15 - 32.0 * 5.0 / 9.0), 'K': (1.0, 0.0)},
+    'angle': {'deg': np.pi / 180.0, 'rad': 1.0},
+    'resistivity': {'ohm.m': 1.0, 'mohm.m': 1e-3},
+    'conductivity': {'mS/m': 1e-3, 'S/m': 1.0},
+    'fraction': {'v/v': 1.0, '%': 0.01, 'pu': 0.01},
+}
+
+ALIASES = {
+    'meter': 'm', 'meters': 'm', 'metre': 'm', 'metres': 'm',
+    'feet': 'ft', 'foot': 'ft', 'inch': 'in', 'inches': 'in',
+    'sec': 's', 'hr': 'h', 'us/f': 'us/ft', 'ft/hr': 'ft/h', 'm/hr': 'm/h',
+    'g/cc': 'g/cm3', 'degk': 'K', 'dega': 'deg',
+    'ohmm': 'ohm.m', 'ohm-m': 'ohm.m', 'ohm m': 'ohm.m', 'mho/m': 'S/m', 'mmho/m': 'mS/m',
+    'm3/m3': 'v/v', 'frac': 'v/v', 'dec': 'v/v', 'p.u.': 'pu',
+    'm': 'm', 'cm': 'cm', 'mm': 'mm', 'km': 'km', 'ft': 'ft', 'in': 'in',
+    'degc': 'degC', 'degf': 'degF', 'g/cm3': 'g/cm3', 'us/ft': 'us/ft', 'ohm.m': 'ohm.m', 'psi': 'psi',
+}
+
+_PREFIX = re.compile(r'^([0-9]*\.?[0-9]+(?:[eE][-+]?[0-9]+)?)\s+(.+)$')
+
+
+def _symbols():
+    symbols = {}
+    for dimension, table in UNITS.items():
+        for symbol, value in table.items():
+            scale, offset = value if isinstance(value, tuple) else (value, 0.0)
+            symbols[symbol] = (dimension, scale, offset)
+    for alias, symbol in ALIASES.items():
+        symbols.setdefault(alias, symbols[symbol])
+    return symbols
+
+
+SYMBOLS = _symbols()
+
+
+@functools.lru_cache(maxsize=1024)
+def parse(unit):
+    """
+    Returns (dimension, scale, offset) of a unit symbol, with its numeric prefix applied
+    ('0.1 in' is 0.00254 m), or None for an unknown symbol. Symbols are case-sensitive ('mS' is not
+    'ms'); only the spellings of ALIASES are also matched in any case ('FT', 'G/CC').
+    """
+    if unit is None:
+        return None
+    unit = str(unit).strip()
+    prefix = 1.0
+    match = _PREFIX.match(unit)
+    if match:
+        prefix = float(match.group(1))
+        unit = match.group(2)
+    found = SYMBOLS.get(unit)
+    if found is None and unit.lower() in ALIASES:
+        found = SYMBOLS[ALIASES[unit.lower()]]
+    if found is None:
+        return None
+    dimension, scale, offset = found
+    if prefix != 1.0 and offset:
+        return None
+    return dimension, scale * prefix, offset
+
+
+@functools.lru_cache(maxsize=1024)
+def conversion(from_unit, to_unit):
+    """
+    Returns (scale, offset) such that values in `to_unit` = values in `from_unit` * scale + offset:
+    (1.0, 0.0) when no conversion applies (same symbol, or a sample index or unknown unit on either
+    side), None when a unit is not in the table or the units measure different quantities.
+    """
+    if from_unit == to_unit or from_unit in NO_CONVERSION or to_unit in NO_CONVERSION:
+        return 1.0, 0.0
+    source = parse(from_unit)
+    target = parse(to_unit)
+    if source is None or target is None or source[0] != target[0]:
+        return None
+    scale = source[1] / target[1]
+    offset = (source[2] - target[2]) / target[1]
+    if abs(scale - 1.0) < 1e-12:
+        scale = 1.0
+    if abs(offset) < 1e-9:
+        offset = 0.0
+    return scale, offset
+
+
+def compatible(unit):
+    """
+    Returns the symbols of the table that `unit` converts to (its own spelling first),
+    or [] for a unit that is not in the table.
+    """
+    parsed = parse(unit)
+    if parsed is None:
+        return []
+    return [unit] + [symbol for symbol in UNITS[parsed[0]] if conversion(unit, symbol) != (1.0, 0.0)]
+
+
+def convert(values, from_unit, to_unit, out=None):
+    """
+    Converts an array of values from one unit to another, or returns None when the conversion is
+    not supported (see conversion). The result is float64 and written to `out` when given, which may
+    be `values` itself for an in-place conversion; otherwise one array is allocated, and none when
+    float64 values need no conversion.
+    """
+    factors = conversion(from_unit, to_unit)
+    if factors is None:
+        return None
+    scale, offset = factors
+    values = np.asarray(values)
+    if scale == 1.0 and offset == 0.0:
+        if out is None:
+            return values.astype('float64', copy=False)
+        if out is not values:
+            out[...] = values
+        return out
+    out = np.multiply(values, scale, out=out, dtype='float64')
+    if offset:
+        np.add(out, offset, out=out)
+    return out
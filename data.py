@@ -1,22 +1,93 @@
 import streamlit as st
-import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 
-def data(dlis_file):
+from core import arrays, depth, framedata, framestore, instrumentation, selection
+import plots
+
+MAX_TRACKS = 6
+
+def memory_panel(frame_store, file_names=None):
+    """
+    Displays the memory used by the frames stored in this session, after enforcing the store budget
+    (columns materialized during this rerun are only accounted for at this point).
+    `file_names` {digest: name} names the file of each frame.
+    """
+    frame_store.enforce()
+    with st.sidebar.expander('Memory usage', expanded=False):
+        st.write(f"Resident: {frame_store.resident_bytes / 1024 ** 2:.1f} MB "
+                 f"of {frame_store.max_bytes / 1024 ** 2:.0f} MB")
+        st.write(f"Spilled to disk: {frame_store.spilled_bytes / 1024 ** 2:.1f} MB")
+        usage = frame_store.usage(lambda key: selection.frame_label(key, file_names))
+        if usage:
+            st.dataframe(usage, hide_index=True)
+
+def array_npz(frame_df, depth_column, label):
+    """
+    Returns a .npz archive with the depth channel and one multi-dimensional channel of a frame,
+    copied from the memory-mapped file a chunk at a time to a spooled temporary file (see arrays.spool_npz),
+    which is returned rewound for the download.
+    """
+    return arrays.spool_npz({depth_column: frame_df[depth_column].to_numpy(), label: frame_df.array(label).data})
+
+def log_view(frame_key, frame_df, curve_names, default_curve, depth_column, depth_unit, top, bottom):
+    """
+    Multi-track view of the curves of a frame between `top` and `bottom`, drawn in the browser
+    (see plots.log_chart). Only a decimated copy of the depth window in view is sent to it; a depth
+    range selected on the chart becomes the new window and is sent again at a finer resolution.
+    """
+    track_count = st.number_input('Tracks', min_value=1, max_value=MAX_TRACKS, value=2, key=f"tracks_{frame_key}")
+    tracks = []
+    for number, column in enumerate(st.columns(track_count)):
+        curves = column.multiselect(f"Track {number + 1}", curve_names,
+                                    default=[default_curve] if number == 0 and default_curve else [],
+                                    key=f"track_{number}_{frame_key}")
+        if curves:
+            tracks.append(curves)
+    if not tracks:
+        st.info("Choose the curves of each track.")
+        return
+
+    windows = st.session_state.setdefault('log_view_windows', {})
+    window_key = (frame_key, depth_column, top, bottom)
+    window = windows.get(window_key, (top, bottom))
+    curves = list(dict.fromkeys(curve for track in tracks for curve in track))
+    table = st.session_state.figure_cache.tracks(frame_key, frame_df, curves, depth_column, window)
+    chart = plots.log_chart(table, tracks, {curve: frame_df.unit(curve) for curve in curves}, depth_column,
+                            depth_unit, invert_depth=depth_column != 'INDEX', domain=window)
+    event = st.altair_chart(chart, on_select='rerun', selection_mode=plots.WINDOW_SELECTION,
+                            key=f"log_view_{window_key}_{window}")
+
+    selected = event.selection.get(plots.WINDOW_SELECTION, {}).get('depth')
+    if selected:
+        selected_window = (max(min(selected), top), min(max(selected), bottom))
+        if selected_window[0] < selected_window[1] and selected_window != window:
+            windows[window_key] = selected_window
+            st.rerun()
+
+    st.caption(f"{window[0]:.2f} to {window[1]:.2f} {depth_unit}: {len(table)} points drawn. "
+               "Drag over a track to show a depth range in more detail; the mouse wheel zooms without reloading.")
+    if window != (top, bottom) and st.button("Show the whole interval", key=f"log_view_reset_{window_key}"):
+        windows.pop(window_key, None)
+        st.rerun()
+
+def data(dlis_file, digest, file_name):
     st.header('Data Information and Visualization')
+    st.caption(f"File: {file_name}")
 
     if 'selected_curves' not in st.session_state:
         st.session_state.selected_curves = []
     
     if 'logical_file_dfs' not in st.session_state:
-        st.session_state.logical_file_dfs = {}
-
-    DEPTH_MNEMONICS = ['TDEP', 'DEPT', 'DEPTH', 'MD', 'TVD']
+        st.session_state.logical_file_dfs = framestore.FrameStore()
+    
+    if 'figure_cache' not in st.session_state:
+        st.session_state.figure_cache = plots.FigureCache()
 
     logical_files = list(dlis_file)
     
     if logical_files:
+        if not getattr(dlis_file, 'done', True):
+            st.caption(f"The file is still being indexed: {len(logical_files)} Logical File(s) available so far.")
         st.subheader("1 - Select a Logical File")
         logical_files_dict = {f"Logical File {i+1}": lf for i, lf in enumerate(logical_files)}
         logical_file_selection = st.selectbox('Logical Files', list(logical_files_dict.keys()))
@@ -36,35 +107,23 @@ def data(dlis_file):
                         selected_frame_index = int(frame_selection.split(' ')[1]) - 1
                         selected_frame = frames[selected_frame_index]
                         
-                        data_dict = {}
-                        
-                        for channel in selected_frame.channels:
-                            try:
-                                values = channel.curves()
-                                if np.ndim(values) == 1 and values is not None:
-                                    values = np.where(values == -999.25, np.nan, values)
-                                    data_dict[channel.name] = values
-                                else:
-                                    st.write(f"***{channel.name} - no data or multiple dimensions (ignored)***")
-                            except Exception as e:
-                                st.write(f"Error loading channel {channel.name}: {e}")
+                        logical_file_key = selection.frame_key(digest, logical_file_selection, frame_selection)
+                        df = st.session_state.logical_file_dfs.get(logical_file_key)
                         
-                        df = pd.DataFrame(data_dict)
+                        if df is None or df.frame is not selected_frame:
+                            df = framedata.LazyFrame(selected_frame)
                         
-                        logical_file_key = f"{logical_file_selection} - {frame_selection}"
                         st.session_state.logical_file_dfs[logical_file_key] = df
-                        st.session_state.df = df
                         
-                        if not df.empty:
-                            depth_column = None
-                            for col in df.columns:
-                                if col in DEPTH_MNEMONICS:
-                                    if df[col].is_monotonic_increasing or df[col].is_monotonic_decreasing:
-                                        depth_column = col
-                                        break
+                        if len(df.columns):
+                            try:
+                                depth_column = depth.detect_depth_column(df)
+                            except Exception as e:
+                                st.write(f"Error loading {frame_selection}: {e}")
+                                return
                             
                             st.subheader("3 - Select Depth Channel")
-                            depth_options = ['Auto (index)'] + list(df.columns)
+                            depth_options = ['Auto (index)'] + [col for col in df.columns if col != 'INDEX']
                             selected_depth = st.selectbox(
                                 'Select the depth channel (used as Y-axis)',
                                 depth_options,
@@ -72,43 +131,74 @@ def data(dlis_file):
                                 help="Choose the channel representing depth. Select 'Auto (index)' to use sample numbers."
                             )
                             
-                            if selected_depth == 'Auto (index)':
-                                df['INDEX'] = range(len(df))
-                                depth_column = 'INDEX'
-                                depth_unit = 'index'
-                                st.warning("No depth channel selected. Using sample index as Y-axis.")
-                            else:
-                                depth_column = selected_depth
-                                depth_channel = next((ch for ch in selected_frame.channels if ch.name == depth_column), None)
-                                depth_unit = depth_channel.units if depth_channel and hasattr(depth_channel, 'units') else 'unknown'
-                                if not depth_unit:
-                                    depth_unit = 'unknown'
-                                st.write(f"Depth channel unit: {depth_unit}")
+                            try:
+                                if selected_depth == 'Auto (index)':
+                                    if 'INDEX' not in df.columns:
+                                        df['INDEX'] = np.arange(len(df))
+                                    depth_column = 'INDEX'
+                                    depth_unit = 'index'
+                                    st.warning("No depth channel selected. Using sample index as Y-axis.")
+                                else:
+                                    depth_column = selected_depth
+                                    depth_unit = df.unit(depth_column) or 'unknown'
+                                    st.write(f"Depth channel unit: {depth_unit}")
+                                with instrumentation.stage('depth index'):
+                                    depth_index = df.depth_index(depth_column)
+                            except Exception as e:
+                                st.write(f"Error loading {frame_selection}: {e}")
+                                return
 
                             st.session_state.depth_column = depth_column
+                            
+                            if depth_index.top is None:
+                                st.write("No channels with valid data found in this Frame.")
+                                return
+                            
+                            top_col, bottom_col = st.columns(2)
+                            top = top_col.number_input(
+                                f"Top depth ({depth_unit})", value=depth_index.top,
+                                min_value=depth_index.top, max_value=depth_index.bottom,
+                                key=f"top_{logical_file_key}_{depth_column}_{depth_index.top}_{depth_index.bottom}",
+                                help="Only the samples between the top and bottom depths are read, plotted and summarized."
+                            )
+                            bottom = bottom_col.number_input(
+                                f"Bottom depth ({depth_unit})", value=depth_index.bottom,
+                                min_value=depth_index.top, max_value=depth_index.bottom,
+                                key=f"bottom_{logical_file_key}_{depth_column}_{depth_index.top}_{depth_index.bottom}"
+                            )
+                            if top > bottom:
+                                st.warning("The top depth is below the bottom depth.")
+                                return
+                            
+                            view = df.interval(depth_column, top, bottom)
+                            st.caption(f"{frame_selection}: {len(view)} samples. Channels are read from the file "
+                                       f"when they are plotted or summarized.")
+                            
+                            statistics = st.expander("Statistics of all channels", expanded=False,
+                                                     key=f"statistics_{logical_file_key}_{depth_column}",
+                                                     on_change="rerun")
+                            if statistics.open:
+                                with statistics:
+                                    try:
+                                        with instrumentation.stage('statistics'):
+                                            catalog = view.statistics(depth_column)
+                                    except Exception as e:
+                                        st.write(f"Error loading {frame_selection}: {e}")
+                                        return
+                                    st.caption(f"{frame_selection} read in {view.decode_seconds:.2f} s. Valid depth "
+                                               f"range (Top, Bottom) in {depth_unit}. Click a column header to sort.")
+                                    st.dataframe(catalog, hide_index=True)
 
                             st.subheader("4 - Select Channel and press button to save")
-                            curve_names = [col for col in df.columns if col != depth_column]
+                            curve_names = [col for col in df.columns if col not in (depth_column, 'INDEX')]
                             curve_selection = st.selectbox('Channels', curve_names)
                             
                             if curve_selection:
-                                curve_already_selected = any(
-                                    curve_info['curve'] == curve_selection and
-                                    curve_info['logical_file'] == logical_file_selection and
-                                    curve_info['frame'] == frame_selection
-                                    for curve_info in st.session_state.selected_curves
-                                )
-                                
                                 if st.button(f"Press to select {curve_selection}"):
-                                    if not curve_already_selected:
-                                        st.session_state.selected_curves.append({
-                                            'curve': curve_selection,
-                                            'logical_file': logical_file_selection,
-                                            'frame': frame_selection,
-                                            'depth_column': depth_column,
-                                            'depth_unit': depth_unit,
-                                            'logical_file_key': logical_file_key
-                                        })
+                                    curve_info = selection.curve_info(digest, file_name, logical_file_selection,
+                                                                      frame_selection, curve_selection, depth_column,
+                                                                      depth_unit)
+                                    if selection.select(st.session_state.selected_curves, curve_info):
                                         st.success(f"Channel {curve_selection} selected successfully!")
                                     else:
                                         st.warning(f"Channel {curve_selection} was already selected from {logical_file_selection}, {frame_selection}!")
@@ -121,26 +211,40 @@ def data(dlis_file):
                                     with col1:
                                         with st.container():
                                             st.subheader(f'Channel {curve_selection}')
-                                            fig, ax = plt.subplots(figsize=(2, 5))
-                                            ax.plot(df[curve_selection], df[depth_column], label=curve_selection, linewidth=0.5, color='blue')
-                                            
-                                            channel = next((ch for ch in selected_frame.channels if ch.name == curve_selection), None)
-                                            unit = channel.units if channel and hasattr(channel, 'units') else ''
-                                            depth_unit_display = depth_unit if depth_unit != 'index' else ''
-                                            
-                                            ax.set_xlabel(f'{curve_selection} ({unit})', fontsize=5)
-                                            ax.set_ylabel(f'Depth ({depth_column}) ({depth_unit_display})', fontsize=4)
-                                            ax.set_title(f'{curve_selection}', fontsize=6)
-                                            ax.grid(True)
-                                            ax.tick_params(axis='both', which='major', labelsize=4)
-                                            if depth_column != 'INDEX':
-                                                ax.invert_yaxis()
-                                            st.pyplot(fig, use_container_width=False)
+                                            image = st.session_state.figure_cache.curve(
+                                                logical_file_key, view, curve_selection, depth_column, depth_unit)
+                                            st.image(image, width=plots.FIGURE_SIZE[0] * 100)
                                     
                                     with col2:
                                         st.subheader(f'Channel {curve_selection} Statistics')
-                                        stats = df[curve_selection].describe()
-                                        st.table(stats)
+                                        stats = view.statistics(depth_column, columns=[curve_selection])
+                                        stats = stats.loc[curve_selection].drop(['Channel', 'Unit'])
+                                        st.table(stats.rename(str(curve_selection)))
+                            
+                            st.subheader("5 - Multi-track Log View")
+                            log_view(logical_file_key, df, curve_names, curve_selection, depth_column, depth_unit,
+                                     top, bottom)
+                            
+                            if view.array_columns:
+                                st.subheader("6 - Multi-dimensional Channels")
+                                array_selection = st.selectbox('Images, waveforms and spectra', view.array_columns)
+                                try:
+                                    image = st.session_state.figure_cache.image(
+                                        logical_file_key, view, array_selection, depth_column, depth_unit)
+                                    array = view.array(array_selection)
+                                except Exception as e:
+                                    st.write(f"Error loading {array_selection}: {e}")
+                                    return
+                                
+                                st.caption(f"{array_selection}: {' x '.join(str(size) for size in array.shape)} "
+                                           f"({array.nbytes / 1024 ** 2:.1f} MB memory-mapped on disk)")
+                                st.image(image, width=plots.FIGURE_SIZE[0] * 100)
+                                st.download_button(
+                                    label=f"Download {array_selection} (NPZ)",
+                                    data=lambda: array_npz(view, depth_column, array_selection),
+                                    file_name=f"{array_selection}.npz",
+                                    mime="application/octet-stream"
+                                )
                         else:
                             st.write("No channels with valid data found in this Frame.")
                 else:
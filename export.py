@@ -1,120 +1,41 @@
 import streamlit as st
-import pandas as pd
-import lasio
-import io
 import os
 
-def convert_depth_units(df, depth_column, from_unit, to_unit):
-    """
-    Converts the depth column from one unit to another.
-    Returns the DataFrame with the converted depth column.
-    """
-    if from_unit == to_unit or from_unit in ['index', 'unknown'] or to_unit in ['index', 'unknown']:
-        return df
-    
-    METERS_TO_FEET = 3.28084
-    FEET_TO_METERS = 1 / METERS_TO_FEET
-    
-    df_converted = df.copy()
-    
-    if from_unit.lower() in ['m', 'meters', 'metres'] and to_unit.lower() in ['ft', 'feet']:
-        df_converted[depth_column] = df_converted[depth_column] * METERS_TO_FEET
-    elif from_unit.lower() in ['ft', 'feet'] and to_unit.lower() in ['m', 'meters', 'metres']:
-        df_converted[depth_column] = df_converted[depth_column] * FEET_TO_METERS
-    else:
-        st.warning(f"Unit conversion not supported: from {from_unit} to {to_unit}. Keeping original unit.")
-    
-    return df_converted
+from core import columnar, instrumentation, selection, units
+from core.pipeline import ExportPipeline, depth_range
+from core.report import Report
 
-def combine_dataframes(selected_curves, logical_file_dfs, export_unit):
-    """
-    Combines DataFrames from different Logical Files into a single DataFrame,
-    aligning the data based on depth channels and converting to the desired unit.
-    """
-    if not selected_curves:
-        return None
-    
-    dfs_to_combine = {}
-    depth_columns = {}
-    depth_units = {}
-    
-    for curve_info in selected_curves:
-        logical_file_key = curve_info['logical_file_key']
-        curve_name = curve_info['curve']
-        depth_column = curve_info['depth_column']
-        depth_unit = curve_info['depth_unit']
-        
-        if logical_file_key not in dfs_to_combine:
-            if logical_file_key in logical_file_dfs:
-                df = logical_file_dfs[logical_file_key][[depth_column, curve_name]].copy()
-                df = convert_depth_units(df, depth_column, depth_unit, export_unit)
-                dfs_to_combine[logical_file_key] = df
-                depth_columns[logical_file_key] = depth_column
-                depth_units[logical_file_key] = export_unit
-            else:
-                st.warning(f"Data for {logical_file_key} not found. Some curves may be missing.")
-                continue
-        else:
-            if curve_name in logical_file_dfs[logical_file_key].columns:
-                dfs_to_combine[logical_file_key][curve_name] = logical_file_dfs[logical_file_key][curve_name]
-    
-    if not dfs_to_combine:
-        st.error("No valid data found for the selected curves.")
-        return None
-    
-    reference_key = list(dfs_to_combine.keys())[0]
-    reference_df = dfs_to_combine[reference_key]
-    reference_depth = depth_columns[reference_key]
-    
-    combined_df = reference_df.rename(columns={reference_depth: 'DEPTH'})
-    
-    for key, df in dfs_to_combine.items():
-        if key == reference_key:
-            continue
-        
-        depth_col = depth_columns[key]
-        if depth_col not in df.columns:
-            st.warning(f"Depth channel {depth_col} not found in {key}. Ignoring curves from this Logical File.")
-            continue
-        
-        df = df.rename(columns={depth_col: 'DEPTH'})
-        
-        combined_df = pd.merge(combined_df, df, on='DEPTH', how='outer')
-    
-    return combined_df
+GRID_OPTIONS = {
+    'Depth of the first selected frame': 'reference',
+    'Finest sampling step among frames': 'finest',
+    'Custom step': 'step',
+}
 
-def create_las_file(df, curves, depth_column='DEPTH', depth_unit='unknown'):
+METHOD_OPTIONS = {
+    'Linear interpolation': 'interpolate',
+    'Nearest sample within tolerance': 'nearest',
+}
+
+FORMAT_OPTIONS = {
+    'LAS 2.0': ('las', '.las'),
+    'Parquet': ('parquet', columnar.extension('parquet')),
+    'Feather (Arrow IPC)': ('feather', columnar.extension('feather')),
+    'HDF5': ('hdf5', columnar.extension('hdf5')),
+}
+
+def show_report(report):
     """
-    Creates a LAS file in memory from a DataFrame, a list of selected curves, and the depth channel.
-    The depth channel is 'DEPTH' (default after combination).
-    Returns the LAS file content as a BytesIO object.
+    Displays the warnings and errors collected by the core pipeline.
     """
-    las = lasio.LASFile()
-    las.well.WELL.value = "WELL"
-    
-    las.other = f"Depth unit: {depth_unit}\nGenerated by DLIS Data Explorer"
-    
-    if depth_column in df.columns:
-        las.append_curve_item(lasio.CurveItem(mnemonic=depth_column, unit=depth_unit, data=df[depth_column]))
-    else:
-        st.error(f"Error: Depth channel '{depth_column}' not found in the combined DataFrame.")
-        return None
-    
-    for curve in curves:
-        if curve in df.columns and curve != depth_column:
-            las.append_curve_item(lasio.CurveItem(mnemonic=curve, unit='', data=df[curve]))
-    
-    las_buffer = io.StringIO()
-    las.write(las_buffer, version=2.0)
-    las_buffer.seek(0)
-    
-    las_bytes = las_buffer.getvalue().encode('utf-8')
-    return las_bytes
+    for message in report.warnings:
+        st.warning(message)
+    for message in report.errors:
+        st.error(message)
 
 def export():
     """
     Displays the export interface for the LAS file.
-    Combines data from multiple Logical Files, allows the user to remove selected curves,
+    Combines data from multiple Logical Files of every open file, allows the user to remove selected curves,
     and choose the export unit (meters or feet).
     """
     st.header("Export to LAS")
@@ -130,6 +51,7 @@ def export():
     st.write("### Selected Channels to Export")
     for i, curve_info in enumerate(st.session_state.selected_curves):
         curve_name = curve_info['curve']
+        file_name = curve_info['file']
         logical_file = curve_info['logical_file']
         frame = curve_info['frame']
         depth_column = curve_info['depth_column']
@@ -138,10 +60,10 @@ def export():
         col1, col2 = st.columns([4, 1])
         
         with col1:
-            st.write(f"- **{curve_name}** ({logical_file}, {frame}, Depth: {depth_column}, Unit: {depth_unit})")
+            st.write(f"- **{curve_name}** ({file_name}, {logical_file}, {frame}, Depth: {depth_column}, Unit: {depth_unit})")
         
         with col2:
-            if st.button("Remove", key=f"remove_{i}"):
+            if st.button("Remove", key=f"remove_{selection.curve_key(curve_info)}"):
                 st.session_state.selected_curves.pop(i)
                 st.success(f"Channel {curve_name} removed successfully!")
                 st.rerun()
@@ -160,30 +82,108 @@ def export():
     
     st.write(f"***- DEPTH (depth, unit: {export_unit_short}) - included by default (combined from selected Logical Files) -***")
     
-    combined_df = combine_dataframes(st.session_state.selected_curves, st.session_state.logical_file_dfs, export_unit_short)
+    st.write("### Depth Alignment")
+    grid_option = st.selectbox(
+        "Depth grid of the exported file:",
+        options=list(GRID_OPTIONS),
+        help="Curves from every selected frame are resampled onto this depth grid."
+    )
+    step = None
+    if GRID_OPTIONS[grid_option] == 'step':
+        step = st.number_input(f"Depth step ({export_unit_short}):", min_value=0.0001, value=0.1, format="%.4f")
+    
+    method_option = st.selectbox(
+        "Resampling method:",
+        options=list(METHOD_OPTIONS),
+        help="Nearest keeps the original sample values, which suits discrete curves (flags, zones)."
+    )
+    tolerance = None
+    if METHOD_OPTIONS[method_option] == 'nearest':
+        tolerance = st.number_input(
+            f"Tolerance ({export_unit_short}):", min_value=0.0, value=0.0, format="%.4f",
+            help="Grid depths farther than this from any sample are left empty. 0 uses half of the grid step."
+        ) or None
+    
+    st.write("### Depth Interval")
+    interval = None
+    if st.checkbox("Export a depth interval only",
+                   help="Only the samples between the top and bottom depths are read and exported."):
+        bounds = depth_range(st.session_state.selected_curves, st.session_state.logical_file_dfs, export_unit_short)
+        if bounds is not None:
+            top_col, bottom_col = st.columns(2)
+            top = top_col.number_input(f"Top depth ({export_unit_short})", value=bounds[0],
+                                       key=f"export_top_{export_unit_short}", format="%.4f")
+            bottom = bottom_col.number_input(f"Bottom depth ({export_unit_short})", value=bounds[1],
+                                             key=f"export_bottom_{export_unit_short}", format="%.4f")
+            if top > bottom:
+                st.warning("The top depth is below the bottom depth.")
+                return
+            interval = (top, bottom)
+    
+    if 'export_pipeline' not in st.session_state:
+        st.session_state.export_pipeline = ExportPipeline()
+    pipeline = st.session_state.export_pipeline
+    
+    report = Report()
+    with instrumentation.stage('align curves'):
+        combined_df = pipeline.combined(st.session_state.selected_curves, st.session_state.logical_file_dfs,
+                                        export_unit_short, grid=GRID_OPTIONS[grid_option], step=step,
+                                        method=METHOD_OPTIONS[method_option], tolerance=tolerance, report=report,
+                                        interval=interval)
+    show_report(report)
     if combined_df is None:
         return
     
-    if 'uploaded_file_name' in st.session_state:
-        dlis_file_name = st.session_state.uploaded_file_name
-        default_file_name = os.path.splitext(dlis_file_name)[0] + ".las"
+    st.write("### File Format")
+    available = columnar.available_formats()
+    format_option = st.selectbox(
+        "Format of the exported file:",
+        options=[option for option, (file_format, _) in FORMAT_OPTIONS.items()
+                 if file_format == 'las' or file_format in available],
+        help="Parquet, Feather and HDF5 are binary columnar formats, smaller and much faster to write and read "
+             "than LAS. Curve units and descriptions are stored with each column."
+    )
+    file_format, extension = FORMAT_OPTIONS[format_option]
+    format_label = format_option.split()[0]
+    
+    curve_units = {}
+    convertible = {label: units.compatible(unit) for label, unit in pipeline.units().items()}
+    convertible = {label: options for label, options in convertible.items() if len(options) > 1}
+    if convertible:
+        with st.expander("Curve units", expanded=False):
+            st.caption("Curves are converted when the file is written, and their unit is written with each curve.")
+            for label, options in convertible.items():
+                target_unit = st.selectbox(label, options, key=f"curve_unit_{label}")
+                if target_unit != options[0]:
+                    curve_units[label] = target_unit
+    
+    file_names = selection.files(st.session_state.selected_curves)
+    if len(file_names) == 1:
+        default_file_name = os.path.splitext(file_names[0])[0] + extension
     else:
-        default_file_name = "output.las"
+        default_file_name = "output" + extension
     
-    file_name = st.text_input("Type the name of the file (ex: output.las):", default_file_name)
+    file_name = st.text_input(f"Type the name of the file (ex: output{extension}):", default_file_name,
+                              key=f"export_file_name_{file_format}")
     
     try:
-        curves_to_export = [curve_info['curve'] for curve_info in st.session_state.selected_curves]
-        las_bytes = create_las_file(combined_df, curves_to_export, depth_column='DEPTH', depth_unit=export_unit_short)
+        report = Report()
+        with instrumentation.stage(f'serialize {file_format}') as stage:
+            export_file = pipeline.export_file(combined_df, export_unit_short, file_format, report=report,
+                                               curve_units=curve_units)
+            if export_file is not None:
+                stage.nbytes = export_file.seek(0, os.SEEK_END)
+                export_file.seek(0)
+        show_report(report)
         
-        if las_bytes is None:
+        if export_file is None:
             return
         
         st.download_button(
-            label="Download LAS",
-            data=las_bytes,
+            label=f"Download {format_label}",
+            data=lambda: pipeline.export_file(combined_df, export_unit_short, file_format, curve_units=curve_units),
             file_name=file_name,
             mime="application/octet-stream"
         )
     except Exception as e:
-        st.error(f"Error generating the LAS file: {e}")
\ No newline at end of file
+        st.error(f"Error generating the {format_label} file: {e}")
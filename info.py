@@ -1,68 +1,138 @@
 import streamlit as st
 import pandas as pd
 
-def info(dlis_file):
+from core import framedata, framestore, metadata, selection
+
+def select_for_export(dlis_file, channel, digest, file_name):
+    """
+    Adds a channel found by the search to the curves selected for export, as if it had been
+    selected on the 'Data Visualization' page, and registers its frame in the session frame store.
+    """
+    logical_file = f"Logical File {channel['logical_file']}"
+    frame = f"Frame {channel['frame']}"
+    curve_info = selection.curve_info(digest, file_name, logical_file, frame, channel['label'],
+                                      channel['depth_channel'], channel['depth_unit'] or 'unknown')
+
+    if selection.is_selected(st.session_state.selected_curves, selection.curve_key(curve_info)):
+        st.warning(f"Channel {channel['label']} was already selected from {logical_file}, {frame}!")
+        return
+
+    if 'logical_file_dfs' not in st.session_state:
+        st.session_state.logical_file_dfs = framestore.FrameStore()
+    logical_file_key = curve_info['logical_file_key']
+    selected_frame = dlis_file[channel['logical_file'] - 1].frames[channel['frame'] - 1]
+    df = st.session_state.logical_file_dfs.get(logical_file_key)
+    if df is None or df.frame is not selected_frame:
+        st.session_state.logical_file_dfs[logical_file_key] = framedata.LazyFrame(selected_frame)
+
+    selection.select(st.session_state.selected_curves, curve_info)
+    st.success(f"Channel {channel['label']} selected successfully!")
+
+def channel_search(dlis_file, metadata_index, digest, file_name):
+    """
+    Searches channels by mnemonic, description or unit across all Logical Files and Frames.
+    """
+    st.subheader('Channel Search')
+    text = st.text_input('Search channels by mnemonic, description or unit', placeholder='e.g. GR, gamma, ohm.m')
+    if not text:
+        return
+
+    results = metadata_index.search(digest, text)
+    if not results:
+        st.write('No channel found.')
+        return
+
+    table = pd.DataFrame(results)[['label', 'long_name', 'units', 'dimension', 'logical_file', 'frame',
+                                   'samples', 'depth_channel']]
+    table.columns = ['Channel', 'Description', 'Units', 'Dimension', 'Logical File', 'Frame', 'Samples', 'Depth channel']
+    st.write(f"{len(results)} channel(s) found. Select rows to add them to the export.")
+    event = st.dataframe(table, hide_index=True, on_select='rerun', selection_mode='multi-row', key=f"search_{text}")
+
+    if st.button('Select for export', disabled=not event.selection.rows):
+        if 'selected_curves' not in st.session_state:
+            st.session_state.selected_curves = []
+        for row in event.selection.rows:
+            channel = results[row]
+            if channel['dimension'] != '1':
+                st.warning(f"Channel {channel['label']} has multiple dimensions and cannot be exported to LAS.")
+            elif channel['depth_channel'] is None:
+                st.warning(f"No depth channel found in Logical File {channel['logical_file']}, Frame {channel['frame']}.")
+            else:
+                select_for_export(dlis_file, channel, digest, file_name)
+
+def partial_index(digest, logical_files):
+    """
+    Returns an in-memory metadata index of the Logical Files of a file still being loaded,
+    kept per file and extended with the Logical Files read since the last call. The persistent
+    index is only written once the whole file is loaded.
+    """
+    cached = st.session_state.get('partial_metadata_index')
+    if cached is None or cached[0] != digest:
+        if cached is not None:
+            cached[1].close()
+        cached = (digest, metadata.MetadataIndex(':memory:'), 0)
+    digest, index, count = cached
+    if len(logical_files) > count:
+        count = index.append(digest, logical_files[count:], count + 1)
+    st.session_state.partial_metadata_index = (digest, index, count)
+    return index
+
+def info(dlis_file, metadata_index, digest, file_name):
     st.title('General Information')
+    st.caption(f"File: {file_name}")
     st.write('Select an option to expand and view details.')
 
     logical_files = list(dlis_file)
-    
+
     if logical_files:
-        logical_files_dict = {f"Logical File {i+1}": lf for i, lf in enumerate(logical_files)}
-        
+        if not getattr(dlis_file, 'done', True):
+            st.caption(f"The file is still being indexed: showing the {len(logical_files)} Logical File(s) read so far.")
+            metadata_index = partial_index(digest, logical_files)
+        else:
+            cached = st.session_state.pop('partial_metadata_index', None)
+            if cached is not None:
+                cached[1].close()
+            if metadata_index.ensure(digest, dlis_file, file_name):
+                st.caption(f"Metadata indexed in {metadata_index.file(digest)['index_seconds']:.2f} s.")
+
+        channel_search(dlis_file, metadata_index, digest, file_name)
+
         with st.expander('Logical Files', expanded=False):
-            logical_file_selection = st.selectbox('Select one Logical File', list(logical_files_dict.keys()))
-            if logical_file_selection:
-                selected_logical_file = logical_files_dict[logical_file_selection]
-                st.write(selected_logical_file.describe())
-        
+            table = pd.DataFrame(metadata_index.logical_files(digest)).drop(columns='digest')
+            table.columns = ['Logical File', 'File ID', 'Origins', 'Frames', 'Channels']
+            st.dataframe(table, hide_index=True)
+
         with st.expander('Origins', expanded=False):
-            logical_file_selection = st.selectbox('Select one Logical File for Origins', list(logical_files_dict.keys()))
-            if logical_file_selection:
-                selected_logical_file = logical_files_dict[logical_file_selection]
-                st.subheader('Origins')
-                if hasattr(selected_logical_file, 'origins'):
-                    origins = selected_logical_file.origins
-                    if origins:
-                        for origin in origins:
-                            st.write(origin.describe())
-                    else:
-                        st.write('Origin not found!')
-                else:
-                    st.write('Origin not found!')
-        
+            origins = metadata_index.origins(digest)
+            if origins:
+                table = pd.DataFrame(origins).drop(columns='digest')
+                table.columns = ['Logical File', 'Origin', 'Name', 'Well', 'Field', 'Company', 'Producer',
+                                 'File ID', 'Creation time']
+                st.dataframe(table, hide_index=True)
+            else:
+                st.write('Origin not found!')
+
         with st.expander('Frames', expanded=False):
-            logical_file_selection = st.selectbox('Select one Logical File for Frames', list(logical_files_dict.keys()))
-            if logical_file_selection:
-                selected_logical_file = logical_files_dict[logical_file_selection]
-                st.subheader('Frames')
-                if hasattr(selected_logical_file, 'frames'):
-                    frames = selected_logical_file.frames
-                    if frames:
-                        for frame in frames:
-                            st.write(frame.describe())
-                    else:
-                        st.write('Frame not found!')
-                else:
-                    st.write('Frame not found!')
-        
+            frames = metadata_index.frames(digest)
+            if frames:
+                table = pd.DataFrame(frames).drop(columns='digest')
+                table.columns = ['Logical File', 'Frame', 'Name', 'Index type', 'Direction', 'Spacing', 'Index min',
+                                 'Index max', 'Channels', 'Samples', 'Depth channel', 'Depth unit']
+                st.dataframe(table, hide_index=True)
+            else:
+                st.write('Frame not found!')
+
         with st.expander('Channels', expanded=False):
-            logical_file_selection = st.selectbox('Select one Logical File for Channels', list(logical_files_dict.keys()))
-            if logical_file_selection:
-                selected_logical_file = logical_files_dict[logical_file_selection]
-                st.subheader('Channels')
-                if hasattr(selected_logical_file, 'channels'):
-                    channels = selected_logical_file.channels
-                    if channels:
-                        channel_data = [
-                            {'Name': channel.name, 'Units': channel.units, 'Description': channel.long_name}
-                            for channel in channels
-                        ]
-                        st.table(pd.DataFrame(channel_data))
-                        st.write(f"There are {len(channels)} available logs")
-                    else:
-                        st.write('Channels not found!')
-                else:
-                    st.write('Channels not found!')
+            logical_file_options = ['All'] + [f"Logical File {i+1}" for i in range(len(logical_files))]
+            logical_file_selection = st.selectbox('Select one Logical File for Channels', logical_file_options)
+            logical_file = None if logical_file_selection == 'All' else logical_file_options.index(logical_file_selection)
+            channels = metadata_index.channels(digest, logical_file)
+            if channels:
+                table = pd.DataFrame(channels)[['logical_file', 'frame', 'label', 'units', 'long_name', 'dimension', 'samples']]
+                table.columns = ['Logical File', 'Frame', 'Name', 'Units', 'Description', 'Dimension', 'Samples']
+                st.dataframe(table, hide_index=True)
+                st.write(f"There are {len(channels)} available logs")
+            else:
+                st.write('Channels not found!')
     else:
-        st.write('Logical File not found!')
\ No newline at end of file
+        st.write('Logical File not found!')
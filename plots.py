@@ -0,0 +1,182 @@
+import io
+from collections import OrderedDict
+
+from core import decimate, instrumentation
+
+FIGURE_SIZE = (2, 5)
+DPI = 200
+MAX_FIGURES = 32
+LOG_VIEW_HEIGHT = 600
+TRACK_WIDTH = 180
+WINDOW_SELECTION = 'window'
+
+
+@instrumentation.timed('render curve')
+def render_curve(depth_values, values, curve, unit, depth_column, depth_unit, invert_depth=True,
+                 figsize=FIGURE_SIZE, dpi=DPI):
+    """
+    Draws one curve against depth and returns the figure as PNG bytes.
+    The curve is reduced to two samples per pixel row of the figure (see core.decimate), so drawing
+    time does not grow with the number of samples.
+    The figure is created without pyplot, so it is not kept by pyplot's figure registry and is
+    freed as soon as it is rendered.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    depth_values, values = decimate.decimate(depth_values, values, int(figsize[1] * dpi))
+
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    ax = fig.subplots()
+    ax.plot(values, depth_values, label=curve, linewidth=0.5, color='blue')
+
+    depth_unit_display = depth_unit if depth_unit != 'index' else ''
+    ax.set_xlabel(f'{curve} ({unit})', fontsize=5)
+    ax.set_ylabel(f'Depth ({depth_column}) ({depth_unit_display})', fontsize=4)
+    ax.set_title(f'{curve}', fontsize=6)
+    ax.grid(True)
+    ax.tick_params(axis='both', which='major', labelsize=4)
+    if invert_depth:
+        ax.invert_yaxis()
+
+    image = io.BytesIO()
+    fig.savefig(image, format='png', dpi=dpi, bbox_inches='tight')
+    return image.getvalue()
+
+
+@instrumentation.timed('render image')
+def render_image(depth_values, image, label, unit, depth_column, depth_unit, invert_depth=True,
+                 figsize=FIGURE_SIZE, dpi=DPI):
+    """
+    Draws a multi-dimensional channel as an image track (one row of pixels per sample) and returns
+    the figure as PNG bytes. The image is first averaged down to the pixel rows of the figure
+    (see core.decimate.image_rows), reading a memory-mapped channel a chunk at a time.
+    """
+    import numpy as np
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    depth_values, rows = decimate.image_rows(depth_values, image, int(figsize[1] * dpi))
+    if len(depth_values) > 1 and depth_values[0] > depth_values[-1]:
+        depth_values, rows = depth_values[::-1], rows[::-1]
+    finite = rows[np.isfinite(rows)]
+    vmin, vmax = np.percentile(finite, [2, 98]) if len(finite) else (None, None)
+
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    ax = fig.subplots()
+    first, last = (depth_values[0], depth_values[-1]) if len(depth_values) else (0, 1)
+    picture = ax.imshow(rows, aspect='auto', interpolation='nearest', vmin=vmin, vmax=vmax,
+                        origin='upper' if invert_depth else 'lower',
+                        extent=(0, rows.shape[1], last, first) if invert_depth else (0, rows.shape[1], first, last))
+    colorbar = fig.colorbar(picture, ax=ax, orientation='horizontal', pad=0.08)
+    colorbar.ax.tick_params(labelsize=4)
+
+    depth_unit_display = depth_unit if depth_unit != 'index' else ''
+    ax.set_xlabel(f'{label} ({unit})', fontsize=5)
+    ax.set_ylabel(f'Depth ({depth_column}) ({depth_unit_display})', fontsize=4)
+    ax.set_title(f'{label}', fontsize=6)
+    ax.tick_params(axis='both', which='major', labelsize=4)
+
+    output = io.BytesIO()
+    fig.savefig(output, format='png', dpi=dpi, bbox_inches='tight')
+    return output.getvalue()
+
+
+@instrumentation.timed('render tracks')
+def log_chart(table, tracks, units, depth_column, depth_unit, invert_depth=True, domain=None,
+              height=LOG_VIEW_HEIGHT, track_width=TRACK_WIDTH):
+    """
+    Returns a multi-track log view as one Altair (Vega-Lite) chart, drawn in the browser: one track
+    per list of curves in `tracks`, side by side on a shared depth axis limited to `domain`, from the
+    long-form `table` of core.decimate.track_table(). The mouse wheel zooms the depth axis in the
+    browser only; dragging over a track selects a depth window (selection WINDOW_SELECTION), for
+    which the page can send finer data.
+    """
+    import altair as alt
+    import pandas as pd
+
+    labels = [', '.join(f"{curve} ({units.get(curve) or '-'})" for curve in curves) for curves in tracks]
+    table = pd.concat([table[table['curve'].isin(curves)].assign(track=label) for curves, label in zip(tracks, labels)],
+                      ignore_index=True)
+
+    depth_unit_display = depth_unit if depth_unit != 'index' else ''
+    window = alt.selection_interval(name=WINDOW_SELECTION, encodings=['y'])
+    zoom = alt.selection_interval(name='zoom', bind='scales', encodings=['y'], zoom='wheel!', translate=False)
+    depth_scale = alt.Scale(reverse=invert_depth, zero=False, nice=False,
+                            domain=list(domain) if domain is not None else alt.Undefined)
+
+    track = alt.Chart().mark_line(strokeWidth=0.8).encode(
+        x=alt.X('value:Q', title=None, scale=alt.Scale(zero=False)),
+        y=alt.Y('depth:Q', scale=depth_scale, title=f'Depth ({depth_column}) ({depth_unit_display})'),
+        color=alt.Color('curve:N', title='Curve'),
+        order='depth:Q',
+        tooltip=['curve:N', 'depth:Q', 'value:Q'],
+    ).properties(width=track_width, height=height).add_params(window, zoom)
+    return alt.FacetChart(data=table, spec=track, facet=alt.Facet('track:N', sort=labels, title=None),
+                          columns=len(tracks)).resolve_scale(x='independent')
+
+
+class FigureCache:
+    """
+    Rendered curve images of a session, keyed by (frame key, frame version, curve, depth channel, size),
+    and the decimated data of multi-track views. Reruns that show the same curve reuse the PNG instead
+    of drawing it again; the least recently used entries are dropped beyond `max_entries`.
+    """
+    def __init__(self, max_entries=MAX_FIGURES):
+        self.max_entries = max_entries
+        self._images = OrderedDict()
+
+    def __len__(self):
+        return len(self._images)
+
+    def curve(self, frame_key, frame_df, curve, depth_column, depth_unit, figsize=FIGURE_SIZE, dpi=DPI):
+        """
+        Returns the PNG of `curve` of a LazyFrame, rendering it only on the first request.
+        """
+        key = (frame_key, frame_df.version, curve, depth_column, figsize, dpi)
+        image = self._images.get(key)
+        if image is None:
+            image = render_curve(frame_df[depth_column], frame_df[curve], curve, frame_df.unit(curve),
+                                 depth_column, depth_unit, invert_depth=depth_column != 'INDEX',
+                                 figsize=figsize, dpi=dpi)
+            self._images[key] = image
+            while len(self._images) > self.max_entries:
+                self._images.popitem(last=False)
+        self._images.move_to_end(key)
+        return image
+
+    def tracks(self, frame_key, frame_df, curves, depth_column, window, buckets=LOG_VIEW_HEIGHT):
+        """
+        Returns the long-form table of `curves` of a LazyFrame for a multi-track view of the depth
+        `window` = (top, bottom), reduced to `buckets` rows (see core.decimate.track_table).
+        Only the records of the window are read (see LazyFrame.interval), so a narrower window gives
+        finer data at the same cost.
+        """
+        key = (frame_key, frame_df.version, 'tracks', tuple(curves), depth_column, window, buckets)
+        table = self._images.get(key)
+        if table is None:
+            view = frame_df.interval(depth_column, *window)
+            table = decimate.track_table(view[depth_column], {curve: view[curve] for curve in curves}, buckets)
+            self._images[key] = table
+            while len(self._images) > self.max_entries:
+                self._images.popitem(last=False)
+        self._images.move_to_end(key)
+        return table
+
+    def image(self, frame_key, frame_df, label, depth_column, depth_unit, figsize=FIGURE_SIZE, dpi=DPI):
+        """
+        Returns the PNG of the multi-dimensional channel `label` of a LazyFrame as an image track.
+        """
+        key = (frame_key, frame_df.version, 'image', label, depth_column, figsize, dpi)
+        image = self._images.get(key)
+        if image is None:
+            array = frame_df.array(label)
+            image = render_image(frame_df[depth_column], array.image(), label, array.unit, depth_column, depth_unit,
+                                 invert_depth=depth_column != 'INDEX', figsize=figsize, dpi=dpi)
+            self._images[key] = image
+            while len(self._images) > self.max_entries:
+                self._images.popitem(last=False)
+        self._images.move_to_end(key)
+        return image
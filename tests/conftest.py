@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import synthetic
+
+
+@pytest.fixture(scope='session')
+def synthetic_dlis(tmp_path_factory):
+    """
+    Path of a synthetic DLIS file with 2 Logical Files of 2 frames (see benchmarks/synthetic.py).
+    """
+    path = tmp_path_factory.mktemp('dlis') / 'synthetic.dlis'
+    return synthetic.write_dlis(str(path), logical_files=2, frames=2, channels=4, samples=500)
+
+
+@pytest.fixture
+def logical_files(synthetic_dlis):
+    from dlisio import dlis
+
+    with dlis.load(synthetic_dlis) as files:
+        yield files
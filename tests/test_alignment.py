@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from core import alignment
+
+
+def test_build_grid_reference_drops_nan():
+    grid = alignment.build_grid([np.array([100.0, np.nan, 101.0]), np.array([50.0, 200.0])])
+    np.testing.assert_array_equal(grid, [100.0, 101.0])
+
+
+def test_build_grid_finest_spans_all_frames():
+    grid = alignment.build_grid([np.arange(100.0, 102.0, 0.5), np.arange(101.0, 103.01, 0.25)], mode='finest')
+    assert grid[0] == 100.0 and grid[-1] == 103.0
+    np.testing.assert_allclose(np.diff(grid), 0.25)
+
+
+def test_build_grid_step_follows_decreasing_reference():
+    grid = alignment.build_grid([np.array([110.0, 105.0, 100.0])], mode='step', step=2.5)
+    np.testing.assert_array_equal(grid, [110.0, 107.5, 105.0, 102.5, 100.0])
+
+
+def test_build_grid_rejects_bad_step():
+    with pytest.raises(ValueError):
+        alignment.build_grid([np.arange(3.0)], mode='step', step=0)
+
+
+def test_interpolate_is_nan_outside_the_frame():
+    resample = alignment.Resampler(np.array([1.0, 2.0, 3.0]), np.array([0.5, 1.5, 2.5, 3.5]))
+    np.testing.assert_allclose(resample(np.array([10.0, 20.0, 30.0])), [np.nan, 15.0, 25.0, np.nan])
+
+
+def test_interpolate_decreasing_and_unordered_depths():
+    grid = np.array([1.5, 2.5])
+    values = np.array([30.0, 20.0, 10.0])
+    decreasing = alignment.Resampler(np.array([3.0, 2.0, 1.0]), grid)
+    unordered = alignment.Resampler(np.array([2.0, 3.0, 1.0]), grid)
+    np.testing.assert_allclose(decreasing(values), [15.0, 25.0])
+    np.testing.assert_allclose(unordered(np.array([20.0, 30.0, 10.0])), [15.0, 25.0])
+
+
+def test_nearest_keeps_sample_values_within_tolerance():
+    resample = alignment.Resampler(np.array([1.0, 2.0, 3.0]), np.array([1.1, 1.6, 2.4, 2.9]), 'nearest', 0.2)
+    np.testing.assert_array_equal(resample(np.array([10.0, 20.0, 30.0])), [10.0, np.nan, np.nan, 30.0])
+
+
+def test_nearest_reaches_outside_the_frame_within_tolerance():
+    depth = np.arange(105.1, 110.0, 0.5)
+    grid = np.arange(104.5, 110.51, 0.5)
+    values = np.arange(len(depth), dtype='float64')
+    result = alignment.Resampler(depth, grid, 'nearest', 0.5)(values)
+    assert np.isnan(result[0])
+    assert result[1] == values[0]
+    assert result[-2] == values[-1]
+    assert np.isnan(result[-1])
+
+
+def test_grid_equal_to_depth_copies_values():
+    depth = np.array([1.0, 2.0, 3.0])
+    np.testing.assert_array_equal(alignment.Resampler(depth, depth)(np.array([4.0, np.nan, 6.0])),
+                                  [4.0, np.nan, 6.0])
+
+
+def test_align_frames_suffixes_repeated_labels():
+    combined = alignment.align_frames([(np.array([1.0, 2.0]), {'GR': [1.0, 2.0]}),
+                                       (np.array([1.0, 2.0]), {'GR': [3.0, 4.0]})])
+    assert list(combined.columns) == ['DEPTH', 'GR', 'GR_2']
+
+
+def test_column_labels_match_align_frames():
+    frames = [(np.array([1.0, 2.0]), {'DEPTH': [5.0, 6.0], 'GR': [1.0, 2.0]}),
+              (np.array([1.0, 2.0]), {'GR': [3.0, 4.0]})]
+    labels = alignment.column_labels([curves for _, curves in frames])
+    assert labels == [{'DEPTH': 'DEPTH_1', 'GR': 'GR'}, {'GR': 'GR_2'}]
+    assert list(alignment.align_frames(frames).columns) == ['DEPTH', 'DEPTH_1', 'GR', 'GR_2']
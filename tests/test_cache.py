@@ -0,0 +1,77 @@
+import gc
+import io
+import os
+
+import pytest
+
+from core import cache, framedata, framestore, selection
+
+
+@pytest.fixture
+def upload(synthetic_dlis):
+    with open(synthetic_dlis, 'rb') as f:
+        return io.BytesIO(f.read())
+
+
+@pytest.fixture
+def file_cache(tmp_path):
+    file_cache = cache.DlisFileCache(max_entries=1, cache_dir=str(tmp_path), loaders=1)
+    yield file_cache
+    file_cache.clear()
+
+
+def test_acquire_loads_once_per_content(file_cache, upload):
+    first = file_cache.acquire(upload, 'a')
+    second = file_cache.acquire(upload, 'a')
+    assert first.dlis_file is second.dlis_file
+    first.dlis_file.wait()
+    assert len(first.dlis_file) == 2
+    assert not first.dlis_file.failed
+
+
+def test_leased_entries_are_not_evicted(file_cache, upload):
+    lease = file_cache.acquire(upload, 'a')
+    other = file_cache.acquire(upload, 'b')
+    assert 'a' in file_cache and 'b' in file_cache
+    lease.dlis_file.wait()
+    other.dlis_file.wait()
+    path = lease.dlis_file.path
+
+    lease.release()
+    assert 'a' not in file_cache and 'b' in file_cache
+    assert not os.path.exists(path)
+
+
+def test_garbage_collected_lease_is_released(file_cache, upload):
+    lease = file_cache.acquire(upload, 'a')
+    lease.dlis_file.wait()
+    file_cache.acquire(upload, 'b').dlis_file.wait()
+    assert 'a' in file_cache and 'b' not in file_cache
+    del lease
+    gc.collect()
+    file_cache.acquire(upload, 'b').dlis_file.wait()
+    assert 'a' not in file_cache and 'b' in file_cache
+
+
+def test_stale_lease_does_not_release_a_newer_entry(file_cache, upload):
+    stale = file_cache.acquire(io.BytesIO(b'not a dlis file'), 'a')
+    stale.dlis_file.wait()
+    assert stale.dlis_file.failed and 'a' not in file_cache
+    lease = file_cache.acquire(upload, 'a')
+    lease.dlis_file.wait()
+    stale.release()
+    file_cache.acquire(upload, 'b').dlis_file.wait()
+    assert 'a' in file_cache and 'b' not in file_cache
+
+
+def test_drop_files_removes_curves_and_frames(logical_files):
+    selected = [selection.curve_info(digest, f"{digest}.dlis", 'Logical File 1', 'Frame 1', curve, 'DEPT', 'm')
+                for digest, curve in (('a', 'C000'), ('b', 'C000'), ('a', 'C001'))]
+    store = framestore.FrameStore(spill=False)
+    for digest in ('a', 'b'):
+        store[selection.frame_key(digest, 'Logical File 1', 'Frame 1')] = \
+            framedata.LazyFrame(logical_files[0].frames[0])
+
+    assert selection.drop_files(selected, store, {'a'}) == 2
+    assert [info['digest'] for info in selected] == ['b']
+    assert list(store.keys()) == [selection.frame_key('b', 'Logical File 1', 'Frame 1')]
@@ -0,0 +1,46 @@
+import numpy as np
+
+from core import decimate
+
+
+def test_short_curves_are_kept_whole():
+    np.testing.assert_array_equal(decimate.minmax_indices(np.arange(10.0), 5), np.arange(10))
+
+
+def test_extremes_of_every_run_survive():
+    values = np.zeros(1000)
+    values[123] = 50.0
+    values[877] = -50.0
+    indices = decimate.minmax_indices(values, 10)
+    assert len(indices) <= 20
+    assert 123 in indices and 877 in indices
+    assert (np.diff(indices) > 0).all()
+
+
+def test_empty_runs_keep_a_gap():
+    values = np.arange(100.0)
+    values[:50] = np.nan
+    depth, decimated = decimate.decimate(np.arange(100.0), values, 5)
+    assert np.isnan(decimated).any()
+    assert np.nanmin(decimated) == 50.0 and np.nanmax(decimated) == 99.0
+    assert len(depth) == len(decimated)
+
+
+def test_track_table_long_form():
+    depth = np.arange(200.0)
+    table = decimate.track_table(depth, {'GR': np.sin(depth), 'RHOB': np.cos(depth)}, 10)
+    assert list(table.columns) == ['depth', 'value', 'curve']
+    assert set(table['curve']) == {'GR', 'RHOB'}
+    assert len(table) <= 2 * 2 * 10
+
+
+def test_image_rows_chunks_match_one_pass():
+    image = np.arange(1000 * 8, dtype='float64').reshape(1000, 8)
+    image[10:20] = np.nan
+    depth = np.arange(1000.0)
+    whole = decimate.image_rows(depth, image, 100)
+    chunked = decimate.image_rows(depth, image, 100, chunk_bytes=1024)
+    assert whole[1].shape == (100, 8)
+    np.testing.assert_array_equal(whole[0], chunked[0])
+    np.testing.assert_array_equal(whole[1], chunked[1])
+    assert np.isnan(whole[1][1]).all()
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+import synthetic
+from core import framedata
+
+
+@pytest.fixture
+def frame(logical_files):
+    return logical_files[0].frames[0]
+
+
+def expected(count=500, frame_number=0):
+    step, offset, _ = synthetic.frame_layout(2, count, frame_number)
+    depth, curves = synthetic.frame_arrays(count, 4, step, offset, seed=frame_number)
+    return depth, {label: np.where(values == synthetic.ABSENT_VALUE, np.nan, values) for label, values in curves.items()}
+
+
+def test_columns_are_read_alone(frame):
+    depth, curves = expected()
+    frame_df = framedata.LazyFrame(frame)
+    assert frame_df.index_column == 'DEPT'
+    np.testing.assert_array_equal(frame_df['C002'], curves['C002'])
+    assert frame_df.materialized == ['C002']
+    assert not frame_df.decoded
+    assert len(frame_df) == len(depth)
+
+
+def test_prepare_decodes_the_frame_for_most_columns(frame):
+    frame_df = framedata.LazyFrame(frame)
+    frame_df.prepare(['C000', 'C001', 'C002'])
+    assert frame_df.decoded
+    np.testing.assert_array_equal(frame_df['C001'], expected()[1]['C001'])
+
+
+def test_depth_index_rows():
+    index = framedata.DepthIndex(np.array([1.0, 2.0, 3.0, 4.0]))
+    assert index.direction == 'increasing'
+    assert index.rows(1.5, 3.0) == slice(1, 3)
+    decreasing = framedata.DepthIndex(np.array([4.0, 3.0, 2.0, 1.0]))
+    assert (decreasing.top, decreasing.bottom) == (1.0, 4.0)
+    assert decreasing.rows(1.5, 3.0) == slice(1, 3)
+    unordered = framedata.DepthIndex(np.array([1.0, 3.0, 2.0, np.nan]))
+    assert unordered.direction is None
+    np.testing.assert_array_equal(unordered.rows(1.5, 3.0), [1, 2])
+
+
+@pytest.mark.parametrize('decode_first', [False, True])
+def test_interval_matches_whole_frame(frame, decode_first):
+    depth, curves = expected()
+    frame_df = framedata.LazyFrame(frame)
+    if decode_first:
+        frame_df.frame_data
+    top, bottom = depth[100], depth[199]
+    interval = frame_df.interval('DEPT', top, bottom)
+    assert len(interval) == 100
+    np.testing.assert_array_equal(interval['DEPT'], depth[100:200])
+    np.testing.assert_array_equal(interval['C003'], curves['C003'][100:200])
+    assert frame_df.interval('DEPT', top, bottom) is interval
+    assert frame_df.interval('DEPT', depth[0] - 1, depth[-1] + 1) is frame_df
+
+
+def test_assigning_a_depth_column_rebuilds_its_index(frame):
+    frame_df = framedata.LazyFrame(frame)
+    frame_df['INDEX'] = np.arange(len(frame_df))
+    assert frame_df.depth_index('INDEX').bottom == len(frame_df) - 1
+    frame_df['INDEX'] = np.arange(len(frame_df)) * 2.0
+    assert frame_df.depth_index('INDEX').bottom == 2 * (len(frame_df) - 1)
+
+
+def test_release_drops_columns_and_indexes(frame, tmp_path):
+    frame_df = framedata.LazyFrame(frame)
+    frame_df['C000']
+    frame_df.depth_index('DEPT')
+    assert frame_df.resident_bytes > 0
+    frame_df.release()
+    assert frame_df.resident_bytes == 0
+    frame_df['C000']
+    frame_df.release(str(tmp_path))
+    assert frame_df.resident_bytes == 0 and frame_df.spilled_bytes > 0
+    np.testing.assert_array_equal(frame_df['C000'], expected()[1]['C000'])
@@ -0,0 +1,41 @@
+import gc
+
+from core import instrumentation
+
+
+def test_stages_are_recorded_only_while_active():
+    recorder = instrumentation.Recorder()
+    recorder.start_run('page')
+    with instrumentation.stage('ignored'):
+        pass
+    instrumentation.activate(recorder)
+    try:
+        with instrumentation.stage('outer', 10):
+            with instrumentation.stage('inner'):
+                pass
+    finally:
+        instrumentation.activate(None)
+    assert [(stage['stage'], stage['depth']) for stage in recorder.current['stages']] == [('inner', 1), ('outer', 0)]
+    assert recorder.current['stages'][1]['bytes'] == 10
+
+
+def test_prometheus_file_is_removed_with_its_recorder(tmp_path):
+    recorder = instrumentation.Recorder()
+    recorder.start_run()
+    recorder.record('decode', 0.5, 1024)
+    path = tmp_path / 'diagnostics-session.prom'
+    recorder.write_prometheus(str(path), {'session': 'session'})
+    recorder.write_prometheus(str(path), {'session': 'session'})
+    assert 'session="session"' in path.read_text()
+    del recorder
+    gc.collect()
+    assert not path.exists()
+
+
+def test_close_removes_the_prometheus_file(tmp_path):
+    recorder = instrumentation.Recorder()
+    recorder.start_run()
+    path = tmp_path / 'diagnostics-session.prom'
+    recorder.write_prometheus(str(path))
+    recorder.close()
+    assert not path.exists()
@@ -0,0 +1,19 @@
+from core import framedata, loading
+
+
+def test_logical_files_stay_readable_when_indexing_stops_early(synthetic_dlis):
+    indexed = loading.iter_logical_files(synthetic_dlis)
+    logical_file, _ = next(indexed)
+    indexed.close()
+    try:
+        assert len(framedata.LazyFrame(logical_file.frames[0])) == 500
+    finally:
+        logical_file.close()
+
+
+def test_every_logical_file_is_yielded_in_order(synthetic_dlis):
+    offsets = []
+    for logical_file, offset in loading.iter_logical_files(synthetic_dlis):
+        offsets.append(offset)
+        logical_file.close()
+    assert len(offsets) == 2 and offsets[0] < offsets[1]
@@ -0,0 +1,40 @@
+import pytest
+
+from core import metadata
+
+
+@pytest.fixture
+def index():
+    index = metadata.MetadataIndex(':memory:', max_files=2)
+    yield index
+    index.close()
+
+
+def test_ensure_indexes_every_logical_file(index, logical_files):
+    assert index.ensure('a', logical_files, 'synthetic.dlis')
+    assert not index.ensure('a', logical_files)
+    assert index.file('a')['logical_files'] == 2
+    frames = index.frames('a')
+    assert [frame['samples'] for frame in frames] == [500, 1000, 500, 1000]
+    assert {frame['depth_channel'] for frame in frames} == {'DEPT'}
+
+
+def test_search_escapes_like_wildcards(index, logical_files):
+    index.ensure('a', logical_files)
+    assert index.search('a', '%') == []
+    assert index.search('a', '_') == []
+    assert index.search('a', 'c0')
+    results = index.search('a', 'C001')
+    assert {row['name'] for row in results} == {'C001'}
+    assert results[0]['depth_channel'] == 'DEPT'
+
+
+def test_least_recently_used_files_are_pruned(index, logical_files, monkeypatch):
+    clock = iter(range(100))
+    monkeypatch.setattr(metadata.time, 'time', lambda: next(clock))
+    for digest in ('a', 'b'):
+        index.ensure(digest, logical_files)
+    index.ensure('a', logical_files)
+    index.ensure('c', logical_files)
+    assert 'a' in index and 'c' in index and 'b' not in index
+    assert index.channels('b') == []
@@ -0,0 +1,38 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from core import nulls
+
+
+def channel(origin=1, **stash):
+    return SimpleNamespace(origin=origin, stash=stash)
+
+
+def test_channel_absent_values_from_channel_and_origin():
+    logical_file = SimpleNamespace(parameters=[SimpleNamespace(name='ABSENT-VALUE', origin=2, values=[-9999.0]),
+                                               SimpleNamespace(name='BIT-SIZE', origin=2, values=[8])])
+    file_absent = nulls.file_absent_values(logical_file)
+    assert file_absent == {2: -9999.0}
+    assert nulls.channel_absent_values(channel(origin=2, ABSV=[-1.0]), file_absent) == (-9999.0, -999.25, -1.0)
+    assert nulls.channel_absent_values(channel(origin=1), file_absent) == (-999.25,)
+    assert nulls.channel_absent_values(None) == (-999.25,)
+
+
+def test_normalize_float_in_place_keeps_dtype():
+    values = np.array([1.0, -999.25, 3.0, -1.0], dtype='float32')
+    result = nulls.normalize(values, (-999.25, -1.0))
+    assert result is values and result.dtype == np.float32
+    np.testing.assert_array_equal(result, [1.0, np.nan, 3.0, np.nan])
+
+
+def test_normalize_integer_becomes_nullable():
+    result = nulls.normalize(np.array([1, -999, 3], dtype='int16'), (-999.25, -999.0))
+    assert isinstance(result, pd.arrays.IntegerArray) and result.dtype == 'Int16'
+    assert list(result.isna()) == [False, True, False]
+
+
+def test_normalize_leaves_text_alone():
+    values = np.array(['a', 'b'])
+    assert nulls.normalize(values) is values
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import columnar
+from core.pipeline import ExportPipeline, convert_curves
+from core.report import Report
+
+
+def combined_df():
+    depth = np.arange(0.0, 100.0, 0.5)
+    return pd.DataFrame({'DEPTH': depth, 'GR': np.sin(depth), 'RHOB': np.cos(depth)})
+
+
+def test_export_file_reused_for_same_format():
+    pipeline = ExportPipeline()
+    df = combined_df()
+    first = pipeline.export_file(df, 'm', 'las')
+    assert pipeline.export_file(df, 'm', 'las') is first
+    assert first.tell() == 0
+
+
+@pytest.mark.parametrize('file_format', columnar.available_formats())
+def test_switching_format_drops_previous_file(file_format):
+    pipeline = ExportPipeline()
+    df = combined_df()
+    las_file = pipeline.export_file(df, 'm', 'las')
+    las_bytes = las_file.read()
+    other_file = pipeline.export_file(df, 'm', file_format)
+    assert las_file.closed
+    assert pipeline._file is other_file
+    assert not any(value is las_file or value == las_bytes for value in vars(pipeline).values())
+    assert pipeline.file_bytes(df, 'm', 'las') == las_bytes
+    assert other_file.closed
+
+
+def test_convert_curves_scales_known_units():
+    df = combined_df()
+    converted, column_units = convert_curves(df, {'GR': 'us/ft', 'RHOB': 'g/cm3'}, {'RHOB': 'kg/m3'})
+    np.testing.assert_allclose(converted['RHOB'], df['RHOB'] * 1000.0)
+    assert np.shares_memory(converted['GR'].to_numpy(), df['GR'].to_numpy())
+    assert column_units == {'GR': 'us/ft', 'RHOB': 'kg/m3'}
+
+
+@pytest.mark.parametrize('from_unit, to_unit', [('unknown', 'us/m'), ('', 'us/m'), ('us/ft', 'index'),
+                                                ('us/ft', 'unknown'), ('gAPI', 'us/m')])
+def test_convert_curves_keeps_curves_without_a_conversion(from_unit, to_unit):
+    df = combined_df()
+    report = Report()
+    converted, column_units = convert_curves(df, {'GR': from_unit}, {'GR': to_unit}, report)
+    assert converted is df
+    assert column_units == {'GR': from_unit}
+    assert len(report.warnings) == 1
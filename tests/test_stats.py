@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import stats
+
+
+@pytest.fixture
+def frame_df():
+    rng = np.random.default_rng(1)
+    count = 1000
+    gr = rng.normal(60.0, 15.0, count)
+    gr[rng.random(count) < 0.1] = np.nan
+    rhob = rng.normal(2.4, 0.1, count)
+    rhob[:200] = np.nan
+    return pd.DataFrame({'DEPT': 1000.0 + 0.5 * np.arange(count), 'GR': gr, 'RHOB': rhob,
+                         'EMPTY': np.full(count, np.nan)})
+
+
+def test_catalog_matches_numpy(frame_df):
+    catalog = stats.frame_statistics(frame_df, 'DEPT', chunk_rows=64)
+    assert list(catalog.index) == ['GR', 'RHOB', 'EMPTY']
+    for label in ('GR', 'RHOB'):
+        values = frame_df[label].to_numpy()
+        valid = values[~np.isnan(values)]
+        row = catalog.loc[label]
+        assert row['Count'] == len(valid)
+        assert row['Null fraction'] == pytest.approx(1 - len(valid) / len(values))
+        assert row['Min'] == valid.min() and row['Max'] == valid.max()
+        assert row['Mean'] == pytest.approx(valid.mean(), rel=1e-12)
+        assert row['Std'] == pytest.approx(valid.std(ddof=1), rel=1e-9)
+        assert row['P50'] == pytest.approx(np.percentile(valid, 50))
+        depth = frame_df['DEPT'].to_numpy()[~np.isnan(values)]
+        assert (row['Top'], row['Bottom']) == (depth.min(), depth.max())
+
+
+def test_channel_without_samples(frame_df):
+    row = stats.frame_statistics(frame_df, 'DEPT').loc['EMPTY']
+    assert row['Count'] == 0 and row['Null fraction'] == 1.0
+    assert np.isnan([row['Min'], row['Mean'], row['Std'], row['P50'], row['Top']]).all()
+    assert stats.curve_description(row) == 'no valid samples'
+
+
+def test_columns_restrict_the_catalog(frame_df):
+    full = stats.frame_statistics(frame_df, 'DEPT')
+    part = stats.frame_statistics(frame_df, 'DEPT', columns=['RHOB'])
+    assert list(part.index) == ['RHOB']
+    pd.testing.assert_series_equal(part.loc['RHOB'], full.loc['RHOB'])
@@ -0,0 +1,15 @@
+import pytest
+
+from core import units
+
+
+@pytest.mark.parametrize('unit, dimension', [('ms', 'time'), ('mS/m', 'conductivity'), ('g/cc', 'density'),
+                                             ('G/CC', 'density'), ('METERS', 'length'), ('FT', 'length'),
+                                             ('degK', 'temperature'), ('0.1 in', 'length')])
+def test_parse_known_spellings(unit, dimension):
+    assert units.parse(unit)[0] == dimension
+
+
+@pytest.mark.parametrize('unit', ['mS', 'MS', 'Ms', 'k', 'F', 'f'])
+def test_parse_does_not_fold_case_of_symbols(unit):
+    assert units.parse(unit) is None